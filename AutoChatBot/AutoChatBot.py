@@ -1,20 +1,18 @@
 import argparse
 import os
+import sys
 
-from .ContextManager import ContextManager
 from .ParserCreator import ParserCreator
-from .GPTChatCompletionSaver import ChatCompletionSaver
-from .TogetherAIModelRetriever import TogetherAIModelRetriever
-from .ConversationPreparer import ConversationPreparer
-from .ChatAPIHandler import ChatAPIHandler
-from .CodeExecutor import CodeExecutor
-from .multi_file_agent import MultiFileAgent
-from .python_file_executor import PythonFileExecutor
+from .Deadline import Deadline
 
 class ChatBot:
     """
     The main ChatBot class to execute the chatbot functionalities.
 
+    Only the argument parser is imported up front. The provider clients, `requests`, the agents and
+    the executors are imported by the command that needs them, so `-h` or `--show_available_context`
+    start without loading the HTTP stack.
+
     Constants
     ---------
     FAIL : str
@@ -36,6 +34,8 @@ class ChatBot:
         Executes the multi-file agent to generate and update multiple files.
     execute_files(file_paths: list) -> dict:
         Executes a list of Python files and captures their stdout and stderr outputs.
+    stream_response(args, conversation) -> dict:
+        Streams a completion to stdout and to the save path as the tokens arrive.
     """
     FAIL = '\33[91m'
     OKGREEN = '\33[92m'
@@ -44,7 +44,7 @@ class ChatBot:
     BOLD = '\33[1m'
 
     @staticmethod
-    def execute_multifile_agent(reference_files: list, rewrite_files: list, question: str = None, question_file_path: str = None, args = None, debug: bool = False) -> dict:
+    def execute_multifile_agent(reference_files: list, rewrite_files: list, question: str = None, question_file_path: str = None, args = None, debug: bool = False, deadline: Deadline = None) -> dict:
         """
         Executes the multi-file agent to generate and update multiple files based on reference files and user-provided questions.
 
@@ -55,11 +55,13 @@ class ChatBot:
         question_file_path (str, optional): The path to the file containing the question. Default is `None`.
         args (Namespace): Parsed CLI arguments for API call.
         debug (bool): Debug flag.
+        deadline (Deadline, optional): End of the run. Default is `None`.
 
         Returns:
         dict: Dictionary with file paths as keys and generated content as values.
         """
-        return MultiFileAgent.execute(reference_files or [], rewrite_files, question, question_file_path, args, debug)
+        from .multi_file_agent import MultiFileAgent
+        return MultiFileAgent.execute(reference_files or [], rewrite_files, question, question_file_path, args, debug, deadline)
 
     @staticmethod
     def execute_files(file_paths: list) -> dict:
@@ -72,8 +74,52 @@ class ChatBot:
         Returns:
         dict: Dictionary with file paths as keys and tuples of (stdout, stderr) as values.
         """
+        from .python_file_executor import PythonFileExecutor
         return PythonFileExecutor.execute(file_paths)
 
+    @staticmethod
+    def stream_response(args, conversation, deadline: Deadline = None) -> dict:
+        """
+        Streams a completion to stdout and to `args.save_path` as the tokens arrive.
+
+        Parameters:
+        args (Namespace): Parsed CLI arguments for API call.
+        conversation (list): The conversation to send.
+        deadline (Deadline, optional): End of the run. Default is `None`.
+
+        Returns:
+        dict: The streamed completion shaped like a regular chat completion response.
+        """
+        import requests
+        from .ChatAPIHandler import ChatAPIHandler
+        stream = ChatAPIHandler.stream_api_request(
+            api=args.api,
+            model=args.model,
+            temperature=args.temperature,
+            max_tokens=args.max_tokens,
+            top_p=args.top_p,
+            conversation=conversation,
+            frequency_penalty=args.frequency_penalty,
+            presence_penalty=args.presence_penalty,
+            stop_sequences=args.stop_sequences,
+            top_k=args.top_k,
+            repetition_penalty=args.repetition_penalty,
+            save_path=args.save_path,
+            deadline=deadline
+        )
+        try:
+            for token in stream:
+                print(token, end='', flush=True)
+        except (requests.exceptions.RequestException, TimeoutError, ValueError) as e:
+            print()
+            print(f"{ChatBot.FAIL}Streaming request failed: {e}\033[0m")
+            sys.exit(1)
+        print()
+        print(f"Message content saved to '{args.save_path}'.")
+        if stream.time_to_first_token is not None:
+            print(f"{ChatBot.OKCYAN}Time to first token: {stream.time_to_first_token:.3f}s, total: {stream.total_time:.3f}s\033[0m")
+        return stream.to_response()
+
     @staticmethod
     def main():
         """
@@ -81,38 +127,106 @@ class ChatBot:
         """
         parser = ParserCreator.create_parser()
         args = parser.parse_args()
+        deadline = Deadline(args.deadline)
+
+        uses_api = any((args.show_models, args.batch_input, args.file_path, args.question, args.run_code,
+                        args.run_code_with_unittest, args.multi_file_agent))
+        if uses_api:
+            from .ChatAPIHandler import ChatAPIHandler
+            ChatAPIHandler.configure_timeouts(connect_timeout=args.connect_timeout, read_timeout=args.read_timeout)
+
+            if args.cache_dir:
+                ChatAPIHandler.configure_cache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+            ChatAPIHandler.configure_retries(max_retries=args.max_retries, max_total_time=args.retry_max_time)
+            if args.requests_per_minute or args.tokens_per_minute:
+                ChatAPIHandler.configure_rate_limit(
+                    args.api,
+                    requests_per_minute=args.requests_per_minute,
+                    tokens_per_minute=args.tokens_per_minute,
+                    shared_db=args.rate_limit_db
+                )
         
         if args.show_available_context:
+            from .ContextManager import ContextManager
             context_data = ContextManager.load_context_data(context_folder='context')
             context_names = ContextManager.get_all_context_names(context_data)
             print("Available contexts:", context_names)
         
+        if args.search_context:
+            from .ContextManager import ContextManager
+            results = ContextManager.search_contexts('context', args.search_context)
+            if not results:
+                print(f"No context matches '{args.search_context}'.")
+            for result in results:
+                print(f"{ChatBot.FAIL}Name: {result['name']}\033[0m  (score {result['score']:.2f})")
+                print(f"  \033[94mDescription: {result['description'] or 'None'}\033[0m")
+                print(f"  \033[94mTags: {', '.join(result['tags']) or 'None'}\033[0m")
+
         if args.show_models:
+            from .TogetherAIModelRetriever import TogetherAIModelRetriever
             models = TogetherAIModelRetriever.get_available_models()
             print("Available Models for TogetherAI:\n")
             TogetherAIModelRetriever.print_models_table(models)
 
+        if args.batch_input:
+            from .BatchJsonlProcessor import BatchJsonlProcessor
+            BatchJsonlProcessor.execute(args, deadline)
+
         if args.file_path or args.question:
-            conversation = ConversationPreparer.decide_conversation(file_path=args.file_path, question=args.question)
-            conversation = ConversationPreparer.str_to_dict_list(conversation)
-            conversation = ConversationPreparer.extend_context(context_name=args.context, conversation=conversation)
-            response = ChatAPIHandler.make_api_request(
-                api=args.api,
-                model=args.model,
-                temperature=args.temperature,
-                max_tokens=args.max_tokens,
-                top_p=args.top_p,
-                conversation=conversation,
-                frequency_penalty=args.frequency_penalty,
-                presence_penalty=args.presence_penalty,
-                stop_sequences=args.stop_sequences,
-                top_k=args.top_k,
-                repetition_penalty=args.repetition_penalty
+            from .ConversationPreparer import ConversationPreparer
+            from .GPTChatCompletionSaver import ChatCompletionSaver
+            token_budget = ConversationPreparer.get_token_budget(args.api, args.max_tokens, args.context_tokens)
+            conversation = ConversationPreparer.decide_conversation(
+                file_path=args.file_path, question=args.question,
+                last_n=args.last_messages, max_tokens=token_budget
             )
-            print("Chat Completion Response:", response)
-            ChatCompletionSaver.save_to_file(response, args.save_path)
+            conversation = ConversationPreparer.str_to_dict_list(conversation)
+            history = []
+            if args.session:
+                from .SessionStore import SessionStore
+                SessionStore.configure(args.session_dir)
+                history = ConversationPreparer.load_session(args.session, conversation, max_tokens=token_budget)
+            if history:
+                # A resumed session already carries the context it was started with
+                conversation = history + conversation
+            else:
+                conversation = ConversationPreparer.extend_context(
+                    context_name=args.context, conversation=conversation, max_tokens=token_budget
+                )
+            if args.stream:
+                response = ChatBot.stream_response(args, conversation, deadline)
+            else:
+                try:
+                    response = ChatAPIHandler.make_api_request(
+                        api=args.api,
+                        model=args.model,
+                        temperature=args.temperature,
+                        max_tokens=args.max_tokens,
+                        top_p=args.top_p,
+                        conversation=conversation,
+                        frequency_penalty=args.frequency_penalty,
+                        presence_penalty=args.presence_penalty,
+                        stop_sequences=args.stop_sequences,
+                        top_k=args.top_k,
+                        repetition_penalty=args.repetition_penalty,
+                        deadline=deadline
+                    )
+                except TimeoutError as e:
+                    print(f"{ChatBot.FAIL}API request timed out: {e}\033[0m")
+                    sys.exit(1)
+                print("Chat Completion Response:", response)
+                if 'error' in response:
+                    print(f"{ChatBot.FAIL}API request failed: {response['error'].get('message')}\033[0m")
+                    sys.exit(1)
+                ChatCompletionSaver.save_to_file(response, args.save_path)
+            if args.session:
+                turn = SessionStore.append_turn(args.session, conversation[len(history):], response['choices'][0]['message'])
+                print(f"Turn {turn} appended to session '{args.session}'.")
             response_content = response['choices'][0]['message']['content']
         
+        if args.run_code or args.run_code_with_unittest:
+            from .CodeExecutor import CodeExecutor
+
         if args.run_code:
             CodeExecutor.retry_api_request(
                 api=args.api,
@@ -128,7 +242,11 @@ class ChatBot:
                 save_path=args.save_path,
                 code_save_path=args.code_save_path,
                 run_code=args.run_code,
-                response_content=response_content
+                response_content=response_content,
+                deadline=deadline,
+                context_tokens=args.context_tokens,
+                stream=args.stream,
+                early_stop=args.early_stop
             )
             
         if args.run_code_with_unittest:
@@ -150,8 +268,13 @@ class ChatBot:
             )
 
         if args.multi_file_agent:
-            result = ChatBot.execute_multifile_agent(
-                args.reference_files, args.rewrite_files, args.question, args.question_file_path, args, args.debug)
+            import requests
+            try:
+                result = ChatBot.execute_multifile_agent(
+                    args.reference_files, args.rewrite_files, args.question, args.question_file_path, args, args.debug, deadline)
+            except (requests.exceptions.RequestException, TimeoutError, ValueError) as e:
+                print(f"{ChatBot.FAIL}Multi-file agent failed: {e}\033[0m")
+                sys.exit(1)
             for file_path, content in result.items():
                 # Get the directory name from the file path
                 
@@ -172,5 +295,16 @@ class ChatBot:
             for file_path, (stdout, stderr) in exec_outputs.items():
                 print(f"Output for {file_path}:\nSTDOUT:\n{stdout}\nSTDERR:\n{stderr}")
 
+        if args.debug and (args.show_available_context or args.search_context or args.context):
+            from .ContextManager import ContextManager
+            print("Context cache stats:", ContextManager.get_cache_stats())
+
+        if args.debug and uses_api:
+            print("Connection pool stats:", ChatAPIHandler.get_connection_stats())
+            print("Retry stats:", ChatAPIHandler.get_retry_stats())
+            print("Rate limit stats:", ChatAPIHandler.get_rate_limit_stats())
+            if args.cache_dir:
+                print("Response cache stats:", ChatAPIHandler.get_cache_stats())
+
 if __name__ == '__main__':
     ChatBot.main()
\ No newline at end of file
@@ -0,0 +1,161 @@
+import json
+from .ChatAPIHandler import ChatAPIHandler
+from .ConversationPreparer import ConversationPreparer
+
+class BatchJsonlProcessor:
+    """
+    BatchJsonlProcessor: This class answers a JSONL file of questions with one concurrent batch of API requests.
+
+    Every input line is one item, either a JSON string (the question) or an object with a `question`
+    or a `conversation` key and an optional `context` name overriding the `--context` argument:
+
+        "What is a closure?"
+        {"question": "Write a unittest for a stack class", "context": "generate_unit_test"}
+        {"conversation": [{"role": "user", "content": "Hello"}]}
+
+    Every output line holds the item's index and either the response or an error. A line that is not
+    valid JSON or an item without a question gets an `invalid_item` error; the other items are still sent:
+
+        {"index": 0, "content": "A closure is ...", "response": {...}}
+        {"index": 1, "error": {"message": "...", "type": "request_error"}}
+        {"index": 2, "error": {"message": "Invalid JSON on line 3 ...", "type": "invalid_item"}}
+
+    Static methods:
+    - read_items(file_path, strict=True): Reads the input JSONL file.
+    - build_conversation(item, default_context=None): Turns one input item into a conversation.
+    - write_results(file_path, responses): Writes the output JSONL file.
+    - execute(args, deadline=None): Runs the whole batch described by the parsed CLI arguments.
+
+    Example usage:
+        AutoChatBot --api togetherai --model cognitivecomputations/dolphin-2.5-mixtral-8x7b \
+            --batch_input questions.jsonl --batch_output responses.jsonl --batch_workers 16
+    """
+
+    @staticmethod
+    def read_items(file_path, strict=True):
+        """
+        Reads the input JSONL file. Blank lines are skipped.
+
+        Args:
+        - file_path (str): Path to the JSONL file.
+        - strict (bool, optional): If False, a line that is not valid JSON is returned as a ValueError
+          in its place instead of being raised. Defaults to True.
+
+        Returns:
+        - list: The decoded items in file order.
+
+        Raises:
+        - FileNotFoundError: If the file does not exist.
+        - ValueError: If a line is not valid JSON and strict is True.
+        """
+        items = []
+        try:
+            with open(file_path, 'r') as file:
+                for line_number, line in enumerate(file, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        items.append(json.loads(line))
+                    except json.JSONDecodeError as e:
+                        error = ValueError(f"Invalid JSON on line {line_number} of '{file_path}': {e}")
+                        if strict:
+                            raise error
+                        items.append(error)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found. Please check the path '{file_path}' and try again.")
+        return items
+
+    @staticmethod
+    def build_conversation(item, default_context=None):
+        """
+        Turns one input item into a conversation, extended with its context.
+
+        Args:
+        - item (str or dict): The decoded input line.
+        - default_context (str, optional): Context used when the item does not name one.
+
+        Returns:
+        - list: The conversation as a list of message dicts.
+
+        Raises:
+        - ValueError: If the item has neither a question nor a conversation.
+        """
+        if isinstance(item, str):
+            item = {"question": item}
+        if not isinstance(item, dict) or not ("question" in item or "conversation" in item):
+            raise ValueError(f"Batch item must be a string or contain a 'question' or 'conversation' key: {item}")
+        conversation = item.get("conversation", item.get("question"))
+        conversation = ConversationPreparer.str_to_dict_list(conversation)
+        return ConversationPreparer.extend_context(item.get("context", default_context), conversation)
+
+    @staticmethod
+    def write_results(file_path, responses):
+        """
+        Writes one JSON line per response, in input order.
+
+        Args:
+        - file_path (str): Path to the output JSONL file.
+        - responses (list): Response or error dicts as returned by `ChatAPIHandler.make_batch_requests`.
+        """
+        with open(file_path, 'w') as file:
+            for index, response in enumerate(responses):
+                if "error" in response:
+                    result = {"index": index, "error": response["error"]}
+                else:
+                    try:
+                        content = response["choices"][0]["message"]["content"]
+                    except (KeyError, IndexError, TypeError):
+                        content = None
+                    result = {"index": index, "content": content, "response": response}
+                file.write(json.dumps(result) + "\n")
+
+    @staticmethod
+    def execute(args, deadline=None):
+        """
+        Reads `args.batch_input`, sends every valid item concurrently and writes `args.batch_output`.
+        Invalid items are recorded as `invalid_item` errors at their index without aborting the batch.
+
+        Args:
+        - args (Namespace): Parsed CLI arguments.
+        - deadline (Deadline, optional): End of the run. Items not sent before it are written as errors.
+
+        Returns:
+        - list: The response or error dict of every item, in input order.
+        """
+        items = BatchJsonlProcessor.read_items(args.batch_input, strict=False)
+        responses = [None] * len(items)
+        conversations = []
+        indexes = []
+        for index, item in enumerate(items):
+            try:
+                if isinstance(item, ValueError):
+                    raise item
+                conversations.append(BatchJsonlProcessor.build_conversation(item, args.context))
+                indexes.append(index)
+            except (ValueError, TypeError) as e:
+                responses[index] = {"error": {"message": str(e), "type": "invalid_item"}}
+
+        ChatAPIHandler.set_concurrency_limit(args.api, args.batch_workers)
+        ChatAPIHandler.configure_pool(args.api, args.batch_workers)
+        sent_responses = ChatAPIHandler.make_batch_requests(
+            conversations,
+            api=args.api,
+            model=args.model,
+            temperature=args.temperature,
+            max_tokens=args.max_tokens,
+            top_p=args.top_p,
+            frequency_penalty=args.frequency_penalty,
+            presence_penalty=args.presence_penalty,
+            stop_sequences=args.stop_sequences,
+            top_k=args.top_k,
+            repetition_penalty=args.repetition_penalty,
+            max_workers=args.batch_workers,
+            deadline=deadline
+        )
+        for index, response in zip(indexes, sent_responses):
+            responses[index] = response
+        BatchJsonlProcessor.write_results(args.batch_output, responses)
+
+        errors = sum(1 for response in responses if "error" in response)
+        print(f"Batch finished: {len(responses) - errors} succeeded, {errors} failed. Results saved to '{args.batch_output}'.")
+        return responses
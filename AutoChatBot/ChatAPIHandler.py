@@ -1,7 +1,24 @@
-from .GPTChatCompletion import GPT3ChatCompletion
-from .TogetherAIChatCompletion import TogetherAIChatCompletion
+import asyncio
+import functools
+import threading
+import weakref
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from .ProviderRegistry import ProviderRegistry
+from .HTTPSessionPool import HTTPSessionPool
+from .ChatCompletionStream import ChatCompletionStream
+from .ResponseCache import ResponseCache
+from .RetryPolicy import RetryPolicy
+from .RateLimiter import RateLimiter
+from .TokenEstimator import TokenEstimator
+from .Deadline import Deadline
 
 class ChatAPIHandler:
+    DEFAULT_CONCURRENCY = 8
+
+    _concurrency_limits = {}
+    _semaphores = weakref.WeakKeyDictionary()
+
     @staticmethod
     def make_api_request(
         api: str,
@@ -14,13 +31,15 @@ class ChatAPIHandler:
         presence_penalty: float = 0.0,
         stop_sequences: list = None,
         top_k: int = 50,
-        repetition_penalty: float = 1.0
+        repetition_penalty: float = 1.0,
+        deadline: Deadline = None
     ) -> dict:
         """
         Handle API request to either OpenAI or TogetherAI based on the provided arguments.
+        This is a blocking wrapper around `make_api_request_async`.
 
         Args:
-            api (str): The API to use, either 'openai' or 'togetherai'.
+            api (str): The API to use, one of `ProviderRegistry.names()`, e.g. 'openai', 'togetherai' or 'local'.
             model (str): The model name to use for the completion request.
             temperature (float): Controls randomness: lower values make completions more deterministic.
             max_tokens (int): Maximum number of tokens to generate in the completion.
@@ -31,12 +50,15 @@ class ChatAPIHandler:
             stop_sequences (list, optional): Sequences where the API should stop generating further tokens. Defaults to None.
             top_k (int, optional): Top-k sampling: The number of highest probability vocabulary tokens to keep for sampling. Defaults to 50.
             repetition_penalty (float, optional): Penalty for repetition of tokens. Defaults to 1.0.
+            deadline (Deadline, optional): End of the run. Socket timeouts are shortened to the time
+                left and no attempt or retry is started after it. Defaults to None (no deadline).
 
         Returns:
             dict: The response from the API request.
 
         Raises:
             ValueError: If an invalid API is selected.
+            TimeoutError: If the deadline passed before the request could be sent, or would pass while waiting for the rate limiter.
 
         Examples:
             >>> response = ChatAPIHandler.make_api_request(
@@ -53,63 +75,591 @@ class ChatAPIHandler:
             >>>     repetition_penalty=1.2
             >>> )
         """
-        if api == "openai":
-            api_key = GPT3ChatCompletion.load_api_key()
-            response = GPT3ChatCompletion.make_api_request(
-                api_key=api_key,
-                conversation=conversation,
+        return ChatAPIHandler.run_sync(ChatAPIHandler.make_api_request_async(
+            api=api,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            conversation=conversation,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop_sequences=stop_sequences,
+            top_k=top_k,
+            repetition_penalty=repetition_penalty,
+            deadline=deadline
+        ))
+
+    @staticmethod
+    async def make_api_request_async(
+        api: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        conversation: list,
+        top_p: float = 0.9,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop_sequences: list = None,
+        top_k: int = 50,
+        repetition_penalty: float = 1.0,
+        deadline: Deadline = None
+    ) -> dict:
+        """
+        Awaitable version of `make_api_request`, taking the same arguments.
+
+        At most `get_concurrency_limit(api)` requests per API are in flight at once in an event loop;
+        further requests wait for a free slot without occupying a thread. The blocking HTTP call runs
+        in the loop's default executor over the pooled keep-alive session, so many requests can
+        overlap their network waits. If the response cache is configured, identical requests are
+        answered from disk without a network call.
+
+        Cancelling the awaiting task raises `asyncio.CancelledError` in the caller right away and
+        frees the concurrency slot. A request that has not started yet is never sent; one already
+        on the wire finishes in its worker thread, is not retried, and its result is discarded.
+
+        Rate limits (429), server errors (5xx) and connection failures are retried according to
+        `RetryPolicy` (exponential backoff with full jitter, honouring Retry-After). If retrying is
+        given up, the last error dict is returned.
+
+        Returns:
+            dict: The response from the API request.
+
+        Raises:
+            ValueError: If an invalid API is selected.
+            TimeoutError: If the deadline passed before the request could be sent, or would pass while waiting for the rate limiter.
+
+        Examples:
+            >>> responses = await asyncio.gather(*(
+            >>>     ChatAPIHandler.make_api_request_async(
+            >>>         api="togetherai",
+            >>>         model="cognitivecomputations/dolphin-2.5-mixtral-8x7b",
+            >>>         temperature=0.7,
+            >>>         max_tokens=150,
+            >>>         conversation=[{"role": "user", "content": question}]
+            >>>     )
+            >>>     for question in questions
+            >>> ))
+        """
+        ProviderRegistry.get(api)
+        if deadline is not None:
+            deadline.check()
+        cancel_event = threading.Event()
+        request = functools.partial(
+            ChatAPIHandler._cached_send_request,
+            cancel_event=cancel_event,
+            deadline=deadline,
+            api=api,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            conversation=conversation,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop_sequences=stop_sequences,
+            top_k=top_k,
+            repetition_penalty=repetition_penalty
+        )
+        async with ChatAPIHandler._get_semaphore(api):
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(None, request)
+            except asyncio.CancelledError:
+                cancel_event.set()
+                raise
+
+    @staticmethod
+    def make_batch_requests(
+        conversations: list,
+        api: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        top_p: float = 0.9,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop_sequences: list = None,
+        top_k: int = 50,
+        repetition_penalty: float = 1.0,
+        max_workers: int = 8,
+        deadline: Deadline = None
+    ) -> list:
+        """
+        Send many conversations concurrently and return their responses in input order.
+
+        A failing item does not abort the batch: its slot in the result list holds an error dict
+        `{"error": {"message": ..., "type": ...}}`, the same shape TogetherAI errors already use.
+        Concurrency is `max_workers`, further capped by `get_concurrency_limit(api)`.
+
+        Args:
+            conversations (list): One conversation (list of message dicts) per request.
+            max_workers (int, optional): Maximum number of requests in flight. Defaults to 8.
+            deadline (Deadline, optional): Items not sent before it get a TimeoutError error dict.
+            The remaining arguments are the same as for `make_api_request` and apply to every item.
+
+        Returns:
+            list: One response or error dict per conversation, in the same order.
+
+        Raises:
+            ValueError: If an invalid API is selected or max_workers is smaller than 1.
+
+        Examples:
+            >>> responses = ChatAPIHandler.make_batch_requests(
+            >>>     conversations=[[{"role": "user", "content": q}] for q in questions],
+            >>>     api="togetherai",
+            >>>     model="cognitivecomputations/dolphin-2.5-mixtral-8x7b",
+            >>>     temperature=0.7,
+            >>>     max_tokens=150,
+            >>>     max_workers=16
+            >>> )
+        """
+        async def run_batch():
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_workers))
+            return await ChatAPIHandler.make_batch_requests_async(
+                conversations,
+                api=api,
                 model=model,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                stop_sequences=stop_sequences,
+                top_p=top_p,
                 frequency_penalty=frequency_penalty,
                 presence_penalty=presence_penalty,
-                top_p=top_p,
+                stop_sequences=stop_sequences,
+                top_k=top_k,
+                repetition_penalty=repetition_penalty,
+                max_workers=max_workers,
+                deadline=deadline
             )
-        elif api == "togetherai":
-            api_key = TogetherAIChatCompletion.load_api_key()
-            response = TogetherAIChatCompletion.make_api_request(
+
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        return ChatAPIHandler.run_sync(run_batch())
+
+    @staticmethod
+    async def make_batch_requests_async(conversations: list, api: str, max_workers: int = 8, **request_kwargs) -> list:
+        """
+        Awaitable version of `make_batch_requests`, taking the same arguments.
+
+        Returns:
+            list: One response or error dict per conversation, in the same order.
+        """
+        ProviderRegistry.get(api)
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        workers = asyncio.Semaphore(max_workers)
+
+        async def run_one(conversation):
+            async with workers:
+                try:
+                    return await ChatAPIHandler.make_api_request_async(api=api, conversation=conversation, **request_kwargs)
+                except Exception as e:
+                    return {"error": {"message": str(e), "type": type(e).__name__}}
+
+        return list(await asyncio.gather(*(run_one(conversation) for conversation in conversations)))
+
+    @staticmethod
+    def _cached_send_request(cancel_event: threading.Event = None, deadline: Deadline = None, **request_params) -> dict:
+        """
+        Answer a request from the response cache if possible; otherwise send it (with retries) and
+        cache the response if it succeeded. Runs in an executor thread.
+        """
+        if not ResponseCache.is_enabled():
+            return ChatAPIHandler._send_with_retry(request_params, cancel_event, deadline)
+        key = ResponseCache.make_key(**request_params)
+        response = ResponseCache.get(key)
+        if response is None:
+            response = ChatAPIHandler._send_with_retry(request_params, cancel_event, deadline)
+            if 'choices' in response and 'error' not in response:
+                ResponseCache.put(key, response)
+        return response
+
+    @staticmethod
+    def _send_with_retry(request_params: dict, cancel_event: threading.Event = None, deadline: Deadline = None) -> dict:
+        """
+        Send a request, retrying transient failures according to `RetryPolicy`. Every attempt first
+        waits for the `RateLimiter` to admit it, then gets socket timeouts capped by the deadline.
+        Timeouts and connection failures of any backend are returned as error dicts, the way
+        `TogetherAIChatCompletion` reports them, instead of escaping as `requests` exceptions.
+        """
+        api, model = request_params['api'], request_params['model']
+        tokens = TokenEstimator.estimate_request(request_params['conversation'], request_params['max_tokens'])
+
+        def send():
+            if not ChatAPIHandler._acquire_rate_limit(api, model, tokens, deadline, cancel_event):
+                return {"error": {"message": "Request cancelled while waiting for the rate limiter.", "type": "cancelled"}}
+            if deadline is not None:
+                deadline.check()
+            try:
+                return ChatAPIHandler._send_request(timeout=HTTPSessionPool.get_timeout(deadline), **request_params)
+            except requests.exceptions.Timeout as e:
+                return {"error": {"message": str(e), "type": "timeout_error"}}
+            except requests.exceptions.ConnectionError as e:
+                return {"error": {"message": str(e), "type": "connection_error"}}
+
+        return RetryPolicy.call(api, send, cancel_event=cancel_event, deadline=deadline)
+
+    @staticmethod
+    def _send_request(
+        api: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        conversation: list,
+        top_p: float = 0.9,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop_sequences: list = None,
+        top_k: int = 50,
+        repetition_penalty: float = 1.0,
+        timeout: tuple = None
+    ) -> dict:
+        """
+        Send one blocking request to the selected API through its registered backend. Runs in an executor thread.
+        """
+        return ProviderRegistry.make_api_request(
+            api,
+            conversation=conversation,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop_sequences=stop_sequences,
+            top_k=top_k,
+            repetition_penalty=repetition_penalty
+        )
+
+    @staticmethod
+    def run_sync(coroutine):
+        """
+        Run a coroutine to completion from synchronous code and return its result.
+
+        When called from a thread that already runs an event loop, the coroutine is run on a
+        helper thread with its own loop, so sync entry points stay usable inside async code.
+
+        Args:
+            coroutine: The coroutine to run.
+
+        Returns:
+            The value returned by the coroutine.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+
+    @staticmethod
+    def set_concurrency_limit(api: str, limit: int) -> None:
+        """
+        Set how many requests to an API may be in flight at once per event loop.
+        Event loops that already created their semaphore keep the previous limit.
+
+        Args:
+            api (str): The API to limit, e.g. 'openai'.
+            limit (int): Maximum number of concurrent requests.
+
+        Raises:
+            ValueError: If limit is smaller than 1.
+        """
+        if limit < 1:
+            raise ValueError("Concurrency limit must be at least 1.")
+        ChatAPIHandler._concurrency_limits[api] = limit
+
+    @staticmethod
+    def get_concurrency_limit(api: str) -> int:
+        """
+        Return the maximum number of concurrent requests for an API.
+        """
+        return ChatAPIHandler._concurrency_limits.get(api, ChatAPIHandler.DEFAULT_CONCURRENCY)
+
+    @staticmethod
+    def _get_semaphore(api: str) -> asyncio.Semaphore:
+        """
+        Return the semaphore bounding requests to an API in the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        semaphores = ChatAPIHandler._semaphores.get(loop)
+        if semaphores is None:
+            semaphores = ChatAPIHandler._semaphores[loop] = {}
+        if api not in semaphores:
+            semaphores[api] = asyncio.Semaphore(ChatAPIHandler.get_concurrency_limit(api))
+        return semaphores[api]
+
+    @staticmethod
+    def stream_api_request(
+        api: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        conversation: list,
+        top_p: float = 0.9,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        stop_sequences: list = None,
+        top_k: int = 50,
+        repetition_penalty: float = 1.0,
+        save_path: str = None,
+        deadline: Deadline = None
+    ) -> ChatCompletionStream:
+        """
+        Handle a streaming API request. The request is sent when the returned stream is first iterated,
+        and tokens are yielded as the server-sent events arrive. Rate limits, server errors and connection
+        failures before the first token are retried like `make_api_request`'s.
+
+        Args:
+            api (str): The API to use, one of `ProviderRegistry.names()`, e.g. 'openai', 'togetherai' or 'local'.
+            save_path (str, optional): File that receives the tokens as they arrive. Defaults to None.
+            deadline (Deadline, optional): Caps the connect timeout and the wait for each chunk.
+            The remaining arguments are the same as for `make_api_request`.
+
+        Returns:
+            ChatCompletionStream: Iterable over the completion tokens. After it is exhausted it holds the
+            full content, the time to first token and a `to_response()` dict shaped like `make_api_request`'s.
+
+        Raises:
+            ValueError: If an invalid API is selected or it does not support streaming.
+            While iterating the stream:
+            requests.exceptions.RequestException: If opening the stream failed after all retries.
+            TimeoutError: If the deadline passed before the request could be sent, or would pass while waiting for the rate limiter.
+
+        Examples:
+            >>> stream = ChatAPIHandler.stream_api_request(
+            >>>     api="togetherai",
+            >>>     model="cognitivecomputations/dolphin-2.5-mixtral-8x7b",
+            >>>     temperature=0.7,
+            >>>     max_tokens=2000,
+            >>>     conversation=[{"role": "user", "content": "Write a long story."}],
+            >>>     save_path="response.tmp"
+            >>> )
+            >>> for token in stream:
+            >>>     print(token, end="", flush=True)
+            >>> print(stream.time_to_first_token)
+        """
+        if not ProviderRegistry.get_capabilities(api)['streaming']:
+            raise ValueError(f"The '{api}' API does not support streaming.")
+
+        def open_stream(timeout):
+            return ProviderRegistry.stream_api_request(
+                api,
                 conversation=conversation,
-                api_key=api_key,
                 model=model,
                 temperature=temperature,
                 max_tokens=max_tokens,
+                timeout=timeout,
                 top_p=top_p,
+                frequency_penalty=frequency_penalty,
+                presence_penalty=presence_penalty,
+                stop_sequences=stop_sequences,
                 top_k=top_k,
-                repetition_penalty=repetition_penalty,
+                repetition_penalty=repetition_penalty
             )
-        else:
-            raise ValueError("Invalid API selection. Choose 'openai' or 'togetherai'.")
-        return response
+
+        tokens = ChatAPIHandler._retrying_stream(
+            api, model, TokenEstimator.estimate_request(conversation, max_tokens), open_stream, deadline
+        )
+        return ChatCompletionStream(tokens, model=model, save_path=save_path, deadline=deadline)
+
+    @staticmethod
+    def _retrying_stream(api: str, model: str, estimated_tokens: int, open_stream, deadline: Deadline = None):
+        """
+        Yield the tokens of a stream whose opening (request, status check and first token) is retried
+        according to `RetryPolicy`, each attempt admitted by the `RateLimiter`. Once the first token has
+        been handed out the stream is not retried. Returns the stream's finish_reason.
+
+        Raises:
+            requests.exceptions.RequestException: The last error, if retrying the opening is given up.
+            TimeoutError: If the deadline passed, or the rate limiter would delay an attempt past it.
+        """
+        opened = {}
+
+        def send():
+            ChatAPIHandler._acquire_rate_limit(api, model, estimated_tokens, deadline)
+            if deadline is not None:
+                deadline.check()
+            tokens = open_stream(HTTPSessionPool.get_timeout(deadline))
+            try:
+                opened['first'] = [next(tokens)]
+            except StopIteration as end:
+                opened['first'] = []
+                opened['finish_reason'] = end.value
+            except requests.exceptions.HTTPError as e:
+                opened['error'] = e
+                return ChatAPIHandler._error_from_http_error(e)
+            else:
+                opened['tokens'] = tokens
+            return {}
+
+        response = RetryPolicy.call(api, send, deadline=deadline)
+        if 'error' in response:
+            raise opened['error']
+        yield from opened['first']
+        if 'tokens' in opened:
+            return (yield from opened['tokens'])
+        return opened['finish_reason']
+
+    @staticmethod
+    def _acquire_rate_limit(api: str, model: str, tokens: int, deadline: Deadline = None, cancel_event=None) -> bool:
+        """
+        Wait for the `RateLimiter` to admit a request, but never past the deadline.
+
+        Returns:
+            bool: True if the request may be sent, False if the wait was cancelled.
+
+        Raises:
+            TimeoutError: If the request would have to wait past the deadline.
+        """
+        max_wait = deadline.remaining() if deadline is not None else None
+        if RateLimiter.acquire(api, model, tokens, cancel_event=cancel_event, max_wait=max_wait):
+            return True
+        if cancel_event is not None and cancel_event.is_set():
+            return False
+        raise TimeoutError(f"Deadline of {deadline.seconds}s would pass while waiting for the rate limiter.")
+
+    @staticmethod
+    def _error_from_http_error(error: requests.exceptions.HTTPError) -> dict:
+        """
+        Convert an HTTP error status into the error dict `RetryPolicy` understands.
+        """
+        response = error.response
+        return {"error": {
+            "message": str(error),
+            "type": "request_error",
+            "status_code": response.status_code if response is not None else None,
+            "retry_after": response.headers.get("Retry-After") if response is not None else None,
+        }}
+
+    @staticmethod
+    def configure_pool(api: str, pool_size: int) -> None:
+        """
+        Set how many keep-alive connections are pooled for an API. All requests made through
+        ChatAPIHandler share these connections for the lifetime of the process.
+
+        Args:
+            api (str): The API to configure, e.g. 'openai'.
+            pool_size (int): Maximum number of pooled connections per host.
+        """
+        HTTPSessionPool.configure(api, pool_size)
+
+    @staticmethod
+    def get_connection_stats(api: str = None) -> dict:
+        """
+        Report how often pooled connections were reused instead of opening a new TCP+TLS connection.
+
+        Args:
+            api (str, optional): Only report this API. Defaults to every API used so far.
+
+        Returns:
+            dict: Per-API dict with 'pool_size', 'requests', 'connections' and 'reused' counts.
+        """
+        return HTTPSessionPool.get_stats(api)
+
+    @staticmethod
+    def configure_cache(cache_dir: str, max_bytes: int = ResponseCache.DEFAULT_MAX_BYTES) -> None:
+        """
+        Enable the on-disk response cache in front of `make_api_request`. Requests with the same
+        API, model, conversation and sampling parameters are then answered from `cache_dir`.
+
+        Args:
+            cache_dir (str): Directory holding the cache entries. Several processes may share it.
+            max_bytes (int, optional): Size cap; least recently used entries are evicted beyond it.
+        """
+        ResponseCache.configure(cache_dir, max_bytes)
+
+    @staticmethod
+    def get_cache_stats() -> dict:
+        """
+        Report the response cache counters of this process.
+
+        Returns:
+            dict: 'hits', 'misses', 'stores' and 'evictions' counts.
+        """
+        return ResponseCache.get_stats()
+
+    @staticmethod
+    def configure_retries(max_retries: int = None, max_total_time: float = None, base_delay: float = None, max_delay: float = None) -> None:
+        """
+        Change how transient provider errors are retried. Arguments left as None keep their value.
+
+        Args:
+            max_retries (int, optional): Retries after the first attempt; 0 disables retrying.
+            max_total_time (float, optional): Seconds after the first attempt beyond which no retry is started.
+            base_delay (float, optional): Backoff scale in seconds.
+            max_delay (float, optional): Upper bound of a single backoff wait in seconds.
+        """
+        RetryPolicy.configure(max_retries=max_retries, base_delay=base_delay, max_delay=max_delay, max_total_time=max_total_time)
+
+    @staticmethod
+    def get_retry_stats(api: str = None) -> dict:
+        """
+        Report how many requests, attempts and retries were made per API, and how often retrying was given up.
+
+        Args:
+            api (str, optional): Only report this API. Defaults to every API used so far.
+
+        Returns:
+            dict: Per-API dict with 'requests', 'attempts', 'retries' and 'gave_up' counts.
+        """
+        return RetryPolicy.get_stats(api)
+
+    @staticmethod
+    def configure_timeouts(connect_timeout: float = None, read_timeout: float = None) -> None:
+        """
+        Set the socket timeouts of every provider request. Arguments left as None keep their value.
+
+        Args:
+            connect_timeout (float, optional): Seconds to wait for a connection. Defaults to 10.
+            read_timeout (float, optional): Seconds to wait for the next byte (or stream chunk) of the answer. Defaults to 120.
+        """
+        HTTPSessionPool.configure_timeout(connect_timeout=connect_timeout, read_timeout=read_timeout)
+
+    @staticmethod
+    def configure_rate_limit(api: str, requests_per_minute: int = None, tokens_per_minute: int = None, model: str = None, shared_db: str = None) -> None:
+        """
+        Hold requests back so they stay under the provider's per-minute limits.
+
+        Args:
+            api (str): The API to limit.
+            requests_per_minute (int, optional): Maximum requests per minute. None or 0 is not enforced.
+            tokens_per_minute (int, optional): Maximum estimated tokens (prompt plus max_tokens) per minute.
+            model (str, optional): Only limit this model. Defaults to every model of the API.
+            shared_db (str, optional): SQLite file through which processes on this host share one budget.
+        """
+        RateLimiter.configure(api, requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute, model=model)
+        if shared_db:
+            RateLimiter.use_shared_store(shared_db)
+
+    @staticmethod
+    def get_rate_limit_stats(api: str = None) -> dict:
+        """
+        Report how many requests the rate limiter admitted per model, how many had to wait, and for how long.
+
+        Args:
+            api (str, optional): Only report the models of this API.
+
+        Returns:
+            dict: Maps 'api/model' to 'requests', 'delayed' and 'wait_time' (seconds).
+        """
+        return RateLimiter.get_stats(api)
 
 class ChatAPIHandler2:
     @staticmethod
-    def make_api_request(args, conversation):
-        if args.api == "openai":
-            api_key = GPT3ChatCompletion.load_api_key()
-            response = GPT3ChatCompletion.make_api_request(
-                api_key=api_key,
-                conversation=conversation,
-                model=args.model,
-                temperature=args.temperature,
-                max_tokens=args.max_tokens,
-                stop_sequences=args.stop_sequences,
-                frequency_penalty=args.frequency_penalty,
-                presence_penalty=args.presence_penalty,
-                top_p=args.top_p,
-            )
-        elif args.api == "togetherai":
-            api_key = TogetherAIChatCompletion.load_api_key()
-            response = TogetherAIChatCompletion.make_api_request(
-                conversation=conversation,
-                api_key=api_key,
-                model=args.model,
-                temperature=args.temperature,
-                max_tokens=args.max_tokens,
-                top_p=args.top_p,
-                top_k=args.top_k,
-                repetition_penalty=args.repetition_penalty,
-            )
-        else:
-            raise ValueError("Invalid API selection. Choose 'openai' or 'togetherai'.")
-        return response
+    def make_api_request(args, conversation, deadline=None):
+        return ChatAPIHandler.make_api_request(
+            api=args.api,
+            model=args.model,
+            temperature=args.temperature,
+            max_tokens=args.max_tokens,
+            conversation=conversation,
+            top_p=args.top_p,
+            frequency_penalty=args.frequency_penalty,
+            presence_penalty=args.presence_penalty,
+            stop_sequences=args.stop_sequences,
+            top_k=args.top_k,
+            repetition_penalty=args.repetition_penalty,
+            deadline=deadline,
+        )
@@ -0,0 +1,137 @@
+import time
+from .GPTChatCompletionSaver import ChatCompletionSaver
+
+class ChatCompletionStream:
+    """
+    ChatCompletionStream: This class wraps a stream of completion tokens and records timing information while it is consumed.
+
+    Iterating over the stream yields the tokens as they arrive. If a save path is given, every token
+    is appended to that file before it is yielded. Once the stream is exhausted, `to_response` builds a
+    response dict shaped like a regular (non-streaming) chat completion, so code that reads
+    `response['choices'][0]['message']['content']` keeps working.
+
+    If a deadline is given, it is checked after every token. Once it has passed, the provider
+    generator is closed (which closes the HTTP response) and iteration raises `TimeoutError`, so a
+    server that keeps sending tokens cannot hold the stream open past the deadline.
+
+    `stop()` ends the stream early in the same way, without an error: iteration ends before the next
+    token is read, and the tokens the server would still have sent are neither waited for nor read.
+
+    The finish_reason is the return value of the token generator (the providers return the one of
+    the last stream chunk, see `SSEStreamParser.iter_tokens`), or 'cancelled' after `stop()`.
+
+    Attributes:
+    - model (str): The model that produced the stream.
+    - content (str): The text received so far.
+    - chunk_count (int): Number of streamed chunks received so far.
+    - time_to_first_token (float or None): Seconds between starting the request and the first token.
+    - total_time (float or None): Seconds between starting the request and the end of the stream.
+    - stopped_early (bool): Whether `stop()` ended the stream.
+    - finish_reason (str or None): Why the completion ended, e.g. 'stop', 'length' or 'cancelled'.
+      None while streaming, or if the provider did not report it.
+
+    Example usage:
+        stream = ChatAPIHandler.stream_api_request(api='openai', model='gpt-3.5-turbo', temperature=1,
+                                                   max_tokens=500, conversation=conversation,
+                                                   save_path='response.tmp')
+        for token in stream:
+            print(token, end='', flush=True)
+        print(f"Time to first token: {stream.time_to_first_token:.3f}s")
+        response = stream.to_response()
+    """
+
+    def __init__(self, tokens, model=None, save_path=None, deadline=None):
+        """
+        Args:
+        - tokens (iterable of str): The token generator returned by a provider's `stream_api_request`.
+          Its return value is taken as the finish_reason.
+        - model (str, optional): The model name, reported in `to_response`.
+        - save_path (str, optional): File that receives the tokens as they arrive.
+        - deadline (Deadline, optional): Ends the stream with `TimeoutError` once it has passed.
+        """
+        self.model = model
+        self.save_path = save_path
+        self.chunk_count = 0
+        self.time_to_first_token = None
+        self.total_time = None
+        self.deadline = deadline
+        self.stopped_early = False
+        self.finish_reason = None
+        self._tokens = tokens
+        self._parts = []
+
+    def __iter__(self):
+        start_time = time.perf_counter()
+        tokens = self._tokens
+        if self.save_path:
+            tokens = ChatCompletionSaver.stream_to_file(tokens, self.save_path)
+        iterator = iter(tokens)
+        while True:
+            try:
+                token = next(iterator)
+            except StopIteration as end:
+                self.finish_reason = end.value
+                break
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.perf_counter() - start_time
+            self.chunk_count += 1
+            self._parts.append(token)
+            yield token
+            if self.stopped_early:
+                self._close(tokens)
+                self.finish_reason = 'cancelled'
+                break
+            if self.deadline is not None and self.deadline.expired():
+                self._close(tokens)
+                raise TimeoutError(f"Deadline of {self.deadline.seconds}s exceeded while streaming the response.")
+        self.total_time = time.perf_counter() - start_time
+
+    def stop(self):
+        """
+        Ends the stream after the token that was yielded last, closing the HTTP response.
+        """
+        self.stopped_early = True
+
+    def _close(self, tokens):
+        for generator in (tokens, self._tokens):
+            close = getattr(generator, 'close', None)
+            if close is not None:
+                close()
+
+    @property
+    def content(self):
+        return ''.join(self._parts)
+
+    def consume(self):
+        """
+        Reads the remaining stream without handling the tokens individually.
+
+        Returns:
+        - str: The complete text of the completion.
+        """
+        for _ in self:
+            pass
+        return self.content
+
+    def to_response(self):
+        """
+        Builds a chat completion response dict from the streamed text.
+
+        Returns:
+        - dict: A response with the same shape as a non-streaming chat completion, with the stream's
+          finish_reason.
+        """
+        return {
+            'object': 'chat.completion',
+            'model': self.model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': self.content},
+                'finish_reason': self.finish_reason
+            }],
+            'stream_stats': {
+                'chunks': self.chunk_count,
+                'time_to_first_token': self.time_to_first_token,
+                'total_time': self.total_time,
+            }
+        }
@@ -0,0 +1,204 @@
+from .ChatAPIHandler import ChatAPIHandler
+from .ProviderRegistry import ProviderRegistry
+from .TokenEstimator import TokenEstimator
+from .IncrementalCodeExtractor import IncrementalCodeExtractor
+from .StreamingThinkFilter import StreamingThinkFilter
+
+class CodeBlockStopper:
+    """
+    CodeBlockStopper: This class ends a streamed completion as soon as the code block the caller keeps is complete, so the tokens the model would write after it are neither waited for nor paid for.
+
+    It wraps a `ChatCompletionStream` and is used like one. The stream is watched with an
+    `IncrementalCodeExtractor` (on the text outside think spans, see `StreamingThinkFilter`), and once
+    the first block of the language closes, the stream is stopped on the client side.
+
+    Backends that accept stop sequences are also asked to stop at CLOSING_FENCE, which ends the
+    generation on the server. The server leaves the stop sequence out of the text, so if the stream ends
+    inside a block of the language, the closing fence is added back, unless the stream's finish_reason
+    says it ended for another reason (e.g. 'length', the block was cut off). The stop sequence is only sent for
+    a named language: the opening fence of an untagged block would match it too. It still ends a
+    completion at the first closing fence, so a completion whose first block has another language
+    loses the blocks after it.
+
+    Savings are estimates: what the model would have written after the block is unknown, so
+    `tokens_saved` is the rest of the max_tokens budget, and `seconds_saved` that many tokens at the
+    stream's own rate. Both are upper bounds.
+
+    Static methods:
+    - stream_api_request(api, model, temperature, max_tokens, conversation, language, ...): Streams a request that stops after the block.
+    - get_stop_sequences(api, language, stop_sequences=None): Returns the stop sequences to send for a language.
+    - format_savings(savings): Formats savings for printing.
+
+    Methods:
+    - consume(): Reads the stream and returns its text.
+    - get_savings(): Returns what stopping early saved, or None.
+    - to_response(): Returns the completion in the shape of a chat completion response.
+
+    Example usage:
+        stream = CodeBlockStopper.stream_api_request(api='openai', model='gpt-3.5-turbo', temperature=1,
+                                                     max_tokens=2000, conversation=conversation, language='python')
+        code = CodeExtractor.extract_code(stream.consume(), language='python')
+        print(CodeBlockStopper.format_savings(stream.get_savings()))
+    """
+    CLOSING_FENCE = '\n```\n'
+    MAX_STOP_SEQUENCES = 4
+
+    def __init__(self, stream, language, max_tokens=None, stop_sequence_sent=False):
+        """
+        Args:
+        - stream (ChatCompletionStream): The streamed completion.
+        - language (str): Language of the block to stop after. An empty string selects untagged blocks.
+        - max_tokens (int, optional): The request's max_tokens, used to estimate the savings.
+        - stop_sequence_sent (bool, optional): Whether CLOSING_FENCE was sent as a stop sequence.
+        """
+        self.stream = stream
+        self.language = language
+        self.max_tokens = max_tokens
+        self.stop_sequence_sent = stop_sequence_sent
+        self.stop_method = None
+        self._parts = []
+
+    @staticmethod
+    def get_stop_sequences(api, language, stop_sequences=None):
+        """
+        Adds CLOSING_FENCE to the stop sequences if the backend accepts stop sequences, the language is
+        named and there is room for one more.
+
+        Args:
+        - api (str): The API name.
+        - language (str): Language of the block.
+        - stop_sequences (list, optional): The caller's stop sequences.
+
+        Returns:
+        - tuple: (the stop sequences to send, or None, whether CLOSING_FENCE is among them).
+        """
+        stop_sequences = list(stop_sequences or [])
+        if (language and 'stop_sequences' in ProviderRegistry.get(api)['parameters']
+                and len(stop_sequences) < CodeBlockStopper.MAX_STOP_SEQUENCES):
+            if CodeBlockStopper.CLOSING_FENCE not in stop_sequences:
+                stop_sequences.append(CodeBlockStopper.CLOSING_FENCE)
+            return stop_sequences, True
+        return stop_sequences or None, False
+
+    @staticmethod
+    def stream_api_request(api, model, temperature, max_tokens, conversation, language, top_p=0.9,
+                           frequency_penalty=0.0, presence_penalty=0.0, stop_sequences=None, top_k=50,
+                           repetition_penalty=1.0, save_path=None, deadline=None):
+        """
+        Streams a request (see `ChatAPIHandler.stream_api_request`) that ends once the first block of
+        the language is complete.
+
+        Args:
+        - language (str): Language of the block to stop after.
+        - The remaining arguments are the same as for `ChatAPIHandler.stream_api_request`.
+
+        Returns:
+        - CodeBlockStopper: Iterable over the completion tokens.
+
+        Raises:
+        - ValueError: If an invalid API is selected or it does not support streaming.
+        """
+        stop_sequences, stop_sequence_sent = CodeBlockStopper.get_stop_sequences(api, language, stop_sequences)
+        stream = ChatAPIHandler.stream_api_request(
+            api=api,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            conversation=conversation,
+            top_p=top_p,
+            frequency_penalty=frequency_penalty,
+            presence_penalty=presence_penalty,
+            stop_sequences=stop_sequences,
+            top_k=top_k,
+            repetition_penalty=repetition_penalty,
+            save_path=save_path,
+            deadline=deadline
+        )
+        return CodeBlockStopper(stream, language, max_tokens=max_tokens, stop_sequence_sent=stop_sequence_sent)
+
+    def __iter__(self):
+        extractor = IncrementalCodeExtractor(self.language)
+        think_filter = StreamingThinkFilter()
+        for token in self.stream:
+            self._parts.append(token)
+            yield token
+            if self.stop_method is None and extractor.feed(think_filter.feed(token)):
+                self.stop_method = 'abort'
+                self.stream.stop()
+        if self.stop_method is None:
+            extractor.feed(think_filter.finish())
+            if (self.stop_sequence_sent and self.stream.finish_reason in (None, 'stop')
+                    and any(not block['closed'] for block in extractor.finish())):
+                # The server stopped at the closing fence and left it out
+                self.stop_method = 'stop_sequence'
+                self._parts.append(self.CLOSING_FENCE)
+                yield self.CLOSING_FENCE
+
+    @property
+    def content(self):
+        return ''.join(self._parts)
+
+    @property
+    def time_to_first_token(self):
+        return self.stream.time_to_first_token
+
+    @property
+    def total_time(self):
+        return self.stream.total_time
+
+    def consume(self):
+        """
+        Reads the remaining stream without handling the tokens individually.
+
+        Returns:
+        - str: The text of the completion, up to the end of the block.
+        """
+        for _ in self:
+            pass
+        return self.content
+
+    def get_savings(self):
+        """
+        Returns:
+        - dict or None: None if the completion ended on its own. Otherwise 'method' ('abort' or
+          'stop_sequence'), 'tokens' (estimated tokens received), 'tokens_saved' and 'seconds_saved'
+          (upper bounds, None if max_tokens or the timing is unknown).
+        """
+        if self.stop_method is None:
+            return None
+        tokens = TokenEstimator.estimate_text(self.content)
+        tokens_saved = max(self.max_tokens - tokens, 0) if self.max_tokens is not None else None
+        seconds_saved = None
+        if tokens_saved is not None and tokens and self.total_time is not None:
+            seconds_saved = tokens_saved * self.total_time / tokens
+        return {'method': self.stop_method, 'tokens': tokens, 'tokens_saved': tokens_saved, 'seconds_saved': seconds_saved}
+
+    def to_response(self):
+        """
+        Returns:
+        - dict: The response of `ChatCompletionStream.to_response`, with this content and the
+          savings under 'early_stop'. Its finish_reason is 'cancelled' if the stream was aborted
+          after the block.
+        """
+        response = self.stream.to_response()
+        response['choices'][0]['message']['content'] = self.content
+        response['early_stop'] = self.get_savings()
+        return response
+
+    @staticmethod
+    def format_savings(savings):
+        """
+        Args:
+        - savings (dict or None): As returned by `get_savings`.
+
+        Returns:
+        - str: One line describing the savings.
+        """
+        if savings is None:
+            return "The completion ended on its own; nothing was saved by stopping early."
+        line = f"Stopped after the code block ({savings['method']}) at ~{savings['tokens']} tokens"
+        if savings['tokens_saved'] is not None:
+            line += f", saving up to {savings['tokens_saved']} tokens"
+        if savings['seconds_saved'] is not None:
+            line += f" and {savings['seconds_saved']:.1f}s"
+        return line + "."
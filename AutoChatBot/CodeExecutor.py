@@ -1,33 +1,87 @@
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from .PyFileExecutor import PyFileExecutor
 from .ChatAPIHandler import ChatAPIHandler
 from .GPTChatCompletionSaver import ChatCompletionSaver
 from .CodeErrorFormatter import CodeErrorFormatter
 from .ConversationPreparer import ConversationPreparer
 from .RemoveLanguageDelimiters import CodeExtractor
+from .IncrementalCodeExtractor import IncrementalCodeExtractor
+from .StreamingThinkFilter import StreamingThinkFilter
+from .CodeBlockStopper import CodeBlockStopper
 
 class CodeExecutor:
     @staticmethod
     def execute_code(run_code, response, code_save_path='sandbox_scripts/myscript.py'):
         """
-        Executes the provided code if run_code is True, otherwise does nothing.
+        Executes the first closed python block of the response if run_code is True, otherwise does nothing.
+        A response without such a block is neither saved nor run.
 
         Args:
             run_code (bool): Flag indicating whether to execute the code.
-            response (str): The code content to execute.
+            response (str): The response holding the code to execute.
             code_save_path (str): Path to save the code file.
 
         Returns:
-            str: Error output if there's any, otherwise None.
+            str: Error output if there's any (also if the response has no code block), otherwise None.
         """
         if run_code:
-            error_output = PyFileExecutor.save_code_to_file(code_save_path, response)
+            error_output = PyFileExecutor.save_code_to_file(code_save_path, response, require_block=True)
+            if error_output:
+                return error_output
             error_output = PyFileExecutor.execute_code(code_save_path)
             return error_output
         else:
             return None
 
     @staticmethod
-    def retry_api_request(api, model, temperature, max_tokens, top_p, frequency_penalty, presence_penalty, stop_sequences, top_k, repetition_penalty, save_path, code_save_path, run_code, response_content, max_attempts=3, context_name=None):
+    def stream_and_execute(stream, code_save_path='sandbox_scripts/myscript.py', language='python'):
+        """
+        Prints a streamed completion and starts its code as soon as the code block is complete, while
+        the rest of the completion (usually its explanation) is still arriving.
+
+        The code run is the one `execute_code` would run on the complete text outside think spans (see
+        `StreamingThinkFilter`): the first closed block of the language. If the completion has no such
+        block, nothing is saved or run.
+
+        Args:
+            stream (ChatCompletionStream): The streamed completion, as returned by `ChatAPIHandler.stream_api_request`.
+            code_save_path (str): Path to save the code file.
+            language (str): Language of the code block to run.
+
+        Returns:
+            tuple: (the completion text outside think spans, error output of the run or None). Without a
+            code block, the error output is `PyFileExecutor.get_no_block_error`.
+
+        Raises:
+            The exceptions of iterating the stream. Code that was already started is waited for first.
+        """
+        extractor = IncrementalCodeExtractor(language)
+        think_filter = StreamingThinkFilter()
+        message = []
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = None
+            for token in stream:
+                print(token, end='', flush=True)
+                text = think_filter.feed(token)
+                message.append(text)
+                if future is None and extractor.feed(text):
+                    # The text so far ends with the block, so saving it extracts the same code as the full text would
+                    PyFileExecutor.save_code_to_file(code_save_path, ''.join(message), language)
+                    future = pool.submit(PyFileExecutor.execute_code, code_save_path)
+            print()
+            message.append(think_filter.finish())
+            content = ''.join(message)
+            if future is not None:
+                return content, future.result()
+        # A closing fence at the very end of the stream completes the block only now
+        blocks = extractor.feed(message[-1]) + extractor.finish()
+        if any(block['closed'] for block in blocks):
+            return content, CodeExecutor.execute_code(True, content, code_save_path=code_save_path)
+        return content, PyFileExecutor.get_no_block_error(language)
+
+    @staticmethod
+    def retry_api_request(api, model, temperature, max_tokens, top_p, frequency_penalty, presence_penalty, stop_sequences, top_k, repetition_penalty, save_path, code_save_path, run_code, response_content, max_attempts=3, context_name=None, deadline=None, context_tokens=None, stream=False, early_stop=False):
         """
         Retries API requests and executes the code if needed.
 
@@ -48,23 +102,85 @@ class CodeExecutor:
             response_content (str): The initial code/content to execute.
             max_attempts (int): Maximum number of retry attempts.
             context_name (str, optional): The name of the context to be appended (default is None).
+            deadline (Deadline, optional): End of the run. Attempts that would start after it are skipped,
+                and API calls are bounded by the time left (default is None).
+            context_tokens (int, optional): Prompt token budget. Defaults to the model window minus max_tokens.
+            stream (bool, optional): Stream the retried completions and run their code as soon as the
+                code block is complete (see `stream_and_execute`). Default is False.
+            early_stop (bool, optional): Stream the retried completions and end them as soon as the python
+                block is complete (see `CodeBlockStopper`). Default is False.
 
         Returns:
             bool: True if execution completed successfully, False otherwise.
         """
         conversation = None  # Initialize conversation variable for API requests
+        token_budget = ConversationPreparer.get_token_budget(api, max_tokens, context_tokens)
 
         for attempt in range(max_attempts):
             if conversation is not None:
                 # Make an API request only after the initial attempt
-                response = ChatAPIHandler.make_api_request(api, model, temperature, max_tokens, top_p, conversation, frequency_penalty, presence_penalty, stop_sequences, top_k, repetition_penalty)
-                print("Chat Completion Response:", response)
-                ChatCompletionSaver.save_to_file(response, save_path)
-                response_content = response['choices'][0]['message']['content']
-            
-            error_output = CodeExecutor.execute_code(run_code, response_content, code_save_path=code_save_path)
-            extracted_code = CodeExtractor.extract_code(response_content)
-            executed_code = extracted_code if extracted_code else response_content
+                if deadline is not None and deadline.expired():
+                    print(f"Deadline reached, skipping the remaining {max_attempts - attempt} attempt(s).")
+                    return False
+                if (stream or early_stop) and run_code:
+                    request = dict(
+                        api=api,
+                        model=model,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        conversation=conversation,
+                        top_p=top_p,
+                        frequency_penalty=frequency_penalty,
+                        presence_penalty=presence_penalty,
+                        stop_sequences=stop_sequences,
+                        top_k=top_k,
+                        repetition_penalty=repetition_penalty,
+                        save_path=save_path,
+                        deadline=deadline
+                    )
+                    try:
+                        if early_stop:
+                            response_stream = CodeBlockStopper.stream_api_request(language='python', **request)
+                        else:
+                            response_stream = ChatAPIHandler.stream_api_request(**request)
+                        response_content, error_output = CodeExecutor.stream_and_execute(
+                            response_stream, code_save_path=code_save_path
+                        )
+                    except (requests.exceptions.RequestException, TimeoutError, ValueError) as e:
+                        print("Streaming request failed:", e)
+                        return False
+                    if early_stop:
+                        print(CodeBlockStopper.format_savings(response_stream.get_savings()))
+                else:
+                    try:
+                        response = ChatAPIHandler.make_api_request(
+                            api=api,
+                            model=model,
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            conversation=conversation,
+                            top_p=top_p,
+                            frequency_penalty=frequency_penalty,
+                            presence_penalty=presence_penalty,
+                            stop_sequences=stop_sequences,
+                            top_k=top_k,
+                            repetition_penalty=repetition_penalty,
+                            deadline=deadline
+                        )
+                    except TimeoutError as e:
+                        print("API request timed out:", e)
+                        return False
+                    print("Chat Completion Response:", response)
+                    if 'error' in response:
+                        print("API request failed:", response['error'].get('message'))
+                        return False
+                    ChatCompletionSaver.save_to_file(response, save_path)
+                    response_content = response['choices'][0]['message']['content']
+                    error_output = CodeExecutor.execute_code(run_code, response_content, code_save_path=code_save_path)
+            else:
+                error_output = CodeExecutor.execute_code(run_code, response_content, code_save_path=code_save_path)
+            # Without a code block, the model is shown its whole reply with the "no code block" error
+            executed_code = CodeExtractor.extract_code(response_content, 'python')
             if code_save_path.startswith('/') or code_save_path.startswith('\\'):
                 print("Warning: File path starts with a leading slash, which is unusual.")
 
@@ -75,7 +191,7 @@ class CodeExecutor:
                     error_output=error_output,
                 )
                 conversation = ConversationPreparer.str_to_dict_list(conversation)
-                conversation = ConversationPreparer.extend_context(context_name, conversation)
+                conversation = ConversationPreparer.extend_context(context_name, conversation, max_tokens=token_budget)
             else:
                 print("Execution completed successfully.")
                 return True
@@ -0,0 +1,294 @@
+import os
+import json
+import mmap
+import struct
+import argparse
+from .StringTable import StringTable
+
+class ContextIndex:
+    """
+    ContextIndex: This class compiles a context folder into one binary file from which a single context can be read without parsing the others.
+
+    The index is built from the same JSON files `ContextManager.load_context_data` reads (a later file
+    overrides a context of the same name, as there). Message contents are deduplicated by their hash
+    (see `StringTable`): each distinct content is stored once however many contexts share it, and the
+    contexts refer to it by index. It is laid out as:
+
+    ```
+    header   MAGIC, context count, source file count, table offset, newest source mtime,
+             string table offset, string count
+    strings  every distinct message content (UTF-8)
+    payloads for every context: its name (UTF-8), its JSON without the message contents, then one
+             uint32 string index per message (NO_STRING if the content was kept in the JSON)
+    table    one fixed-size entry per context, sorted by name:
+             name offset, name length, payload offset, payload length, references offset, reference count
+    string table  offset and length of every string
+    ```
+
+    `lookup` memory-maps the file, binary-searches the table and decodes only the matching payload,
+    so a cold lookup reads O(log n) table entries and one payload however many contexts there are,
+    plus the strings its messages refer to.
+    The header records how many source files there were and the newest modification time among
+    them, so `is_fresh` can tell whether the index still matches the folder without parsing it.
+
+    Static methods:
+    - build(context_folder, index_path=None): Compiles the folder's JSON files into an index.
+    - is_fresh(context_folder, index_path=None): Checks that the index exists and matches the JSON files.
+    - lookup(index_path, context_name): Returns one context, or None if it is not in the index.
+    - names(index_path): Returns the names of all indexed contexts, sorted.
+    - get_report(index_path): Returns how much the message contents were deduplicated.
+    - get_index_path(context_folder): Returns the default index path of a folder.
+    - get_source_signature(context_folder): Returns the JSON file count and newest mtime of a folder.
+
+    Example usage:
+        ContextIndex.build('context')
+        context = ContextIndex.lookup(ContextIndex.get_index_path('context'), 'updateCode')
+
+    Command line:
+        python -m AutoChatBot.ContextIndex --context_folder context
+    """
+    MAGIC = b'CTXIDX02'
+    INDEX_FILE_NAME = 'context.ctxidx'
+    HEADER = struct.Struct('<8sIIQQQI')
+    ENTRY = struct.Struct('<QIQIQI')
+    STRING = struct.Struct('<QI')
+    REFERENCE = struct.Struct('<I')
+    NO_STRING = 0xFFFFFFFF
+
+    @staticmethod
+    def get_index_path(context_folder):
+        """
+        Args:
+        - context_folder (str): Folder containing the context JSON files.
+
+        Returns:
+        - str: The path the index of that folder is built at by default.
+        """
+        return os.path.join(context_folder, ContextIndex.INDEX_FILE_NAME)
+
+    @staticmethod
+    def build(context_folder, index_path=None):
+        """
+        Compiles the JSON files of a context folder into an index. The file is replaced atomically.
+
+        Args:
+        - context_folder (str): Folder containing the context JSON files.
+        - index_path (str, optional): Output path. Defaults to `get_index_path(context_folder)`.
+
+        Returns:
+        - int: The number of indexed contexts.
+        """
+        from .ContextManager import ContextManager
+        index_path = index_path or ContextIndex.get_index_path(context_folder)
+        source_files, source_mtime = ContextIndex.get_source_signature(context_folder)
+        context_data = ContextManager.load_context_data(context_folder)
+
+        table = StringTable()
+        contexts = []
+        for name in sorted(context_data, key=lambda name: name.encode('utf-8')):
+            context, references = table.strip_context(context_data[name])
+            references = [ContextIndex.NO_STRING if reference is None else reference for reference in references]
+            contexts.append((name.encode('utf-8'), json.dumps(context, ensure_ascii=False).encode('utf-8'), references))
+
+        entries, strings = [], []
+        offset = ContextIndex.HEADER.size
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(b'\0' * ContextIndex.HEADER.size)
+                for text in table.strings:
+                    data = text.encode('utf-8')
+                    file.write(data)
+                    strings.append((offset, len(data)))
+                    offset += len(data)
+                for name_bytes, payload, references in contexts:
+                    file.write(name_bytes)
+                    file.write(payload)
+                    file.write(struct.pack(f'<{len(references)}I', *references))
+                    payload_offset = offset + len(name_bytes)
+                    entries.append((offset, len(name_bytes), payload_offset, len(payload),
+                                    payload_offset + len(payload), len(references)))
+                    offset = payload_offset + len(payload) + len(references) * ContextIndex.REFERENCE.size
+                for entry in entries:
+                    file.write(ContextIndex.ENTRY.pack(*entry))
+                string_table_offset = offset + len(entries) * ContextIndex.ENTRY.size
+                for string in strings:
+                    file.write(ContextIndex.STRING.pack(*string))
+                file.seek(0)
+                file.write(ContextIndex.HEADER.pack(ContextIndex.MAGIC, len(entries), source_files, offset, source_mtime,
+                                                    string_table_offset, len(strings)))
+            os.replace(temp_path, index_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return len(entries)
+
+    @staticmethod
+    def is_fresh(context_folder, index_path=None):
+        """
+        Checks that an index exists and was built from the folder's current JSON files.
+        Only the files' metadata is read.
+
+        Args:
+        - context_folder (str): Folder containing the context JSON files.
+        - index_path (str, optional): Defaults to `get_index_path(context_folder)`.
+
+        Returns:
+        - bool: True if the index can be used instead of parsing the folder.
+        """
+        index_path = index_path or ContextIndex.get_index_path(context_folder)
+        try:
+            with open(index_path, 'rb') as file:
+                header = file.read(ContextIndex.HEADER.size)
+        except OSError:
+            return False
+        if len(header) != ContextIndex.HEADER.size:
+            return False
+        magic, _, source_files, _, source_mtime, _, _ = ContextIndex.HEADER.unpack(header)
+        return magic == ContextIndex.MAGIC and (source_files, source_mtime) == ContextIndex.get_source_signature(context_folder)
+
+    @staticmethod
+    def lookup(index_path, context_name):
+        """
+        Reads one context from an index.
+
+        Args:
+        - index_path (str): Path of the index.
+        - context_name (str): Name of the context.
+
+        Returns:
+        - dict or None: The context, or None if the index has no context of that name.
+
+        Raises:
+        - ValueError: If the file is not a context index.
+        """
+        target = context_name.encode('utf-8')
+        with open(index_path, 'rb') as file, ContextIndex._map(file) as data:
+            count, table_offset, string_table_offset, _ = ContextIndex._read_header(data, index_path)
+            low, high = 0, count
+            while low < high:
+                middle = (low + high) // 2
+                name_offset, name_length, payload_offset, payload_length, references_offset, reference_count = \
+                    ContextIndex.ENTRY.unpack_from(data, table_offset + middle * ContextIndex.ENTRY.size)
+                name = data[name_offset:name_offset + name_length]
+                if name == target:
+                    context = json.loads(data[payload_offset:payload_offset + payload_length].decode('utf-8'))
+                    references = [
+                        None if reference == ContextIndex.NO_STRING else reference
+                        for reference in struct.unpack_from(f'<{reference_count}I', data, references_offset)
+                    ]
+                    return StringTable.restore_context(
+                        context, references, lambda index: ContextIndex._read_string(data, string_table_offset, index)
+                    )
+                if name < target:
+                    low = middle + 1
+                else:
+                    high = middle
+        return None
+
+    @staticmethod
+    def names(index_path):
+        """
+        Args:
+        - index_path (str): Path of the index.
+
+        Returns:
+        - list: The names of all indexed contexts, sorted.
+
+        Raises:
+        - ValueError: If the file is not a context index.
+        """
+        with open(index_path, 'rb') as file, ContextIndex._map(file) as data:
+            count, table_offset, _, _ = ContextIndex._read_header(data, index_path)
+            names = []
+            for position in range(count):
+                name_offset, name_length, _, _, _, _ = ContextIndex.ENTRY.unpack_from(
+                    data, table_offset + position * ContextIndex.ENTRY.size
+                )
+                names.append(data[name_offset:name_offset + name_length].decode('utf-8'))
+            return names
+
+    @staticmethod
+    def get_report(index_path):
+        """
+        Measures the deduplication of an index's message contents.
+
+        Args:
+        - index_path (str): Path of the index.
+
+        Returns:
+        - dict: See `StringTable.get_report`.
+
+        Raises:
+        - ValueError: If the file is not a context index.
+        """
+        with open(index_path, 'rb') as file, ContextIndex._map(file) as data:
+            count, table_offset, string_table_offset, string_count = ContextIndex._read_header(data, index_path)
+            lengths = [
+                ContextIndex.STRING.unpack_from(data, string_table_offset + index * ContextIndex.STRING.size)[1]
+                for index in range(string_count)
+            ]
+            messages, message_bytes = 0, 0
+            for position in range(count):
+                _, _, _, _, references_offset, reference_count = ContextIndex.ENTRY.unpack_from(
+                    data, table_offset + position * ContextIndex.ENTRY.size
+                )
+                for reference in struct.unpack_from(f'<{reference_count}I', data, references_offset):
+                    if reference != ContextIndex.NO_STRING:
+                        messages += 1
+                        message_bytes += lengths[reference]
+            return StringTable.make_report(messages, string_count, message_bytes, sum(lengths))
+
+    @staticmethod
+    def _map(file):
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError(f"'{file.name}' is not a context index.") from None
+
+    @staticmethod
+    def _read_header(data, index_path):
+        if len(data) < ContextIndex.HEADER.size:
+            raise ValueError(f"'{index_path}' is not a context index.")
+        magic, count, _, table_offset, _, string_table_offset, string_count = ContextIndex.HEADER.unpack_from(data, 0)
+        if (magic != ContextIndex.MAGIC
+                or table_offset + count * ContextIndex.ENTRY.size > len(data)
+                or string_table_offset + string_count * ContextIndex.STRING.size > len(data)):
+            raise ValueError(f"'{index_path}' is not a context index.")
+        return count, table_offset, string_table_offset, string_count
+
+    @staticmethod
+    def _read_string(data, string_table_offset, index):
+        offset, length = ContextIndex.STRING.unpack_from(data, string_table_offset + index * ContextIndex.STRING.size)
+        return data[offset:offset + length].decode('utf-8')
+
+    @staticmethod
+    def get_source_signature(context_folder):
+        """
+        Summarizes the JSON files of a context folder from their metadata only.
+
+        Args:
+        - context_folder (str): Folder containing the context JSON files.
+
+        Returns:
+        - tuple: (number of JSON files, newest modification time in nanoseconds).
+        """
+        count, newest = 0, 0
+        for root, _, files in os.walk(context_folder):
+            for file_name in files:
+                if file_name.endswith(".json"):
+                    count += 1
+                    newest = max(newest, os.stat(os.path.join(root, file_name)).st_mtime_ns)
+        return count, newest
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compile a context folder into a binary context index.')
+    parser.add_argument('--context_folder', type=str, default='context', help='Folder containing the context JSON files.')
+    parser.add_argument('--index_path', type=str, help='Output path of the index. Defaults to <context_folder>/context.ctxidx.')
+
+    args = parser.parse_args()
+
+    index_path = args.index_path or ContextIndex.get_index_path(args.context_folder)
+    count = ContextIndex.build(args.context_folder, index_path)
+    print(f"Indexed {count} contexts into '{index_path}'")
+    print(StringTable.format_report(ContextIndex.get_report(index_path)))
@@ -1,5 +1,10 @@
 import os
 import json
+import threading
+from .TokenEstimator import TokenEstimator
+from .ContextIndex import ContextIndex
+from .ContextStore import ContextStore
+from .StringTable import StringTable
 
 class ContextManager:
     """
@@ -12,7 +17,21 @@ class ContextManager:
     2. Use retrieve_context() method to get context for a specific context file or subdirectory.
     3. Use get_all_context_names() method to get a list of all existing context names with metadata.
     4. Use get_specific_context() to get the last n user/assistant exchanges along with the initial system message.
+
+    To use a single context, load_context() reads just that one from the folder's `ContextIndex` or
+    `ContextStore` when an up-to-date one has been built, and falls back to load_context_data() otherwise.
+    search_contexts() ranks the contexts of a folder by a free-text query using the `ContextStore`,
+    and select_context() picks the best one for a question.
+
+    Parsed files are cached for the whole process, keyed by path, modification time and size, so an
+    unchanged file is parsed once no matter how often load_context_data() runs. The loaded data is
+    shared between calls and must not be modified. Its strings are interned, so a system prompt or
+    example message repeated across contexts and files is held in memory once. Use invalidate_cache()
+    to force a re-read and get_cache_stats() to see the hits and misses.
     """
+    _lock = threading.Lock()
+    _cache = {}
+    _stats = {'hits': 0, 'misses': 0}
 
     @staticmethod
     def load_context_data(context_folder):
@@ -30,15 +49,130 @@ class ContextManager:
             for file_name in files:
                 if file_name.endswith(".json"):
                     file_path = os.path.join(root, file_name)
-                    try:
-                        with open(file_path, 'r') as file:
-                            data = json.load(file)
-                            if data:  # Check if data is not empty
-                                context_data.update(data)
-                    except json.JSONDecodeError:
+                    data = ContextManager._load_file(file_path)
+                    if data is None:
                         print(f"Warning: Failed to decode JSON from file '{file_path}'. Skipping.")
+                    elif data:  # Check if data is not empty
+                        context_data.update(data)
         return context_data
 
+    @staticmethod
+    def load_context(context_folder, context_name):
+        """
+        Load a single context. If the folder has an up-to-date `ContextIndex` or `ContextStore`, only
+        that context is read from it; otherwise every JSON file of the folder is loaded.
+
+        Args:
+        - context_folder (str): Folder path containing JSON files.
+        - context_name (str): Name of the context.
+
+        Returns:
+        - dict: Context data in the shape load_context_data() returns, holding only the requested
+          context, or empty if it does not exist.
+        """
+        if ContextIndex.is_fresh(context_folder):
+            try:
+                context = ContextIndex.lookup(ContextIndex.get_index_path(context_folder), context_name)
+            except ValueError:
+                context = None
+            else:
+                return {} if context is None else {context_name: context}
+        if ContextStore.is_fresh(context_folder):
+            return ContextStore.load_context(ContextStore.get_db_path(context_folder), context_name)
+        context_data = ContextManager.load_context_data(context_folder)
+        return {context_name: context_data[context_name]} if context_name in context_data else {}
+
+    @staticmethod
+    def search_contexts(context_folder, query, limit=10):
+        """
+        Rank the contexts of a folder by a free-text query over their names, descriptions, tags and
+        messages. The folder's `ContextStore` is built first if it is missing or out of date.
+
+        Args:
+        - context_folder (str): Folder path containing JSON files.
+        - query (str): Free text.
+        - limit (int): Maximum number of results.
+
+        Returns:
+        - list: Dicts with 'name', 'description', 'tags', 'id' and 'score', best match first.
+        """
+        db_path = ContextStore.get_db_path(context_folder)
+        if not ContextStore.is_fresh(context_folder, db_path):
+            ContextStore.build(context_folder, db_path)
+        return ContextStore.search(db_path, query, limit)
+
+    @staticmethod
+    def select_context(context_folder, text):
+        """
+        Pick the context that best matches a text, such as the user's question.
+
+        Args:
+        - context_folder (str): Folder path containing JSON files.
+        - text (str): The text to match.
+
+        Returns:
+        - str or None: The name of the best matching context, or None if no context matches.
+        """
+        results = ContextManager.search_contexts(context_folder, text, limit=1)
+        return results[0]['name'] if results else None
+
+    @staticmethod
+    def invalidate_cache(path=None):
+        """
+        Drop cached files so they are parsed again on the next load, and make the next
+        `ContextStore.is_fresh` check of the folder compare with its files again.
+
+        Args:
+        - path (str, optional): A file, or a folder whose files are dropped. Defaults to every cached file.
+        """
+        ContextStore.invalidate_freshness(path)
+        with ContextManager._lock:
+            if path is None:
+                ContextManager._cache.clear()
+                return
+            path = os.path.abspath(path)
+            for cached_path in list(ContextManager._cache):
+                if cached_path == path or cached_path.startswith(path + os.sep):
+                    del ContextManager._cache[cached_path]
+
+    @staticmethod
+    def get_cache_stats():
+        """
+        Get the counters of the context file cache.
+
+        Returns:
+        - dict: 'hits', 'misses' and 'files' (number of cached files).
+        """
+        with ContextManager._lock:
+            return dict(ContextManager._stats, files=len(ContextManager._cache))
+
+    @staticmethod
+    def _load_file(file_path):
+        """
+        Parse a JSON file and intern its strings, or reuse the cached result while its mtime and
+        size are unchanged. Returns None if the file is not valid JSON.
+        """
+        key = os.path.abspath(file_path)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return {}
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with ContextManager._lock:
+            cached = ContextManager._cache.get(key)
+            if cached is not None and cached[0] == signature:
+                ContextManager._stats['hits'] += 1
+                return cached[1]
+            ContextManager._stats['misses'] += 1
+        try:
+            with open(key, 'r') as file:
+                data = StringTable.intern_strings(json.load(file))
+        except json.JSONDecodeError:
+            data = None
+        with ContextManager._lock:
+            ContextManager._cache[key] = (signature, data)
+        return data
+
     @staticmethod
     def retrieve_context(context_data, context_name):
         """
@@ -74,14 +208,18 @@ class ContextManager:
         return context_list
 
     @staticmethod
-    def get_specific_context(context_data, context_name, n=100):
+    def get_specific_context(context_data, context_name, n=100, max_tokens=None):
         """
         Retrieve the last n user/assistant exchanges along with the initial system message.
 
+        With max_tokens, the exchanges are further cut to the newest ones that fit into that many
+        estimated tokens (see TokenEstimator) together with the system message, which is always kept.
+
         Args:
         - context_data (dict): Dictionary containing context data loaded from JSON files.
         - context_name (str): Name of the context.
         - n (int): Number of user/assistant exchanges to retrieve.
+        - max_tokens (int, optional): Token budget of the returned messages. Defaults to no budget.
 
         Returns:
         - list: List of dict containing the context messages.
@@ -91,8 +229,13 @@ class ContextManager:
             return f"Context '{context_name}' does not exist."
         
         system_message = next((msg for msg in context['context'] if msg['role'] == 'system'), None)
-        user_assistant_messages = [msg for msg in context['context'] if msg['role'] in ['user', 'assistant']]
-        return [system_message] + user_assistant_messages[-n:]
+        user_assistant_messages = [msg for msg in context['context'] if msg['role'] in ['user', 'assistant']][-n:]
+        if max_tokens is not None:
+            budget = max_tokens - TokenEstimator.TOKENS_PER_CONVERSATION
+            if system_message is not None:
+                budget -= TokenEstimator.estimate_message(system_message)
+            user_assistant_messages = TokenEstimator.select_newest(user_assistant_messages, budget)
+        return [system_message] + user_assistant_messages
 
 # Usage example:
 if __name__ == "__main__":
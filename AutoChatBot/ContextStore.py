@@ -0,0 +1,334 @@
+import os
+import re
+import json
+import sqlite3
+import pathlib
+import threading
+import argparse
+import contextlib
+from .ContextIndex import ContextIndex
+from .StringTable import StringTable
+
+class ContextStore:
+    """
+    ContextStore: This class keeps the context library in a SQLite database with a full-text index over names, descriptions, tags and messages.
+
+    `build` reads the same JSON files as `ContextManager.load_context_data` and writes
+    `<context_folder>/context.ctxdb` with:
+    - `contexts`: one row per context (name, description, tags as a JSON list, id, the context as JSON
+      without its message contents, and the `strings` id of each message's content as a JSON list).
+    - `strings`: every distinct message content once, deduplicated by hash (see `StringTable`).
+    - `contexts_fts`: a contentless FTS5 table over name, description, tags and the message contents
+      (only the index is stored, not a second copy of the text), used by `search` to rank contexts
+      with BM25. Words are stemmed, so 'docstring' also finds 'docstrings'.
+      Name, description and tags weigh more than message text.
+      If the SQLite library has no FTS5, `search` falls back to substring matching.
+    - `meta`: the format version and the file count and newest mtime of the source files, so `is_fresh`
+      can tell whether the store still matches the folder (see `ContextIndex.get_source_signature`).
+
+    The database is written to a temporary file and renamed into place, and readers open it
+    read-only, so any number of worker processes can read it while it is rebuilt: each reader keeps
+    the version it opened. A process keeps one read-only connection per database and reopens it when
+    the file is replaced, so a lookup or search costs one query rather than opening the database.
+
+    Checking freshness walks the folder, so a process checks each database once: while the database
+    file is not replaced, later calls reuse the result. Call `invalidate_freshness` after changing the
+    JSON files in a long-running process.
+
+    `load_context` returns data in the shape `ContextManager.load_context_data` does, so
+    `ContextManager.retrieve_context` and `ContextManager.get_specific_context` work unchanged.
+
+    Static methods:
+    - get_db_path(context_folder): Returns the default database path of a folder.
+    - build(context_folder, db_path=None): Writes the database from the folder's JSON files.
+    - is_fresh(context_folder, db_path=None, recheck=False): Checks that the database exists and matches the JSON files.
+    - invalidate_freshness(path=None): Makes the next `is_fresh` compare with the JSON files again.
+    - load_context(db_path, context_name): Returns the context data of a single context.
+    - search(db_path, query, limit=10): Returns the contexts that best match a query.
+    - get_report(db_path): Returns how much the message contents were deduplicated.
+
+    Example usage:
+        ContextStore.build('context')
+        for result in ContextStore.search(ContextStore.get_db_path('context'), 'docstring class'):
+            print(result['name'], result['description'])
+
+    Command line:
+        python -m AutoChatBot.ContextStore --context_folder context --search "unit test"
+    """
+    DB_FILE_NAME = 'context.ctxdb'
+    FORMAT_VERSION = 2
+    # BM25 column weights of contexts_fts: name, description, tags, content.
+    COLUMN_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+
+    _lock = threading.Lock()
+    _readers = {}
+    _fresh = {}
+
+    @staticmethod
+    def get_db_path(context_folder):
+        """
+        Args:
+        - context_folder (str): Folder containing the context JSON files.
+
+        Returns:
+        - str: The path the database of that folder is built at by default.
+        """
+        return os.path.join(context_folder, ContextStore.DB_FILE_NAME)
+
+    @staticmethod
+    def build(context_folder, db_path=None):
+        """
+        Writes the database from the JSON files of a context folder. The file is replaced atomically.
+
+        Args:
+        - context_folder (str): Folder containing the context JSON files.
+        - db_path (str, optional): Output path. Defaults to `get_db_path(context_folder)`.
+
+        Returns:
+        - int: The number of stored contexts.
+        """
+        from .ContextManager import ContextManager
+        db_path = db_path or ContextStore.get_db_path(context_folder)
+        source_files, source_mtime = ContextIndex.get_source_signature(context_folder)
+        context_data = ContextManager.load_context_data(context_folder)
+
+        temp_path = f"{db_path}.{os.getpid()}.tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        try:
+            with contextlib.closing(sqlite3.connect(temp_path)) as connection:
+                connection.execute(
+                    "CREATE TABLE contexts (name TEXT PRIMARY KEY, description TEXT, tags TEXT, id TEXT, data TEXT NOT NULL, refs TEXT NOT NULL)"
+                )
+                connection.execute("CREATE TABLE strings (id INTEGER PRIMARY KEY, content TEXT NOT NULL)")
+                connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+                fts = ContextStore._create_fts_table(connection)
+                table = StringTable()
+                for rowid, (name, context) in enumerate(context_data.items(), 1):
+                    context = context if isinstance(context, dict) else {}
+                    description = str(context.get('description') or '')
+                    tags = [str(tag) for tag in context.get('tags') or []]
+                    content = '\n'.join(
+                        str(message.get('content') or '') for message in context.get('context') or []
+                        if isinstance(message, dict)
+                    )
+                    stripped, references = table.strip_context(context)
+                    connection.execute(
+                        "INSERT INTO contexts (rowid, name, description, tags, id, data, refs) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (rowid, name, description, json.dumps(tags, ensure_ascii=False), context.get('id'),
+                         json.dumps(stripped, ensure_ascii=False), json.dumps(references))
+                    )
+                    if fts:
+                        connection.execute(
+                            "INSERT INTO contexts_fts (rowid, name, description, tags, content) VALUES (?, ?, ?, ?, ?)",
+                            (rowid, name, description, ' '.join(tags), content)
+                        )
+                connection.executemany("INSERT INTO strings (id, content) VALUES (?, ?)", enumerate(table.strings))
+                connection.executemany(
+                    "INSERT INTO meta (key, value) VALUES (?, ?)",
+                    [('version', ContextStore.FORMAT_VERSION), ('source_files', source_files), ('source_mtime', source_mtime),
+                     ('fts', int(fts))]
+                )
+                connection.commit()
+            os.replace(temp_path, db_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return len(context_data)
+
+    @staticmethod
+    def is_fresh(context_folder, db_path=None, recheck=False):
+        """
+        Checks that a database exists and was built from the folder's current JSON files. The first
+        check in a process compares with the files; later ones only check that the database file was
+        not replaced since.
+
+        Args:
+        - context_folder (str): Folder containing the context JSON files.
+        - db_path (str, optional): Defaults to `get_db_path(context_folder)`.
+        - recheck (bool, optional): Compare with the JSON files even if an earlier check found the database fresh.
+
+        Returns:
+        - bool: True if the database can be used instead of parsing the folder.
+        """
+        db_path = db_path or ContextStore.get_db_path(context_folder)
+        try:
+            stat = os.stat(db_path)
+        except OSError:
+            return False
+        key = (os.path.abspath(context_folder), os.path.abspath(db_path))
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if not recheck and ContextStore._fresh.get(key) == version:
+            return True
+        try:
+            meta = dict(ContextStore._query(db_path, "SELECT key, value FROM meta"))
+        except sqlite3.DatabaseError:
+            return False
+        signature = (meta.get('source_files'), meta.get('source_mtime'))
+        fresh = (meta.get('version') == ContextStore.FORMAT_VERSION
+                 and signature == ContextIndex.get_source_signature(context_folder))
+        with ContextStore._lock:
+            if fresh:
+                ContextStore._fresh[key] = version
+            else:
+                ContextStore._fresh.pop(key, None)
+        return fresh
+
+    @staticmethod
+    def invalidate_freshness(path=None):
+        """
+        Forgets the results of earlier `is_fresh` checks.
+
+        Args:
+        - path (str, optional): Only forget the checks of the context folder holding this file or folder,
+          or of the folders inside it. Defaults to every folder.
+        """
+        with ContextStore._lock:
+            if path is None:
+                ContextStore._fresh.clear()
+                return
+            path = os.path.abspath(path)
+            for key in list(ContextStore._fresh):
+                folder = key[0]
+                if path == folder or path.startswith(folder + os.sep) or folder.startswith(path + os.sep):
+                    del ContextStore._fresh[key]
+
+    @staticmethod
+    def load_context(db_path, context_name):
+        """
+        Reads a single context.
+
+        Args:
+        - db_path (str): Path of the database.
+        - context_name (str): Name of the context.
+
+        Returns:
+        - dict: Context data holding only the requested context, or empty if it does not exist.
+        """
+        rows = ContextStore._query(db_path, "SELECT data, refs FROM contexts WHERE name = ?", (context_name,))
+        if not rows:
+            return {}
+        data, references = json.loads(rows[0][0]), json.loads(rows[0][1])
+        ids = sorted({reference for reference in references if reference is not None})
+        strings = dict(ContextStore._query(
+            db_path, f"SELECT id, content FROM strings WHERE id IN ({', '.join('?' * len(ids))})", ids
+        )) if ids else {}
+        return {context_name: StringTable.restore_context(data, references, strings.__getitem__)}
+
+    @staticmethod
+    def search(db_path, query, limit=10):
+        """
+        Finds the contexts that best match a query. Every word of the query is searched for; contexts
+        matching more words, rarer words, or matching in the name, description or tags rank first.
+
+        Args:
+        - db_path (str): Path of the database.
+        - query (str): Free text.
+        - limit (int, optional): Maximum number of results. Defaults to 10.
+
+        Returns:
+        - list: Dicts with 'name', 'description', 'tags' (list), 'id' and 'score' (higher is better), best first.
+        """
+        words = list(dict.fromkeys(re.findall(r'\w+', query.lower())))
+        if not words:
+            return []
+        fts = ContextStore._query(db_path, "SELECT value FROM meta WHERE key = 'fts'")
+        if fts and fts[0][0]:
+            match = ' OR '.join(f'"{word}"' for word in words)
+            weights = ', '.join(str(weight) for weight in ContextStore.COLUMN_WEIGHTS)
+            rows = ContextStore._query(
+                db_path,
+                "SELECT c.name, c.description, c.tags, c.id, -bm25(contexts_fts, " + weights + ") AS score "
+                "FROM contexts_fts JOIN contexts AS c ON c.rowid = contexts_fts.rowid "
+                "WHERE contexts_fts MATCH ? ORDER BY score DESC, c.name LIMIT ?",
+                (match, limit)
+            )
+        else:
+            rows = ContextStore._search_without_fts(db_path, words, limit)
+        return [
+            {'name': name, 'description': description, 'tags': json.loads(tags), 'id': context_id, 'score': score}
+            for name, description, tags, context_id, score in rows
+        ]
+
+    @staticmethod
+    def get_report(db_path):
+        """
+        Measures the deduplication of a database's message contents.
+
+        Args:
+        - db_path (str): Path of the database.
+
+        Returns:
+        - dict: See `StringTable.get_report`.
+        """
+        lengths = dict(ContextStore._query(db_path, "SELECT id, length(CAST(content AS BLOB)) FROM strings"))
+        messages, message_bytes = 0, 0
+        for (references,) in ContextStore._query(db_path, "SELECT refs FROM contexts"):
+            for reference in json.loads(references):
+                if reference is not None:
+                    messages += 1
+                    message_bytes += lengths[reference]
+        return StringTable.make_report(messages, len(lengths), message_bytes, sum(lengths.values()))
+
+    @staticmethod
+    def _search_without_fts(db_path, words, limit):
+        strings = dict(ContextStore._query(db_path, "SELECT id, content FROM strings"))
+        rows = []
+        for name, description, tags, context_id, data, references in ContextStore._query(
+                db_path, "SELECT name, description, tags, id, data, refs FROM contexts"):
+            content = '\n'.join(strings[reference] for reference in json.loads(references) if reference is not None)
+            fields = (name.lower(), (description or '').lower(), (tags or '').lower(), (data + content).lower())
+            score = sum(weight * field.count(word)
+                        for word in words
+                        for weight, field in zip(ContextStore.COLUMN_WEIGHTS, fields))
+            if score:
+                rows.append((name, description, tags, context_id, float(score)))
+        rows.sort(key=lambda row: (-row[4], row[0]))
+        return rows[:limit]
+
+    @staticmethod
+    def _create_fts_table(connection):
+        try:
+            connection.execute("CREATE VIRTUAL TABLE contexts_fts USING fts5(name, description, tags, content, content='', tokenize='porter unicode61')")
+        except sqlite3.OperationalError:
+            return False
+        return True
+
+    @staticmethod
+    def _query(db_path, sql, parameters=()):
+        """
+        Runs a read query on the process's connection to a database, reopening it if the file was replaced.
+        """
+        path = os.path.abspath(db_path)
+        stat = os.stat(path)
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with ContextStore._lock:
+            reader = ContextStore._readers.get(path)
+            if reader is None or reader[0] != signature:
+                if reader is not None:
+                    reader[1].close()
+                reader = (signature, sqlite3.connect(ContextStore._uri(path), uri=True, timeout=30, check_same_thread=False))
+                ContextStore._readers[path] = reader
+            return reader[1].execute(sql, parameters).fetchall()
+
+    @staticmethod
+    def _uri(db_path):
+        # Read-only, so concurrent readers never take a write lock.
+        return pathlib.Path(os.path.abspath(db_path)).as_uri() + "?mode=ro"
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or search the SQLite context store.')
+    parser.add_argument('--context_folder', type=str, default='context', help='Folder containing the context JSON files.')
+    parser.add_argument('--db_path', type=str, help='Path of the database. Defaults to <context_folder>/context.ctxdb.')
+    parser.add_argument('--search', type=str, help='Search the store instead of only building it.')
+
+    args = parser.parse_args()
+
+    db_path = args.db_path or ContextStore.get_db_path(args.context_folder)
+    if not ContextStore.is_fresh(args.context_folder, db_path):
+        count = ContextStore.build(args.context_folder, db_path)
+        print(f"Stored {count} contexts in '{db_path}'")
+        print(StringTable.format_report(ContextStore.get_report(db_path)))
+    if args.search:
+        for result in ContextStore.search(db_path, args.search):
+            print(f"{result['score']:.2f}  {result['name']}: {result['description']}")
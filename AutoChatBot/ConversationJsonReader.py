@@ -1,20 +1,32 @@
 import json
+from collections import deque
+from .TokenEstimator import TokenEstimator
 
 class ConversationJsonReader:
     """
     ConversationJsonReader: This class reads JSON files containing conversations in a specific format and validates them.
     
+    A conversation file is parsed incrementally: it is read in chunks and each message is decoded and
+    validated as soon as it is complete, so an invalid message is reported without parsing the rest of
+    the file, and a file that does not start with a JSON array is rejected after reading its first
+    characters. With `last_n` or `max_tokens`, only the tail of the conversation is kept while reading,
+    so a multi-megabyte export never has to be held in memory as a whole.
+
     Main methods:
-    - read_file(file_path, is_single_file=False, subdirectory_name=None): Reads the JSON file and returns the conversation as a list of dictionaries.
+    - read_file(file_path, is_single_file=False, subdirectory_name=None, last_n=None, max_tokens=None): Reads the JSON file and returns the conversation as a list of dictionaries.
+    - iter_messages(file_path, chunk_size=65536): Yields the validated messages of a conversation file one at a time.
     
     Example usage:
         conversations_single = ConversationJsonReader.read_file(file_path="conversations.json", is_single_file=True, subdirectory_name="subdirectory_name")
         print(conversations_single)
+        recent = ConversationJsonReader.read_file(file_path="export.json", last_n=20)
         
     Input:
     - file_path (str): Path to the JSON file to be read.
     - is_single_file (bool, optional): Indicates if the JSON file contains all conversations or individual files for each subdirectory.
     - subdirectory_name (str, optional): Specifies the subdirectory when dealing with the single-file format.
+    - last_n (int, optional): Keep only the leading system messages and the last n other messages.
+    - max_tokens (int, optional): Keep only the leading system messages and the newest messages that fit into this many estimated tokens.
     
     Output:
     - conversations (list of dicts): List containing dictionaries representing the conversation. Each dictionary should have "role" and "content" keys.
@@ -30,15 +42,24 @@ class ConversationJsonReader:
     ]
     """
 
+    CHUNK_SIZE = 65536
+
     @staticmethod
-    def read_file(file_path, is_single_file=False, subdirectory_name=None):
+    def read_file(file_path, is_single_file=False, subdirectory_name=None, last_n=None, max_tokens=None):
         """
         Reads the JSON file and returns the conversation as a list of dictionaries.
+
+        With `last_n` or `max_tokens` only the tail of the conversation is returned: the system messages
+        it starts with, followed by the newest other messages, at most `last_n` of them and as many as fit
+        into `max_tokens` estimated tokens (see TokenEstimator) together with the system messages. The
+        last message is always kept, and the tail does not start with an assistant message.
         
         Args:
         - file_path (str): Path to the JSON file to be read.
         - is_single_file (bool, optional): Indicates if the JSON file contains all conversations or individual files for each subdirectory.
         - subdirectory_name (str, optional): Specifies the subdirectory when dealing with the single-file format.
+        - last_n (int, optional): Maximum number of messages kept after the leading system messages.
+        - max_tokens (int, optional): Token budget of the returned conversation.
         
         Returns:
         - conversations (list of dicts): List containing dictionaries representing the conversation. Each dictionary should have "role" and "content" keys.
@@ -47,31 +68,132 @@ class ConversationJsonReader:
         - FileNotFoundError: If the specified file path does not exist.
         - ValueError: If the JSON file does not adhere to the expected conversation format.
         """
+        if not is_single_file:
+            # Individual file format: parse and validate the messages as they are read
+            return ConversationJsonReader._keep_tail(ConversationJsonReader.iter_messages(file_path), last_n, max_tokens)
         try:
             # Step 1: Open the JSON file in read mode
             with open(file_path, 'r') as file:
                 # Step 2: Load the JSON content from the file
                 content = json.load(file)
-                
-                if is_single_file:
-                    # Validate single file format
-                    ConversationJsonReader._validate_single_file_format(content)
-                    # Extract the context for the specified subdirectory
-                    if subdirectory_name in content:
-                        context = content[subdirectory_name].get('context', [])
-                        # Validate the extracted context
-                        ConversationJsonReader._validate_conversation(context)
-                        return context
-                    else:
-                        raise ValueError(f"Subdirectory '{subdirectory_name}' not found in the JSON file.")
-                else:
-                    # Validate individual file format
-                    ConversationJsonReader._validate_conversation(content)
-                    return content
         except FileNotFoundError:
             # Step 6: Handle FileNotFoundError and raise an appropriate exception
             raise FileNotFoundError(f"File not found. Please check the path '{file_path}' and try again.")
-    
+        # Validate single file format
+        ConversationJsonReader._validate_single_file_format(content)
+        # Extract the context for the specified subdirectory
+        if subdirectory_name not in content:
+            raise ValueError(f"Subdirectory '{subdirectory_name}' not found in the JSON file.")
+        context = content[subdirectory_name].get('context', [])
+        # Validate the extracted context
+        ConversationJsonReader._validate_conversation(context)
+        if last_n is None and max_tokens is None:
+            return context
+        return ConversationJsonReader._keep_tail(context, last_n, max_tokens)
+
+    @staticmethod
+    def iter_messages(file_path, chunk_size=CHUNK_SIZE):
+        """
+        Yields the messages of a conversation file (a JSON array of messages) one at a time, reading
+        the file in chunks and validating each message as soon as it is decoded.
+
+        Args:
+        - file_path (str): Path to the JSON file to be read.
+        - chunk_size (int, optional): Number of characters read at a time.
+
+        Yields:
+        - dict: The next message.
+
+        Raises:
+        - FileNotFoundError: If the specified file path does not exist.
+        - ValueError: If the file is not a JSON array, a message is invalid, or the JSON is malformed.
+        """
+        try:
+            file = open(file_path, 'r')
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found. Please check the path '{file_path}' and try again.")
+        decoder = json.JSONDecoder()
+        with file:
+            buffer, position, at_end = '', 0, False
+
+            def skip_whitespace():
+                # Moves `position` to the next non-whitespace character, reading more input if needed.
+                # Returns that character, or '' at the end of the file.
+                nonlocal buffer, position, at_end
+                while True:
+                    while position < len(buffer) and buffer[position] in ' \t\n\r':
+                        position += 1
+                    if position < len(buffer) or at_end:
+                        return buffer[position] if position < len(buffer) else ''
+                    buffer, position = file.read(chunk_size), 0
+                    at_end = not buffer
+
+            character = skip_whitespace()
+            if character == '\ufeff':
+                position += 1
+                character = skip_whitespace()
+            if character != '[':
+                raise ValueError(f"Conversation JSON must contain a list of dictionaries. '{file_path}' does not start with a JSON array.")
+            position += 1
+            if skip_whitespace() == ']':
+                position += 1
+            else:
+                while True:
+                    character = skip_whitespace()
+                    if character == '':
+                        raise ValueError(f"Invalid JSON in '{file_path}': the conversation is not closed.")
+                    if character != '{':
+                        # Messages are objects, so anything else is rejected before it is parsed
+                        raise ValueError(f"Conversation JSON must contain dictionaries with 'role' and 'content' keys. Found '{character}' in '{file_path}'.")
+                    while True:
+                        try:
+                            message, position = decoder.raw_decode(buffer, position)
+                            break
+                        except json.JSONDecodeError as e:
+                            if at_end:
+                                raise ValueError(f"Invalid JSON in '{file_path}': {e}") from None
+                            # The message is not complete yet: read at least as much again as is buffered
+                            more = file.read(max(chunk_size, len(buffer) - position))
+                            buffer, position, at_end = buffer[position:] + more, 0, not more
+                    ConversationJsonReader._validate_message(message)
+                    yield message
+                    character = skip_whitespace()
+                    position += 1
+                    if character == ']':
+                        break
+                    if character != ',':
+                        raise ValueError(f"Invalid JSON in '{file_path}': expected ',' or ']' after a message.")
+            if skip_whitespace() != '':
+                raise ValueError(f"Invalid JSON in '{file_path}': extra data after the conversation.")
+
+    @staticmethod
+    def _keep_tail(messages, last_n, max_tokens):
+        """
+        Collects the leading system messages and the newest other messages of a message iterable,
+        holding no more than the tail in memory.
+        """
+        leading, tail, tail_tokens, trimmed = [], deque(), 0, False
+        budget = None
+        if max_tokens is not None:
+            budget = max_tokens - TokenEstimator.TOKENS_PER_CONVERSATION
+        for message in messages:
+            if not tail and message.get('role') == 'system' and not trimmed:
+                leading.append(message)
+                if budget is not None:
+                    budget -= TokenEstimator.estimate_message(message)
+                continue
+            cost = TokenEstimator.estimate_message(message)
+            tail.append((message, cost))
+            tail_tokens += cost
+            while len(tail) > 1 and ((last_n is not None and len(tail) > last_n)
+                                     or (budget is not None and tail_tokens > budget)):
+                tail_tokens -= tail.popleft()[1]
+                trimmed = True
+        if trimmed:
+            while len(tail) > 1 and tail[0][0].get('role') == 'assistant':
+                tail.popleft()
+        return leading + [message for message, _ in tail]
+
     @staticmethod
     def _validate_single_file_format(content):
         """
@@ -108,10 +230,23 @@ class ConversationJsonReader:
         
         # Step 3: Iterate through each item in the conversation
         for item in conversation:
-            # Step 4: Check if each item is a dictionary and contains "role" and "content" keys
-            if not isinstance(item, dict) or "role" not in item or "content" not in item:
-                # Step 5: Raise ValueError if the format is incorrect
-                raise ValueError(f"Conversation JSON must contain dictionaries with 'role' and 'content' keys. Conversation:\n {item}")
+            ConversationJsonReader._validate_message(item)
+
+    @staticmethod
+    def _validate_message(item):
+        """
+        Validates one message of a conversation.
+
+        Args:
+        - item (dict): The message.
+
+        Raises:
+        - ValueError: If the message is not a dictionary with "role" and "content" keys.
+        """
+        # Step 4: Check if each item is a dictionary and contains "role" and "content" keys
+        if not isinstance(item, dict) or "role" not in item or "content" not in item:
+            # Step 5: Raise ValueError if the format is incorrect
+            raise ValueError(f"Conversation JSON must contain dictionaries with 'role' and 'content' keys. Conversation:\n {item}")
 
 if __name__ == '__main__':
     # Example usage for single file format
@@ -2,6 +2,9 @@ from .StringFileReader import StringFileReader
 from .ConversationJsonReader import ConversationJsonReader
 from .ParserCreator import ParserCreator
 from .ContextManager import ContextManager
+from .ProviderRegistry import ProviderRegistry
+from .TokenEstimator import TokenEstimator
+from .SessionStore import SessionStore
 
 class ConversationPreparer:
     """
@@ -9,29 +12,50 @@ class ConversationPreparer:
 
     Methods
     -------
-    decide_conversation(file_path=None, question=None):
+    decide_conversation(file_path=None, question=None, last_n=None, max_tokens=None):
         Decides and retrieves the conversation data based on the provided file path or question.
+        A JSON conversation file can be cut to its tail while it is read.
         
     str_to_dict_list(conversation):
         Converts a string conversation into a list of dictionaries with role and content.
         
-    extend_context(context_name, conversation):
+    extend_context(context_name, conversation, max_tokens=None):
         Extends the given conversation with additional context data if available.
+        With `context_name='auto'`, the context that best matches the user messages is used.
+
+    load_session(session_id, conversation, max_tokens=None):
+        Returns the earlier messages of a session that fit next to the conversation.
+
+    get_token_budget(api, max_tokens, context_tokens=None):
+        Returns the prompt token budget of a request.
+
+    fit_to_token_budget(conversation, max_tokens):
+        Drops the oldest messages of a conversation until it fits into a token budget.
     """
+    AUTO_CONTEXT = 'auto'
 
     @staticmethod
-    def decide_conversation(file_path=None, question=None):
+    def decide_conversation(file_path=None, question=None, last_n=None, max_tokens=None):
         """
         Decides and retrieves the conversation data based on the provided file path or question.
 
         Parameters
         ----------
         file_path : str, optional
-            The path to the file containing the conversation data (default is None).
+            The path to the file containing the conversation data (default is None). A JSON
+            conversation is read incrementally; any other file is read as a question.
         
         question : str, optional
             The question to be used as conversation data (default is None).
 
+        last_n : int, optional
+            Keep only the leading system messages and the last n other messages of a JSON
+            conversation (default is None, all messages).
+
+        max_tokens : int, optional
+            Keep only the leading system messages and the newest messages of a JSON conversation
+            that fit into this many estimated tokens (default is None, no budget).
+
         Returns
         -------
         conversation : str or list
@@ -39,7 +63,7 @@ class ConversationPreparer:
         """
         if file_path:
             try:
-                conversation = ConversationJsonReader.read_file(file_path)
+                conversation = ConversationJsonReader.read_file(file_path, last_n=last_n, max_tokens=max_tokens)
             except ValueError as e:
                 conversation = StringFileReader.read_file(file_path)
         elif question:
@@ -69,26 +93,36 @@ class ConversationPreparer:
         return conversation
 
     @staticmethod
-    def extend_context(context_name, conversation):
+    def extend_context(context_name, conversation, max_tokens=None):
         """
         Extends the given conversation with additional context data if available.
 
         Parameters
         ----------
         context_name : str, optional
-            The name of the context to be appended (default is None).
+            The name of the context to be appended (default is None). 'auto' picks the context
+            whose name, description, tags and messages best match the user messages; if none
+            matches, the conversation is returned unchanged.
         
         conversation : list
             The conversation data as a list of dictionaries.
 
+        max_tokens : int, optional
+            Token budget of the extended conversation. The context keeps its system message and as
+            many of its newest exchanges as fit next to the conversation (default is None, no budget).
+
         Returns
         -------
         conversation : list
             The extended conversation data with additional context.
         """
+        if context_name == ConversationPreparer.AUTO_CONTEXT:
+            question = "\n".join(str(message.get('content', '')) for message in conversation if message.get('role') == 'user')
+            context_name = ContextManager.select_context(context_folder='context', text=question)
         if context_name is not None:
-            context_data = ContextManager.load_context_data(context_folder='context')
-            context = ContextManager.get_specific_context(context_data, context_name)
+            context_data = ContextManager.load_context(context_folder='context', context_name=context_name)
+            context_tokens = ConversationPreparer._get_remaining_budget(max_tokens, conversation)
+            context = ContextManager.get_specific_context(context_data, context_name, max_tokens=context_tokens)
             if isinstance(context, list):  # Ensure context retrieval is successful
                 context.extend(conversation)
                 conversation = context
@@ -96,3 +130,101 @@ class ConversationPreparer:
                 print(context)  # Print error message if context does not exist
                 exit()
         return conversation
+
+    @staticmethod
+    def load_session(session_id, conversation, max_tokens=None):
+        """
+        Returns the earlier messages of a session, to be sent before the conversation.
+
+        Parameters
+        ----------
+        session_id : str
+            The session name (see SessionStore).
+
+        conversation : list
+            The new messages, as a list of dictionaries.
+
+        max_tokens : int, optional
+            Token budget of the session messages and the conversation together. The session keeps
+            its system messages and as many of its newest turns as fit (default is None, no budget).
+
+        Returns
+        -------
+        history : list
+            The session messages, empty for a new session.
+        """
+        return SessionStore.load_conversation(
+            session_id, max_tokens=ConversationPreparer._get_remaining_budget(max_tokens, conversation)
+        )
+
+    @staticmethod
+    def _get_remaining_budget(max_tokens, conversation):
+        """
+        Returns the budget left for messages sent together with the conversation. The per-request
+        overhead is left in, as the budget of those messages is counted with it.
+        """
+        if max_tokens is None:
+            return None
+        used = TokenEstimator.estimate_conversation(conversation) - TokenEstimator.TOKENS_PER_CONVERSATION
+        return max(max_tokens - used, 0)
+
+    @staticmethod
+    def get_token_budget(api, max_tokens, context_tokens=None):
+        """
+        Returns how many prompt tokens a request may use.
+
+        Parameters
+        ----------
+        api : str
+            The API name.
+
+        max_tokens : int
+            The completion limit of the request, reserved out of the model's context window.
+
+        context_tokens : int, optional
+            An explicit budget, used as is (default is None).
+
+        Returns
+        -------
+        budget : int or None
+            `context_tokens` if given, else the API's context window minus `max_tokens`, or None if
+            the window of the API is unknown.
+        """
+        if context_tokens is not None:
+            return context_tokens
+        try:
+            max_context = ProviderRegistry.get_capabilities(api)['max_context']
+        except ValueError:
+            return None
+        if max_context is None:
+            return None
+        return max(max_context - (max_tokens or 0), 0)
+
+    @staticmethod
+    def fit_to_token_budget(conversation, max_tokens):
+        """
+        Drops the oldest messages of a conversation until its estimated tokens fit into a budget.
+        Leading system messages and the last message are always kept.
+
+        Parameters
+        ----------
+        conversation : list
+            The conversation data as a list of dictionaries.
+
+        max_tokens : int or None
+            Token budget of the conversation. None returns the conversation unchanged.
+
+        Returns
+        -------
+        conversation : list
+            The conversation, shortened if it did not fit.
+        """
+        if max_tokens is None or TokenEstimator.estimate_conversation(conversation) <= max_tokens:
+            return conversation
+        system_count = 0
+        while system_count < len(conversation) - 1 and conversation[system_count].get('role') == 'system':
+            system_count += 1
+        kept = conversation[:system_count] + conversation[-1:]
+        budget = max_tokens - TokenEstimator.estimate_conversation(kept)
+        middle = TokenEstimator.select_newest(conversation[system_count:-1], budget)
+        return conversation[:system_count] + middle + conversation[-1:]
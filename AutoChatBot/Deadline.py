@@ -0,0 +1,79 @@
+import time
+
+class Deadline:
+    """
+    Deadline: This class tracks the time left for a whole run, so every provider call can be bounded by it.
+
+    A deadline is created once (for example in `ChatBot.main` from `--deadline`) and passed down to
+    every call that may block. Calls shorten their socket timeouts to the time left, skip retries that
+    would end after the deadline, and raise `TimeoutError` instead of starting work once it has passed.
+    A deadline created without seconds never expires.
+
+    Attributes:
+    - seconds (float or None): The total time allowed, or None for no limit.
+
+    Example usage:
+        deadline = Deadline(300)
+        response = ChatAPIHandler.make_api_request(..., deadline=deadline)
+        if deadline.expired():
+            print("Out of time, skipping the remaining attempts.")
+    """
+
+    def __init__(self, seconds=None):
+        """
+        Args:
+        - seconds (float, optional): Seconds from now until the deadline. None means no deadline.
+
+        Raises:
+        - ValueError: If seconds is not positive.
+        """
+        if seconds is not None and seconds <= 0:
+            raise ValueError("A deadline must be a positive number of seconds.")
+        self.seconds = seconds
+        self._end_time = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self):
+        """
+        Returns:
+        - float or None: Seconds left (0 once expired), or None if there is no deadline.
+        """
+        if self._end_time is None:
+            return None
+        return max(self._end_time - time.monotonic(), 0.0)
+
+    def expired(self):
+        """
+        Returns:
+        - bool: True once the deadline has passed.
+        """
+        return self._end_time is not None and time.monotonic() >= self._end_time
+
+    def check(self, action="the request"):
+        """
+        Raises if the deadline has passed.
+
+        Args:
+        - action (str, optional): What was about to start, used in the error message.
+
+        Raises:
+        - TimeoutError: If the deadline has passed.
+        """
+        if self.expired():
+            raise TimeoutError(f"Deadline of {self.seconds}s exceeded before {action} could start.")
+
+    def cap(self, seconds):
+        """
+        Shortens a timeout to the time left.
+
+        Args:
+        - seconds (float or None): A timeout in seconds, or None for no timeout.
+
+        Returns:
+        - float or None: The smaller of `seconds` and the time left.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return seconds
+        if seconds is None:
+            return remaining
+        return min(seconds, remaining)
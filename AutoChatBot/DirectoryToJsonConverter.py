@@ -1,6 +1,8 @@
 import os
 import json
+import hashlib
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 class DirectoryToJsonConverter:
     """
@@ -32,107 +34,215 @@ class DirectoryToJsonConverter:
         - content2
     - next_subdirectory_name
     ...
+
+    Each subdirectory is listed with a single `os.scandir`. Passing `incremental=True` (or
+    `--incremental` on the command line) to the single-file conversion keeps a manifest of every
+    subdirectory's files and content hash, and only re-reads and re-serializes the subdirectories
+    that changed since the previous run.
+
+    Subdirectories are independent, so both conversions accept `max_workers` (`--workers`) to read
+    and assemble them on a thread pool. Subdirectories are always processed in name order, and the
+    output is byte-identical whatever the number of workers.
     """
 
+    MANIFEST_VERSION = 1
+
     @staticmethod
-    def convert_directories_to_json(input_directory, output_directory):
+    def convert_directories_to_json(input_directory, output_directory, max_workers=1):
+        """
+        Converts every subdirectory into its own JSON file.
+
+        Args:
+        - input_directory (str): Directory containing the subdirectories.
+        - output_directory (str): Directory receiving `<subdirectory>.json` files.
+        - max_workers (int, optional): Subdirectories converted concurrently. Defaults to 1 (serial).
+        """
         if not os.path.exists(output_directory):
             os.makedirs(output_directory)
 
-        for subdir in os.listdir(input_directory):
-            subdir_path = os.path.join(input_directory, subdir)
-            
-            roles_contents = []
-            for i in range(1, 1000): # Assuming up to 1000 subdirectories
-                role_file_1 = os.path.join(subdir_path, f'role_{i}.txt')
-                content_file_1 = os.path.join(subdir_path, f'content_{i}.txt')
-                role_file_2 = os.path.join(subdir_path, f'role{i}.txt')
-                content_file_2 = os.path.join(subdir_path, f'content{i}.txt')
-                
-                if not (os.path.exists(role_file_1) and os.path.exists(content_file_1)) and not (os.path.exists(role_file_2) and os.path.exists(content_file_2)):
-                    break
-                
-                role_file = role_file_1 if os.path.exists(role_file_1) else role_file_2
-                content_file = content_file_1 if os.path.exists(content_file_1) else content_file_2
-                
-                with open(role_file, 'r') as role_fp, open(content_file, 'r') as content_fp:
-                    role_content = {"role": role_fp.read().strip(), "content": content_fp.read().strip()}
-                    roles_contents.append(role_content)
+        def convert(subdirectory):
+            subdir, subdir_path = subdirectory
+            roles_contents = DirectoryToJsonConverter._read_subdirectory(subdir_path)['context']
             
             output_json_file = os.path.join(output_directory, f'{subdir}.json')
             with open(output_json_file, 'w') as json_fp:
                 json.dump(roles_contents, json_fp, indent=4)
-            
+            return subdir, output_json_file
+
+        subdirectories = DirectoryToJsonConverter._list_subdirectories(input_directory)
+        for subdir, output_json_file in DirectoryToJsonConverter._map(convert, subdirectories, max_workers):
             print(f"Converted '{subdir}' to JSON and saved to '{output_json_file}'")
 
     @staticmethod
-    def convert_directories_to_single_json(input_directory, output_json_path):
+    def convert_directories_to_single_json(input_directory, output_json_path, incremental=False, max_workers=1):
+        """
+        Converts every subdirectory into one entry of a single JSON file, in subdirectory name order.
+
+        With `incremental=True`, a manifest next to the output (`<output_json_path>.manifest`) keeps,
+        per subdirectory, the name/size/mtime listing of its files, a SHA-256 of their contents and
+        its serialized JSON. A subdirectory whose listing is unchanged is not read at all, and one
+        whose files were touched but whose contents hash the same is not serialized again. The
+        output is then assembled from the serialized entries, so the cost of a rebuild follows the
+        number of edited subdirectories rather than the size of the library. The output is the same
+        as without `incremental`.
+
+        With `max_workers` above 1, subdirectories are listed, read and serialized by a thread pool.
+        Results are collected in name order, so the output is byte-identical to a serial run.
+
+        Args:
+        - input_directory (str): Directory containing the subdirectories.
+        - output_json_path (str): Path of the JSON file to write.
+        - incremental (bool, optional): Only rebuild subdirectories that changed. Defaults to False.
+        - max_workers (int, optional): Subdirectories processed concurrently. Defaults to 1 (serial).
+
+        Returns:
+        - dict: 'folders' (number of subdirectories) and 'rebuilt' (number that were read and serialized).
+        """
         output_directory = os.path.dirname(output_json_path)
-        if not os.path.exists(output_directory):
+        if output_directory and not os.path.exists(output_directory):
             os.makedirs(output_directory)
 
-        directory_data = {}
-
-        for subdir in os.listdir(input_directory):
-            subdir_path = os.path.join(input_directory, subdir)
-            
-            subdir_obj = {'context': []}
-
-            description_file = os.path.join(subdir_path, 'description.txt')
-            if os.path.exists(description_file):
-                with open(description_file, 'r') as desc_fp:
-                    subdir_obj['description'] = desc_fp.read().strip()
-
-            tags_file = os.path.join(subdir_path, 'tags.txt')
-            if os.path.exists(tags_file):
-                with open(tags_file, 'r') as tags_fp:
-                    subdir_obj['tags'] = tags_fp.read().splitlines()
-
-            id_file = os.path.join(subdir_path, 'id.txt')
-            if os.path.exists(id_file):
-                with open(id_file, 'r') as id_fp:
-                    subdir_obj['id'] = id_fp.read().strip()
-            
-            for i in range(1, 1000): # Assuming up to 1000 subdirectories
-                role_file_1 = os.path.join(subdir_path, f'role_{i}.txt')
-                content_file_1 = os.path.join(subdir_path, f'content_{i}.txt')
-                role_file_2 = os.path.join(subdir_path, f'role{i}.txt')
-                content_file_2 = os.path.join(subdir_path, f'content{i}.txt')
-                
-                if not (os.path.exists(role_file_1) and os.path.exists(content_file_1)) and not (os.path.exists(role_file_2) and os.path.exists(content_file_2)):
-                    break
-                
-                role_file = role_file_1 if os.path.exists(role_file_1) else role_file_2
-                content_file = content_file_1 if os.path.exists(content_file_1) else content_file_2
-                
-                with open(role_file, 'r') as role_fp, open(content_file, 'r') as content_fp:
-                    role_content = {"role": role_fp.read().strip(), "content": content_fp.read().strip()}
-                    subdir_obj['context'].append(role_content)
-            
-            directory_data[subdir] = subdir_obj
-
-            print(f"Converted '{subdir}' to JSON and included in the single JSON file")
-
+        manifest_path = f'{output_json_path}.manifest'
+        previous = DirectoryToJsonConverter._load_manifest(manifest_path) if incremental else {}
+
+        def convert(subdirectory):
+            subdir, subdir_path = subdirectory
+            listing = DirectoryToJsonConverter._list_files(subdir_path)
+            entry = previous.get(subdir)
+            if entry is not None and entry['listing'] == listing:
+                return subdir, entry, False
+
+            subdir_obj = DirectoryToJsonConverter._read_subdirectory(subdir_path, listing)
+            content_hash = DirectoryToJsonConverter._hash_subdirectory(subdir_path, listing) if incremental else None
+            if entry is not None and entry['hash'] == content_hash:
+                return subdir, dict(entry, listing=listing), False
+
+            serialized = json.dumps(subdir_obj, indent=4).replace('\n', '\n    ')
+            return subdir, {'listing': listing, 'hash': content_hash, 'json': serialized}, True
+
+        folders = {}
+        rebuilt = 0
+        subdirectories = DirectoryToJsonConverter._list_subdirectories(input_directory)
+        for subdir, entry, changed in DirectoryToJsonConverter._map(convert, subdirectories, max_workers):
+            folders[subdir] = entry
+            if changed:
+                rebuilt += 1
+                print(f"Converted '{subdir}' to JSON and included in the single JSON file")
+
+        # Same text as json.dump(directory_data, json_fp, indent=4), built from the serialized entries.
+        body = ',\n'.join(f'    {json.dumps(subdir)}: {entry["json"]}' for subdir, entry in folders.items())
         with open(output_json_path, 'w') as json_fp:
-            json.dump(directory_data, json_fp, indent=4)
+            json_fp.write('{\n' + body + '\n}' if body else '{}')
+
+        if incremental:
+            DirectoryToJsonConverter._save_manifest(manifest_path, folders)
+            print(f"Rebuilt {rebuilt} of {len(folders)} subdirectories")
         
         print(f"All subdirectories have been converted to a single JSON file saved to '{output_json_path}'")
+        return {'folders': len(folders), 'rebuilt': rebuilt}
 
     @staticmethod
-    def convert_directories_to_json_based_on_mode(input_directory, output_path, json_mode):
+    def convert_directories_to_json_based_on_mode(input_directory, output_path, json_mode, incremental=False, max_workers=1):
         if json_mode == 'multiple':
-            DirectoryToJsonConverter.convert_directories_to_json(input_directory, output_path)
+            DirectoryToJsonConverter.convert_directories_to_json(input_directory, output_path, max_workers)
         elif json_mode == 'single':
-            DirectoryToJsonConverter.convert_directories_to_single_json(input_directory, output_path)
+            DirectoryToJsonConverter.convert_directories_to_single_json(input_directory, output_path, incremental, max_workers)
         else:
             print("Invalid json_mode. Please use 'single' or 'multiple'.")
 
+    @staticmethod
+    def _list_subdirectories(input_directory):
+        with os.scandir(input_directory) as entries:
+            return sorted((entry.name, entry.path) for entry in entries if entry.is_dir())
+
+    @staticmethod
+    def _map(function, items, max_workers):
+        """
+        Applies a function to every item, on a thread pool if max_workers > 1, and returns the results in item order.
+        """
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        if max_workers == 1 or len(items) < 2:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(function, items))
+
+    @staticmethod
+    def _list_files(subdir_path):
+        """
+        Lists a subdirectory with one scandir: sorted [name, size, mtime_ns] of its files.
+        """
+        with os.scandir(subdir_path) as entries:
+            files = [entry for entry in entries if entry.is_file()]
+        return sorted([entry.name, entry.stat().st_size, entry.stat().st_mtime_ns] for entry in files)
+
+    @staticmethod
+    def _read_subdirectory(subdir_path, listing=None):
+        """
+        Builds the JSON object of one subdirectory: optional description, tags and id, and the
+        role/content pairs numbered from 1 until the first missing pair.
+        """
+        listing = listing if listing is not None else DirectoryToJsonConverter._list_files(subdir_path)
+        names = {name for name, _, _ in listing}
+
+        def read(file_name):
+            with open(os.path.join(subdir_path, file_name), 'r') as fp:
+                return fp.read()
+
+        subdir_obj = {'context': []}
+        if 'description.txt' in names:
+            subdir_obj['description'] = read('description.txt').strip()
+        if 'tags.txt' in names:
+            subdir_obj['tags'] = read('tags.txt').splitlines()
+        if 'id.txt' in names:
+            subdir_obj['id'] = read('id.txt').strip()
+
+        for i in range(1, 1000): # Assuming up to 1000 messages
+            role_file_1, content_file_1 = f'role_{i}.txt', f'content_{i}.txt'
+            role_file_2, content_file_2 = f'role{i}.txt', f'content{i}.txt'
+            if not (role_file_1 in names and content_file_1 in names) and not (role_file_2 in names and content_file_2 in names):
+                break
+            role_file = role_file_1 if role_file_1 in names else role_file_2
+            content_file = content_file_1 if content_file_1 in names else content_file_2
+            subdir_obj['context'].append({"role": read(role_file).strip(), "content": read(content_file).strip()})
+        return subdir_obj
+
+    @staticmethod
+    def _hash_subdirectory(subdir_path, listing):
+        digest = hashlib.sha256()
+        for name, _, _ in listing:
+            digest.update(name.encode('utf-8') + b'\0')
+            with open(os.path.join(subdir_path, name), 'rb') as fp:
+                digest.update(fp.read())
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    @staticmethod
+    def _load_manifest(manifest_path):
+        try:
+            with open(manifest_path, 'r') as fp:
+                manifest = json.load(fp)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(manifest, dict) or manifest.get('version') != DirectoryToJsonConverter.MANIFEST_VERSION:
+            return {}
+        return manifest.get('folders', {})
+
+    @staticmethod
+    def _save_manifest(manifest_path, folders):
+        temp_path = f'{manifest_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as fp:
+            json.dump({'version': DirectoryToJsonConverter.MANIFEST_VERSION, 'folders': folders}, fp)
+        os.replace(temp_path, manifest_path)
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Convert directory to JSON.')
     parser.add_argument('--input_directory', type=str, help='Input directory containing subdirectories.')
     parser.add_argument('--output_path', type=str, help='Output path for the JSON file(s).')
     parser.add_argument('--json_mode', type=str, choices=['single', 'multiple'], help='Mode for JSON conversion: single or multiple.')
+    parser.add_argument('--incremental', action='store_true', help='Single mode only: rebuild only the subdirectories that changed since the last run.')
+    parser.add_argument('--workers', type=int, default=1, help='Number of subdirectories converted concurrently.')
 
     args = parser.parse_args()
 
-    DirectoryToJsonConverter.convert_directories_to_json_based_on_mode(args.input_directory, args.output_path, args.json_mode)
+    DirectoryToJsonConverter.convert_directories_to_json_based_on_mode(args.input_directory, args.output_path, args.json_mode, args.incremental, args.workers)
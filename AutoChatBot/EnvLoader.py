@@ -0,0 +1,57 @@
+import os
+import threading
+
+class EnvLoader:
+    """
+    EnvLoader: This class reads configuration from the environment, loading the `.env` file at most once per process.
+
+    `python-dotenv` is imported and `load_dotenv()` runs on the first `getenv` call only, so commands
+    that never read an API key do not pay for it, and repeated `load_api_key` calls do not re-read
+    and re-parse the `.env` file. Variables already set in the environment take precedence over the file.
+
+    Static methods:
+    - load(): Loads the `.env` file into the environment if that has not happened yet.
+    - getenv(name, default=None): Returns an environment variable after loading the `.env` file.
+    - reset(): Forgets that the `.env` file was loaded, so the next `getenv` loads it again.
+
+    Example usage:
+        api_key = EnvLoader.getenv("OPENAI_API_KEY")
+    """
+    _lock = threading.Lock()
+    _loaded = False
+
+    @staticmethod
+    def load():
+        """
+        Loads the `.env` file into the environment, the first time it is called in this process.
+        """
+        if EnvLoader._loaded:
+            return
+        with EnvLoader._lock:
+            if not EnvLoader._loaded:
+                from dotenv import load_dotenv
+                load_dotenv()
+                EnvLoader._loaded = True
+
+    @staticmethod
+    def getenv(name, default=None):
+        """
+        Returns an environment variable, loading the `.env` file first if needed.
+
+        Args:
+        - name (str): The variable name.
+        - default (str, optional): Returned if the variable is not set.
+
+        Returns:
+        - str or None: The variable's value, or the default.
+        """
+        EnvLoader.load()
+        return os.getenv(name, default)
+
+    @staticmethod
+    def reset():
+        """
+        Forgets that the `.env` file was loaded. Values already loaded stay in the environment.
+        """
+        with EnvLoader._lock:
+            EnvLoader._loaded = False
@@ -1,7 +1,7 @@
-import os
-from dotenv import load_dotenv
-import requests
+from .EnvLoader import EnvLoader
 import argparse
+from .HTTPSessionPool import HTTPSessionPool
+from .SSEStreamParser import SSEStreamParser
 
 class GPT3ChatCompletion:
     """
@@ -9,7 +9,8 @@ class GPT3ChatCompletion:
     
     Static methods:
     - load_api_key(): Loads the API key from the environment or .env file.
-    - make_api_request(api_key, conversation, model, temperature, max_tokens, stop_sequences, frequency_penalty, presence_penalty, top_p): Sends a request to the OpenAI API with the specified parameters and returns the response.
+    - make_api_request(api_key, conversation, model, temperature, max_tokens, stop_sequences, frequency_penalty, presence_penalty, top_p, timeout): Sends a request to the OpenAI API with the specified parameters and returns the response. `timeout` is a (connect, read) pair and defaults to `HTTPSessionPool.get_timeout()`.
+    - stream_api_request(...): Same parameters as make_api_request, but streams the completion and yields text tokens as they arrive.
     - update_attributes(current_values, **kwargs): Updates a dictionary of current values with provided keyword arguments.
     
     Example usage:
@@ -40,14 +41,15 @@ class GPT3ChatCompletion:
             'usage': {'prompt_tokens': 19, 'completion_tokens': 9, 'total_tokens': 28},
             'system_fingerprint': 'fp_4f2ebda25a'
         }
+
+    Command line (run as a module, so the package's relative imports resolve):
+        python -m AutoChatBot.GPTChatCompletion --question "Who won the world series in 2020?"
     """
+    API_URL = 'https://api.openai.com/v1/chat/completions'
 
     @staticmethod
     def load_api_key():
-        current_directory = os.getcwd()
-        load_dotenv()
-        api_key = os.getenv("OPENAI_API_KEY")
-        return api_key 
+        return EnvLoader.getenv("OPENAI_API_KEY")
 
     @staticmethod
     def update_attributes(current_values, **kwargs):
@@ -118,7 +120,7 @@ class GPT3ChatCompletion:
             raise ValueError("Invalid response format")
 
     @staticmethod
-    def make_api_request(
+    def build_request(
             api_key,
             conversation,
             model="gpt-3.5-turbo",
@@ -127,9 +129,18 @@ class GPT3ChatCompletion:
             stop_sequences=None,
             frequency_penalty=0,
             presence_penalty=0,
-            top_p=1
+            top_p=1,
+            stream=False
             ):
+        """
+        Builds the JSON body and headers of a chat completion request.
 
+        Returns:
+        tuple: (data, headers) ready to be posted to the chat completions endpoint.
+
+        Raises:
+        ValueError: If the API key or the conversation is missing.
+        """
         if api_key is None:
             raise ValueError("API key is required")
         
@@ -151,13 +162,101 @@ class GPT3ChatCompletion:
             "top_p": top_p,
             "messages": conversation
         }
+        if stream:
+            data["stream"] = True
         headers = {
             'Authorization': f'Bearer {api_key}',
             'Content-Type': 'application/json'
         }
-        response = requests.post('https://api.openai.com/v1/chat/completions', headers=headers, json=data)
+        return data, headers
+
+    @staticmethod
+    def make_api_request(
+            api_key,
+            conversation,
+            model="gpt-3.5-turbo",
+            temperature=1,
+            max_tokens=100,
+            stop_sequences=None,
+            frequency_penalty=0,
+            presence_penalty=0,
+            top_p=1,
+            timeout=None
+            ):
+        data, headers = GPT3ChatCompletion.build_request(
+            api_key, conversation, model, temperature, max_tokens,
+            stop_sequences, frequency_penalty, presence_penalty, top_p
+        )
+        session = HTTPSessionPool.get_session('openai')
+        timeout = timeout or HTTPSessionPool.get_timeout()
+        response = session.post(GPT3ChatCompletion.API_URL, headers=headers, json=data, timeout=timeout)
+        if response.status_code >= 400:
+            return GPT3ChatCompletion.error_from_response(response)
         return response.json()
 
+    @staticmethod
+    def error_from_response(response):
+        """
+        Short Description:
+        Converts an HTTP error answer of the OpenAI API into an error dict.
+
+        Parameters:
+        response (requests.Response): A response with a 4xx or 5xx status code.
+
+        Returns:
+        dict: {"error": {"message", "type", "status_code", "retry_after"}}, where retry_after is the raw
+        Retry-After header value or None.
+        """
+        try:
+            error = response.json().get('error') or {}
+        except ValueError:
+            error = {}
+        if not isinstance(error, dict):
+            error = {'message': str(error)}
+        return {"error": {
+            "message": error.get('message') or f"{response.status_code} {response.reason}",
+            "type": error.get('type') or "request_error",
+            "status_code": response.status_code,
+            "retry_after": response.headers.get('Retry-After'),
+        }}
+
+    @staticmethod
+    def stream_api_request(
+            api_key,
+            conversation,
+            model="gpt-3.5-turbo",
+            temperature=1,
+            max_tokens=100,
+            stop_sequences=None,
+            frequency_penalty=0,
+            presence_penalty=0,
+            top_p=1,
+            timeout=None
+            ):
+        """
+        Sends a streaming chat completion request and yields the text tokens as they arrive.
+        The read timeout applies to the wait for each chunk, not to the whole stream.
+
+        Yields:
+        str: The next piece of the completion text.
+
+        Returns:
+        str or None: The finish_reason of the stream (see `SSEStreamParser.iter_tokens`).
+
+        Raises:
+        requests.exceptions.HTTPError: If the API answers with an error status.
+        ValueError: If a stream event is malformed or reports an error.
+        """
+        data, headers = GPT3ChatCompletion.build_request(
+            api_key, conversation, model, temperature, max_tokens,
+            stop_sequences, frequency_penalty, presence_penalty, top_p, stream=True
+        )
+        session = HTTPSessionPool.get_session('openai')
+        timeout = timeout or HTTPSessionPool.get_timeout()
+        with session.post(GPT3ChatCompletion.API_URL, headers=headers, json=data, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            return (yield from SSEStreamParser.iter_tokens(response.iter_lines()))
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Command Line Interface for GPT-3 Chat Completion")
     parser.add_argument("--model", type=str, default="gpt-3.5-turbo", help="Model name for the OpenAI completion request.")
@@ -7,6 +7,7 @@ class ChatCompletionSaver:
 
     Main method:
     - save_to_file(response): Saves the message content from the provided response to the specified file.
+    - stream_to_file(tokens, save_path): Appends streamed tokens to the specified file as they arrive.
 
     Example of response data:
     {
@@ -38,6 +39,35 @@ class ChatCompletionSaver:
             file.write(message_content)
         print(f"Message content saved to '{save_path}'.")
 
+    @staticmethod
+    def stream_to_file(tokens, save_path):
+        """
+        Writes streamed tokens to the specified file as they arrive and passes them on unchanged.
+
+        The file is truncated when the first token is requested, and every token is flushed
+        immediately so the partial answer can be followed on disk (e.g. with `tail -f`).
+
+        Args:
+        - tokens (iterable of str): The streamed completion tokens.
+        - save_path (str): The path to the file where the message content will be saved.
+
+        Yields:
+        - str: Each token, after it has been written to the file.
+
+        Returns:
+        - The return value of `tokens` if it is a generator, such as a stream's finish_reason.
+        """
+        with open(save_path, 'w') as file:
+            tokens = iter(tokens)
+            while True:
+                try:
+                    token = next(tokens)
+                except StopIteration as end:
+                    return end.value
+                file.write(token)
+                file.flush()
+                yield token
+
 if __name__ == '__main__':
     response_data = {
         'id': 'chatcmpl-98SUfXPKMoIF4iIge0cjrXUapUzC6',
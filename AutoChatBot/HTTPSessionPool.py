@@ -0,0 +1,202 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+class HTTPSessionPool:
+    """
+    HTTPSessionPool: This class keeps one keep-alive `requests.Session` per provider for the whole process.
+
+    Every provider client sends its requests through the session returned by `get_session`, so the
+    TCP+TLS handshake is paid once per pooled connection instead of once per completion. Sessions are
+    created lazily, guarded by a lock, and can be shared between threads.
+
+    Statistics are totals for the process: the counters of a connection pool are added to them when
+    urllib3 evicts the pool or its session is closed, so `configure` and `close_all` do not lose them.
+
+    Every request must pass `timeout=HTTPSessionPool.get_timeout(deadline)`: a (connect, read) pair,
+    so a stalled socket fails with `requests.exceptions.Timeout` instead of hanging forever.
+
+    Static methods:
+    - configure(provider, pool_size): Sets the connection pool size used for a provider.
+    - configure_timeout(connect_timeout, read_timeout): Sets the socket timeouts of every request.
+    - get_timeout(deadline=None): Returns the (connect, read) timeout, shortened to a deadline.
+    - get_session(provider): Returns the shared session for a provider, creating it on first use.
+    - get_stats(provider=None): Returns connection-reuse statistics per provider.
+    - close_all(): Closes every pooled session.
+
+    Example usage:
+        HTTPSessionPool.configure('openai', pool_size=20)
+        session = HTTPSessionPool.get_session('openai')
+        response = session.post('https://api.openai.com/v1/chat/completions', json=data, headers=headers)
+        print(HTTPSessionPool.get_stats('openai'))
+        # {'openai': {'pool_size': 20, 'requests': 1, 'connections': 1, 'reused': 0}}
+    """
+    DEFAULT_POOL_SIZE = 10
+    DEFAULT_TIMEOUT = (10.0, 120.0)
+
+    _lock = threading.Lock()
+    _sessions = {}
+    _pool_sizes = {}
+    _closed_totals = {}
+    _timeout = DEFAULT_TIMEOUT
+
+    @staticmethod
+    def configure(provider, pool_size):
+        """
+        Sets the connection pool size for a provider. An existing session for the provider is closed so
+        the next call to `get_session` builds one with the new size.
+
+        Args:
+        - provider (str): Provider name, e.g. 'openai' or 'togetherai'.
+        - pool_size (int): Maximum number of keep-alive connections kept per host.
+
+        Raises:
+        - ValueError: If pool_size is smaller than 1.
+        """
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1.")
+        with HTTPSessionPool._lock:
+            HTTPSessionPool._pool_sizes[provider] = pool_size
+            session = HTTPSessionPool._sessions.pop(provider, None)
+        if session is not None:
+            session.close()
+
+    @staticmethod
+    def configure_timeout(connect_timeout=None, read_timeout=None):
+        """
+        Sets the socket timeouts of every request. Arguments left as None keep their current value.
+
+        Args:
+        - connect_timeout (float, optional): Seconds to wait for a connection to be established.
+        - read_timeout (float, optional): Seconds to wait for the next byte of the answer (or the next
+          chunk of a stream).
+
+        Raises:
+        - ValueError: If a timeout is not positive.
+        """
+        for name, value in (('connect_timeout', connect_timeout), ('read_timeout', read_timeout)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive.")
+        current_connect, current_read = HTTPSessionPool._timeout
+        HTTPSessionPool._timeout = (
+            current_connect if connect_timeout is None else connect_timeout,
+            current_read if read_timeout is None else read_timeout,
+        )
+
+    @staticmethod
+    def get_timeout(deadline=None):
+        """
+        Returns the timeout to pass to a request.
+
+        Args:
+        - deadline (Deadline, optional): Shortens both timeouts to the time left before it.
+
+        Returns:
+        - tuple: (connect_timeout, read_timeout) in seconds.
+        """
+        connect_timeout, read_timeout = HTTPSessionPool._timeout
+        if deadline is None:
+            return connect_timeout, read_timeout
+        # requests rejects a zero timeout, so an expired deadline still gets a token wait.
+        return max(deadline.cap(connect_timeout), 0.001), max(deadline.cap(read_timeout), 0.001)
+
+    @staticmethod
+    def get_session(provider):
+        """
+        Returns the shared session for a provider, creating it on first use.
+
+        Args:
+        - provider (str): Provider name, e.g. 'openai' or 'togetherai'.
+
+        Returns:
+        - requests.Session: Session whose adapter keeps up to the configured number of connections alive.
+        """
+        session = HTTPSessionPool._sessions.get(provider)
+        if session is not None:
+            return session
+        with HTTPSessionPool._lock:
+            session = HTTPSessionPool._sessions.get(provider)
+            if session is None:
+                pool_size = HTTPSessionPool._pool_sizes.get(provider, HTTPSessionPool.DEFAULT_POOL_SIZE)
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                HTTPSessionPool._count_disposed_pools(provider, adapter)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                HTTPSessionPool._sessions[provider] = session
+            return session
+
+    @staticmethod
+    def _count_disposed_pools(provider, adapter):
+        """
+        Makes the adapter add the counters of each connection pool it disposes of (evicted or closed)
+        to the provider's closed totals.
+        """
+        pools = adapter.poolmanager.pools
+        dispose = pools.dispose_func
+
+        def count_and_dispose(pool):
+            with HTTPSessionPool._lock:
+                totals = HTTPSessionPool._closed_totals.setdefault(provider, [0, 0])
+                totals[0] += pool.num_requests
+                totals[1] += pool.num_connections
+            if dispose is not None:
+                dispose(pool)
+
+        pools.dispose_func = count_and_dispose
+
+    @staticmethod
+    def get_stats(provider=None):
+        """
+        Returns connection-reuse statistics gathered from the underlying urllib3 connection pools.
+
+        Args:
+        - provider (str, optional): Only report this provider. Reports every provider that had a session if None.
+
+        Returns:
+        - dict: Maps provider names to a dict with 'pool_size', 'requests', 'connections' (new TCP
+          connections opened) and 'reused' (requests served on an already open connection), counted
+          over the whole process.
+        """
+        with HTTPSessionPool._lock:
+            sessions = dict(HTTPSessionPool._sessions)
+            pool_sizes = dict(HTTPSessionPool._pool_sizes)
+            closed_totals = {name: list(totals) for name, totals in HTTPSessionPool._closed_totals.items()}
+
+        providers = [provider] if provider is not None else list(dict.fromkeys([*closed_totals, *sessions]))
+        stats = {}
+        for name in providers:
+            requests_sent, connections = closed_totals.get(name, (0, 0))
+            session = sessions.get(name)
+            if session is not None:
+                adapter = session.get_adapter('https://')
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        requests_sent += pool.num_requests
+                        connections += pool.num_connections
+            stats[name] = {
+                'pool_size': pool_sizes.get(name, HTTPSessionPool.DEFAULT_POOL_SIZE),
+                'requests': requests_sent,
+                'connections': connections,
+                'reused': max(requests_sent - connections, 0),
+            }
+        return stats
+
+    @staticmethod
+    def close_all():
+        """
+        Closes every pooled session. New sessions are created on the next `get_session` call.
+        """
+        with HTTPSessionPool._lock:
+            sessions = list(HTTPSessionPool._sessions.values())
+            HTTPSessionPool._sessions.clear()
+        for session in sessions:
+            session.close()
+
+# Usage example:
+if __name__ == "__main__":
+    session = HTTPSessionPool.get_session('openai')
+    print(session)
+    print(HTTPSessionPool.get_stats())
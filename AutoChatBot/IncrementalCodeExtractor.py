@@ -0,0 +1,200 @@
+from .RemoveLanguageDelimiters import CodeExtractor
+
+class IncrementalCodeExtractor:
+    """
+    IncrementalCodeExtractor: This class finds fenced code blocks in text that arrives in chunks, such as a streamed completion, and emits each block as soon as its closing fence arrives.
+
+    Chunks may have any size and may split fences, lines and characters of the info string anywhere.
+    Fences follow the same rules as `CodeExtractor.extract_blocks`, and the emitted blocks are the
+    dicts it returns, with offsets counted from the start of the stream: feeding a text in chunks
+    emits exactly the blocks `CodeExtractor.extract_blocks` finds in the whole text.
+
+    Only the open block and the current line are held in memory. Outside a block, the text of a line
+    before its first fence is dropped (an opening fence may follow text, as in "Here: ```python"), and
+    a line is dropped entirely as soon as it cannot hold an opening fence, so prose between blocks
+    costs nothing however long it is.
+
+    Methods:
+    - feed(chunk): Adds text and returns the blocks its arrival completed.
+    - finish(): Ends the stream and returns the block left open, if any.
+    - get_buffered_size(): Returns the number of characters held in memory.
+
+    Static methods:
+    - iter_blocks(chunks, language=None): Yields the blocks of an iterable of chunks as they complete.
+
+    Example usage:
+        extractor = IncrementalCodeExtractor(language='python')
+        for token in stream:
+            print(token, end='', flush=True)
+            for block in extractor.feed(token):
+                PyFileExecutor.save_code_to_file('sandbox_scripts/myscript.py', block['code'])
+        extractor.finish()
+    """
+
+    def __init__(self, language=None):
+        """
+        Args:
+        - language (str, optional): Only emit blocks tagged with this language (case-insensitive).
+          An empty string selects untagged blocks. Defaults to every block.
+        """
+        self.language = language
+        self._consumed = 0
+        self._line_parts = []
+        self._line_start = 0
+        self._skip_line = False
+        self._line_dropped = 0
+        self._opening = None
+        self._code_lines = []
+
+    def feed(self, chunk):
+        """
+        Adds the next piece of text.
+
+        Args:
+        - chunk (str): The text.
+
+        Returns:
+        - list: The blocks completed by this chunk, in the shape of `CodeExtractor.extract_blocks`.
+        """
+        blocks = []
+        base = self._consumed
+        position = 0
+        while position < len(chunk):
+            newline = chunk.find('\n', position)
+            if newline < 0:
+                if not self._skip_line:
+                    self._line_parts.append(chunk[position:])
+                    if self._opening is None:
+                        self._trim_line()
+                break
+            if not self._skip_line:
+                self._line_parts.append(chunk[position:newline])
+                block = self._end_line(base + newline)
+                if block is not None:
+                    blocks.append(block)
+            self._line_parts = []
+            self._skip_line = False
+            self._line_dropped = 0
+            self._line_start = base + newline + 1
+            position = newline + 1
+        self._consumed += len(chunk)
+        return blocks
+
+    def finish(self):
+        """
+        Ends the stream. A last line without a newline is handled as a complete line.
+
+        Returns:
+        - list: The blocks completed by the last line, then the block left open (with 'closed' False), if any.
+        """
+        blocks = []
+        ended_with_newline = not self._line_parts and not self._skip_line
+        if self._line_parts and not self._skip_line:
+            block = self._end_line(self._consumed)
+            if block is not None:
+                blocks.append(block)
+        self._line_parts = []
+        self._skip_line = False
+        self._line_dropped = 0
+        if self._opening is not None:
+            text = '\n'.join([self._opening[1]] + self._code_lines) + ('\n' if ended_with_newline else '')
+            block = self._make_block(text, self._opening[0], self._consumed)
+            self._opening, self._code_lines = None, []
+            if block is not None:
+                blocks.append(block)
+        return blocks
+
+    def get_buffered_size(self):
+        """
+        Returns:
+        - int: The number of characters of the open block and the current line held in memory.
+        """
+        return (sum(len(part) for part in self._line_parts)
+                + sum(len(line) + 1 for line in self._code_lines)
+                + (len(self._opening[1]) if self._opening else 0))
+
+    @staticmethod
+    def iter_blocks(chunks, language=None):
+        """
+        Yields the blocks of a stream as they complete.
+
+        Args:
+        - chunks (iterable of str): The text, in pieces.
+        - language (str, optional): Only yield blocks tagged with this language.
+
+        Yields:
+        - dict: The next block, in the shape of `CodeExtractor.extract_blocks`.
+        """
+        extractor = IncrementalCodeExtractor(language)
+        for chunk in chunks:
+            yield from extractor.feed(chunk)
+        yield from extractor.finish()
+
+    def _trim_line(self):
+        """
+        Shortens the current line outside a block to the part that can still matter: all of it while
+        it may be a fence line, else its first fence on (or its last two characters while it has none),
+        and nothing once that fence cannot open a block.
+        """
+        line = ''.join(self._line_parts)
+        if not self._line_dropped and self._may_be_fence(line):
+            self._line_parts = [line]
+            return
+        hits = [hit for hit in (line.find(marker) for marker in CodeExtractor.FENCE_MARKERS) if hit >= 0]
+        if not hits:
+            keep = len(line) if len(line) <= 2 else 2
+            self._line_dropped += len(line) - keep
+            self._line_parts = [line[len(line) - keep:]]
+            return
+        hit = min(hits)
+        match = CodeExtractor.FENCE_PATTERN.match(line, hit)
+        if not CodeExtractor.can_open(match.group(2), match.group(3).strip(), True):
+            self._line_parts = []
+            self._line_dropped = 0
+            self._skip_line = True
+            return
+        self._line_dropped += hit
+        self._line_parts = [line[hit:]]
+
+    def _end_line(self, line_end):
+        """
+        Handles the current line, complete and ending at the stream offset line_end. Returns the block
+        it closes, if any.
+        """
+        # One character stands in for the dropped text, which only mattered for not being indentation
+        line = ('x' if self._line_dropped else '') + ''.join(self._line_parts)
+        match, inline = CodeExtractor.match_fence_line(line)
+        if self._opening is None:
+            if match is not None and CodeExtractor.can_open(match.group(2), match.group(3).strip(), inline):
+                shift = self._line_dropped - 1 if self._line_dropped else 0
+                self._opening = (self._line_start + shift + match.start(), line, match.group(2))
+                self._code_lines = []
+            return None
+        fence = self._opening[2]
+        if (match is not None and not inline and match.group(2)[0] == fence[0] and len(match.group(2)) >= len(fence)
+                and not match.group(3).strip()):
+            text = '\n'.join([self._opening[1]] + self._code_lines + [line])
+            block = self._make_block(text, self._opening[0], line_end)
+            self._opening, self._code_lines = None, []
+            return block
+        self._code_lines.append(line)
+        return None
+
+    def _make_block(self, text, start, end):
+        """
+        Parses the text of one block with `CodeExtractor.extract_blocks` and moves its offsets into the
+        stream. Returns None if the block's language is not wanted.
+        """
+        block = CodeExtractor.extract_blocks(text)[0]
+        if self.language is not None and block['language'].lower() != self.language.lower():
+            return None
+        block['start'], block['end'] = start, end
+        return block
+
+    @staticmethod
+    def _may_be_fence(partial_line):
+        """
+        Tells whether a line that starts with partial_line can still turn out to be a fence line.
+        """
+        stripped = partial_line.lstrip(' \t')
+        return '```'.startswith(stripped[:3]) or '~~~'.startswith(stripped[:3])
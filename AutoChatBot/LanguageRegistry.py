@@ -0,0 +1,150 @@
+import os
+import threading
+from .RemoveLanguageDelimiters import CodeExtractor
+
+class LanguageRegistry:
+    """
+    LanguageRegistry: This class maps file names and extensions to the language of the fenced code block a file's content is taken from, so supporting a file type is one `register` call.
+
+    A file type is registered with:
+    - pattern: A file name ('CMakeLists.txt') or an extension with its dot ('.py', '.d.ts'). A file name
+      wins over an extension, and a longer extension over a shorter one. Extensions match case-insensitively.
+    - language: The fence tag of the type, as in ```python.
+    - aliases: Other tags models use for it, e.g. 'py'.
+    - post_process: Called with the extracted content and the file path, returns the content to write.
+
+    `extract_content` takes a file's content from a response: the first closed block tagged with the
+    language or an alias; without one, it returns None so the caller does not write prose to a code
+    file. For a file of no registered type, it is the first closed block of any language, or else the
+    whole response, as a plain text file may be written without a fence.
+
+    Static methods:
+    - register(pattern, language, aliases=(), post_process=None): Adds or replaces a file type.
+    - get(file_path): Returns the registration that applies to a file, or None.
+    - get_language(file_path): Returns the fence language of a file, or None.
+    - extract_content(file_path, response): Returns the content of a file from a response, or None.
+    - post_process(file_path, content): Applies the post-processor of a file's type.
+
+    Example usage:
+        LanguageRegistry.register('.proto', 'protobuf', aliases=('proto',))
+        content = LanguageRegistry.extract_content('api/service.proto', response_content)
+    """
+    _lock = threading.Lock()
+    _names = {}
+    _extensions = {}
+
+    @staticmethod
+    def register(pattern, language, aliases=(), post_process=None):
+        """
+        Adds a file type, or replaces the one registered under the same pattern.
+
+        Args:
+        - pattern (str): A file name, or an extension starting with a dot.
+        - language (str): The fence language tag.
+        - aliases (iterable of str, optional): Other tags accepted for the language.
+        - post_process (callable, optional): Called as post_process(content, file_path) after extraction.
+        """
+        registration = {
+            'pattern': pattern,
+            'language': language,
+            'tags': tuple(dict.fromkeys(tag.lower() for tag in (language, *aliases))),
+            'post_process': post_process,
+        }
+        with LanguageRegistry._lock:
+            if pattern.startswith('.'):
+                LanguageRegistry._extensions[pattern.lower()] = registration
+            else:
+                LanguageRegistry._names[pattern] = registration
+
+    @staticmethod
+    def get(file_path):
+        """
+        Args:
+        - file_path (str): Path of the file.
+
+        Returns:
+        - dict or None: 'pattern', 'language', 'tags' (the language and its aliases, lowercase) and
+          'post_process' of the file's type, or None if no type applies.
+        """
+        name = os.path.basename(file_path)
+        registration = LanguageRegistry._names.get(name)
+        if registration is not None:
+            return registration
+        lowered = name.lower()
+        position = lowered.find('.')
+        while position >= 0:
+            registration = LanguageRegistry._extensions.get(lowered[position:])
+            if registration is not None:
+                return registration
+            position = lowered.find('.', position + 1)
+        return None
+
+    @staticmethod
+    def get_language(file_path):
+        """
+        Args:
+        - file_path (str): Path of the file.
+
+        Returns:
+        - str or None: The fence language of the file's type.
+        """
+        registration = LanguageRegistry.get(file_path)
+        return registration['language'] if registration is not None else None
+
+    @staticmethod
+    def extract_content(file_path, response):
+        """
+        Takes a file's content from a response and post-processes it.
+
+        Args:
+        - file_path (str): Path of the file.
+        - response (str): The response text.
+
+        Returns:
+        - str or None: The code of the file's block, stripped. If the response has no such block, None
+          for a registered type and the response for others.
+        """
+        registration = LanguageRegistry.get(file_path)
+        content = response if registration is None else None
+        for block in CodeExtractor.extract_blocks(response):
+            if block['closed'] and (registration is None or block['language'].lower() in registration['tags']):
+                content = block['code'].strip()
+                break
+        if content is None:
+            return None
+        return LanguageRegistry.post_process(file_path, content)
+
+    @staticmethod
+    def post_process(file_path, content):
+        """
+        Args:
+        - file_path (str): Path of the file.
+        - content (str): Its extracted content.
+
+        Returns:
+        - str: The content after the post-processor of the file's type, if it has one.
+        """
+        registration = LanguageRegistry.get(file_path)
+        if registration is not None and registration['post_process'] is not None:
+            return registration['post_process'](content, file_path)
+        return content
+
+LanguageRegistry.register('.py', 'python', aliases=('py', 'python3'))
+LanguageRegistry.register('.cpp', 'cpp', aliases=('c++', 'cc'))
+LanguageRegistry.register('.h', 'cpp', aliases=('c++', 'c', 'h'))
+LanguageRegistry.register('.hpp', 'cpp', aliases=('c++',))
+LanguageRegistry.register('.c', 'c')
+LanguageRegistry.register('.rs', 'rust', aliases=('rs',))
+LanguageRegistry.register('.toml', 'toml')
+LanguageRegistry.register('.js', 'javascript', aliases=('js',))
+LanguageRegistry.register('.ts', 'typescript', aliases=('ts',))
+LanguageRegistry.register('.html', 'html')
+LanguageRegistry.register('.css', 'css')
+LanguageRegistry.register('.json', 'json')
+LanguageRegistry.register('.yaml', 'yaml', aliases=('yml',))
+LanguageRegistry.register('.yml', 'yaml', aliases=('yml',))
+LanguageRegistry.register('.sh', 'bash', aliases=('sh', 'shell'))
+LanguageRegistry.register('.design', 'markdown', aliases=('md',))
+LanguageRegistry.register('.md', 'markdown', aliases=('md',))
+LanguageRegistry.register('CMakeLists.txt', 'cmake')
+LanguageRegistry.register('Dockerfile', 'dockerfile', aliases=('docker',))
@@ -0,0 +1,96 @@
+from .EnvLoader import EnvLoader
+from .HTTPSessionPool import HTTPSessionPool
+from .SSEStreamParser import SSEStreamParser
+from .GPTChatCompletion import GPT3ChatCompletion
+
+class LocalChatCompletion:
+    """
+    LocalChatCompletion: This class handles chat completion requests to a local OpenAI-compatible inference server.
+
+    Servers such as vLLM, llama.cpp (`llama-server`), Ollama or LM Studio expose the OpenAI
+    `/v1/chat/completions` endpoint, so requests are built with `GPT3ChatCompletion.build_request`
+    and only the URL differs. Without network round trips to a remote provider, this is the
+    lowest-latency backend.
+
+    Configuration (environment or .env file):
+    - LOCAL_API_URL: Chat completions endpoint. Defaults to http://localhost:8000/v1/chat/completions.
+    - LOCAL_API_KEY: Bearer token, if the server requires one.
+
+    Static methods:
+    - load_api_key(): Loads the API key from the environment or .env file.
+    - get_api_url(): Returns the configured chat completions endpoint.
+    - make_api_request(api_key, conversation, ...): Sends a request and returns the response JSON or an error dict.
+    - stream_api_request(api_key, conversation, ...): Sends a streaming request and yields text tokens as they arrive.
+
+    Example usage:
+        AutoChatBot --api local --model Qwen2.5-Coder-7B-Instruct --question "Write a binary search in Python"
+    """
+    DEFAULT_API_URL = 'http://localhost:8000/v1/chat/completions'
+
+    @staticmethod
+    def load_api_key():
+        return EnvLoader.getenv("LOCAL_API_KEY", "no-key")
+
+    @staticmethod
+    def get_api_url():
+        return EnvLoader.getenv("LOCAL_API_URL", LocalChatCompletion.DEFAULT_API_URL)
+
+    @staticmethod
+    def make_api_request(
+            api_key,
+            conversation,
+            model="local-model",
+            temperature=1,
+            max_tokens=100,
+            stop_sequences=None,
+            frequency_penalty=0,
+            presence_penalty=0,
+            top_p=1,
+            timeout=None
+            ):
+        data, headers = GPT3ChatCompletion.build_request(
+            api_key, conversation, model, temperature, max_tokens,
+            stop_sequences, frequency_penalty, presence_penalty, top_p
+        )
+        session = HTTPSessionPool.get_session('local')
+        timeout = timeout or HTTPSessionPool.get_timeout()
+        response = session.post(LocalChatCompletion.get_api_url(), headers=headers, json=data, timeout=timeout)
+        if response.status_code >= 400:
+            return GPT3ChatCompletion.error_from_response(response)
+        return response.json()
+
+    @staticmethod
+    def stream_api_request(
+            api_key,
+            conversation,
+            model="local-model",
+            temperature=1,
+            max_tokens=100,
+            stop_sequences=None,
+            frequency_penalty=0,
+            presence_penalty=0,
+            top_p=1,
+            timeout=None
+            ):
+        """
+        Sends a streaming chat completion request and yields the text tokens as they arrive.
+
+        Yields:
+        str: The next piece of the completion text.
+
+        Returns:
+        str or None: The finish_reason of the stream (see `SSEStreamParser.iter_tokens`).
+
+        Raises:
+        requests.exceptions.HTTPError: If the server answers with an error status.
+        ValueError: If a stream event is malformed or reports an error.
+        """
+        data, headers = GPT3ChatCompletion.build_request(
+            api_key, conversation, model, temperature, max_tokens,
+            stop_sequences, frequency_penalty, presence_penalty, top_p, stream=True
+        )
+        session = HTTPSessionPool.get_session('local')
+        timeout = timeout or HTTPSessionPool.get_timeout()
+        with session.post(LocalChatCompletion.get_api_url(), headers=headers, json=data, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            return (yield from SSEStreamParser.iter_tokens(response.iter_lines()))
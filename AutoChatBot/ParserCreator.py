@@ -1,10 +1,11 @@
 import argparse
+from .ProviderRegistry import ProviderRegistry
 
 class ParserCreator:
     @staticmethod
     def create_parser():
         parser = argparse.ArgumentParser(description="Command Line Interface for Chat Bot")
-        parser.add_argument("--api", type=str, choices=["openai", "togetherai"], required=True, help="Select the API to use: 'openai' or 'togetherai'")
+        parser.add_argument("--api", type=str, choices=ProviderRegistry.names(), required=True, help="Select the API backend to use: " + ", ".join(ProviderRegistry.names()))
         parser.add_argument("--model", type=str, default="gpt-3.5-turbo", help="Model name for the completion request like gpt-3.5-turbo or cognitivecomputations/dolphin-2.5-mixtral-8x7b")
         parser.add_argument("--max_tokens", type=int, default=100, help="Maximum number of tokens to generate in the completion.")
         parser.add_argument("--temperature", type=float, default=1, help="Controls randomness: lower values make completions more deterministic.")
@@ -16,18 +17,39 @@ class ParserCreator:
         parser.add_argument("--stop_sequences", nargs='*', help="Sequences where the API should stop generating further tokens.")
         parser.add_argument("--question", type=str, help="The question or prompt to ask the model.")
         parser.add_argument("--file_path", type=str, help="Path to the file containing conversation or question.")
-        parser.add_argument("--context", type=str, help="Context to use for the conversation.")
+        parser.add_argument("--context", type=str, help="Context to use for the conversation, or 'auto' to pick the context that best matches the question.")
+        parser.add_argument("--context_tokens", type=int, help="Token budget of the prompt. Contexts and agent conversations keep their newest turns that fit. Defaults to the model window minus --max_tokens, where known.")
+        parser.add_argument("--last_messages", type=int, help="Read only the leading system messages and the last N messages of a --file_path conversation.")
         parser.add_argument("--show_available_context", action='store_true', help="Show available contexts.")
+        parser.add_argument("--search_context", type=str, help="Search the contexts by name, description, tags and messages, best match first.")
         parser.add_argument("--show_models", action='store_true', help="Show available models for TogetherAI.")
         parser.add_argument("--save_path", type=str, default='response.tmp', help="Path to save the chat completion response.")
+        parser.add_argument("--stream", action='store_true', help="Stream the completion, printing and saving tokens as they arrive.")
+        parser.add_argument("--early_stop", action='store_true', help="Stream code requests of --run_code retries and --multi_file_agent, ending each once its code block is complete.")
         parser.add_argument("--run_code", action='store_true', help="Run the generated code if any.")
         parser.add_argument("--run_code_with_unittest", action='store_true', help="Generate a unittest, then a code, then run the code against the unittest.")
         parser.add_argument("--code_save_path", type=str, default='sandbox_scripts/myscript.py', help="Path to save the generated code.")
         parser.add_argument("--multi_file_agent", action='store_true', help="Execute the multi-file agent.")
+        parser.add_argument("--multi_block", action='store_true', help="With --multi_file_agent, request all rewrite files in one response, one code block per file tagged with its path. Files the response misses are requested one by one.")
         parser.add_argument("--reference_files", nargs='*', default=[], help="List of reference file paths. Can be empty.")
         parser.add_argument("--rewrite_files", nargs='*', help="List of rewrite file paths.")
         parser.add_argument("--question_file_path", type=str, help="Path to the file containing the question.")
         parser.add_argument("--execute_files", nargs='*', help="List of file paths to be executed.")
+        parser.add_argument("--batch_input", type=str, help="Path to a JSONL file of questions to answer concurrently in one batch.")
+        parser.add_argument("--batch_output", type=str, default='responses.jsonl', help="Path to the JSONL file that receives the batch responses.")
+        parser.add_argument("--batch_workers", type=int, default=8, help="Number of batch requests sent concurrently.")
+        parser.add_argument("--cache_dir", type=str, help="Directory of an on-disk response cache; identical requests are answered from it.")
+        parser.add_argument("--cache_max_mb", type=int, default=512, help="Size cap of the response cache in megabytes.")
+        parser.add_argument("--session", type=str, help="Name of a conversation session. Earlier turns of the session are sent before the question, and the new turn is appended to it.")
+        parser.add_argument("--session_dir", type=str, default=".autochatbot_sessions", help="Directory of the session logs.")
+        parser.add_argument("--max_retries", type=int, default=4, help="Retries of a request after a rate limit, server error or connection failure.")
+        parser.add_argument("--retry_max_time", type=float, default=120, help="Seconds after the first attempt beyond which a failed request is not retried.")
+        parser.add_argument("--connect_timeout", type=float, default=10, help="Seconds to wait for a connection to the API.")
+        parser.add_argument("--read_timeout", type=float, default=120, help="Seconds to wait for the next byte (or stream chunk) of an API answer.")
+        parser.add_argument("--deadline", type=float, help="Seconds the whole run may take; API calls, retries and repair attempts stop once it has passed.")
+        parser.add_argument("--requests_per_minute", type=int, help="Client-side limit of requests per minute sent to the API.")
+        parser.add_argument("--tokens_per_minute", type=int, help="Client-side limit of estimated tokens (prompt plus max_tokens) per minute sent to the API.")
+        parser.add_argument("--rate_limit_db", type=str, help="SQLite file through which AutoChatBot processes on this host share one rate limit budget.")
         parser.add_argument("--debug", action='store_true', help="Enable debug mode.")
         return parser
 
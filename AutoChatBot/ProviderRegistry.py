@@ -0,0 +1,208 @@
+import importlib
+import threading
+
+class ProviderRegistry:
+    """
+    ProviderRegistry: This class maps API names to the backend clients that serve them, so adding a backend is one `register` call.
+
+    A backend is registered with:
+    - client: A class with static `load_api_key()`, `make_api_request(api_key=..., conversation=..., ...)`
+      and, if it streams, `stream_api_request(...)`. The client builds the provider-specific request body.
+      It may also be given as a 'module:Class' path (relative to this package if it starts with a dot),
+      which is imported on the first request, so listing the backends does not import `requests`.
+    - parameters: The sampling parameters the client accepts besides model, temperature and max_tokens.
+      Parameters a backend does not know are not sent to it.
+    - normalize_response: Turns a successful response into the chat completion shape
+      (`response['choices'][0]['message']['content']`). Error dicts are passed through untouched.
+    - capabilities: 'streaming' (bool), 'n' (bool, several choices per request) and 'max_context'
+      (int or None, context window in tokens).
+
+    `ParserCreator` offers the registered names as `--api` choices, and `ChatAPIHandler` dispatches
+    every request through `make_api_request` / `stream_api_request` here.
+
+    Static methods:
+    - register(name, client, parameters, normalize_response=None, streaming=True, n=False, max_context=None): Adds or replaces a backend.
+    - names(): Returns the registered API names.
+    - get(name): Returns a backend's registration.
+    - get_capabilities(name): Returns a backend's capabilities.
+    - make_api_request(name, conversation, model, temperature, max_tokens, timeout=None, **parameters): Sends one request.
+    - stream_api_request(name, conversation, model, temperature, max_tokens, timeout=None, **parameters): Streams one request.
+    - normalize_openai_response(response): Default normalizer for OpenAI-compatible responses.
+
+    Example usage:
+        ProviderRegistry.register(
+            'myserver', MyServerChatCompletion, parameters=('top_p', 'stop_sequences'),
+            streaming=False, max_context=8192
+        )
+        response = ChatAPIHandler.make_api_request(api='myserver', model='m', temperature=0.2,
+                                                   max_tokens=200, conversation=conversation)
+    """
+    _lock = threading.Lock()
+    _providers = {}
+
+    @staticmethod
+    def register(name, client, parameters, normalize_response=None, streaming=True, n=False, max_context=None):
+        """
+        Adds a backend, or replaces the one registered under the same name.
+
+        Args:
+        - name (str): The API name, as passed to `--api`.
+        - client (type or str): The backend client class, or its 'module:Class' import path.
+        - parameters (iterable of str): Sampling parameters the client accepts, e.g. 'top_p', 'top_k',
+          'repetition_penalty', 'frequency_penalty', 'presence_penalty', 'stop_sequences'.
+        - normalize_response (callable, optional): Defaults to `normalize_openai_response`.
+        - streaming (bool, optional): Whether the client has `stream_api_request`. Defaults to True.
+        - n (bool, optional): Whether the backend can return several choices per request. Defaults to False.
+        - max_context (int, optional): Context window of the backend's models in tokens, if known.
+        """
+        provider = {
+            'name': name,
+            'client': client,
+            'parameters': tuple(parameters),
+            'normalize_response': normalize_response or ProviderRegistry.normalize_openai_response,
+            'capabilities': {'streaming': streaming, 'n': n, 'max_context': max_context},
+        }
+        with ProviderRegistry._lock:
+            ProviderRegistry._providers[name] = provider
+
+    @staticmethod
+    def names():
+        """
+        Returns:
+        - list: The registered API names, in registration order.
+        """
+        with ProviderRegistry._lock:
+            return list(ProviderRegistry._providers)
+
+    @staticmethod
+    def get(name):
+        """
+        Returns a backend's registration.
+
+        Args:
+        - name (str): The API name.
+
+        Returns:
+        - dict: 'name', 'client', 'parameters', 'normalize_response' and 'capabilities'.
+
+        Raises:
+        - ValueError: If no backend is registered under that name.
+        """
+        provider = ProviderRegistry._providers.get(name)
+        if provider is None:
+            choices = ", ".join(f"'{registered}'" for registered in ProviderRegistry.names())
+            raise ValueError(f"Invalid API selection. Choose one of {choices}.")
+        return provider
+
+    @staticmethod
+    def get_capabilities(name):
+        """
+        Returns a backend's capabilities.
+
+        Args:
+        - name (str): The API name.
+
+        Returns:
+        - dict: 'streaming', 'n' and 'max_context'.
+
+        Raises:
+        - ValueError: If no backend is registered under that name.
+        """
+        return dict(ProviderRegistry.get(name)['capabilities'])
+
+    @staticmethod
+    def make_api_request(name, conversation, model, temperature, max_tokens, timeout=None, **parameters):
+        """
+        Sends one blocking request to a backend and normalizes a successful response.
+
+        Args:
+        - name (str): The API name.
+        - conversation (list): List of message dicts.
+        - model (str), temperature (float), max_tokens (int): Passed to every backend.
+        - timeout (tuple, optional): (connect, read) timeout in seconds.
+        - **parameters: Sampling parameters; those the backend does not accept are dropped.
+
+        Returns:
+        - dict: The normalized response, or the backend's error dict.
+
+        Raises:
+        - ValueError: If no backend is registered under that name.
+        """
+        provider = ProviderRegistry.get(name)
+        client = ProviderRegistry._load_client(provider)
+        response = client.make_api_request(
+            api_key=client.load_api_key(),
+            conversation=conversation,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            **ProviderRegistry._select_parameters(provider, parameters)
+        )
+        if isinstance(response, dict) and 'error' not in response:
+            response = provider['normalize_response'](response)
+        return response
+
+    @staticmethod
+    def stream_api_request(name, conversation, model, temperature, max_tokens, timeout=None, **parameters):
+        """
+        Sends one streaming request to a backend.
+
+        Args:
+        - The same as `make_api_request`.
+
+        Returns:
+        - generator: Yields the completion text tokens as they arrive.
+
+        Raises:
+        - ValueError: If no backend is registered under that name or it cannot stream.
+        """
+        provider = ProviderRegistry.get(name)
+        if not provider['capabilities']['streaming']:
+            raise ValueError(f"The '{name}' API does not support streaming.")
+        client = ProviderRegistry._load_client(provider)
+        return client.stream_api_request(
+            api_key=client.load_api_key(),
+            conversation=conversation,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            **ProviderRegistry._select_parameters(provider, parameters)
+        )
+
+    @staticmethod
+    def normalize_openai_response(response):
+        """
+        Normalizes an OpenAI-compatible response: legacy completion choices that carry `text`
+        instead of a `message` are rewritten to the chat completion shape.
+
+        Args:
+        - response (dict): A successful response.
+
+        Returns:
+        - dict: The response, with a `message` in every choice.
+        """
+        for choice in response.get('choices', []):
+            if isinstance(choice, dict) and 'message' not in choice and 'text' in choice:
+                choice['message'] = {'role': 'assistant', 'content': choice['text']}
+        return response
+
+    @staticmethod
+    def _load_client(provider):
+        client = provider['client']
+        if isinstance(client, str):
+            module_name, _, class_name = client.partition(':')
+            client = getattr(importlib.import_module(module_name, __package__), class_name)
+            provider['client'] = client
+        return client
+
+    @staticmethod
+    def _select_parameters(provider, parameters):
+        return {name: value for name, value in parameters.items() if name in provider['parameters']}
+
+OPENAI_PARAMETERS = ('top_p', 'frequency_penalty', 'presence_penalty', 'stop_sequences')
+
+ProviderRegistry.register('openai', '.GPTChatCompletion:GPT3ChatCompletion', OPENAI_PARAMETERS, n=True, max_context=16385)
+ProviderRegistry.register('togetherai', '.TogetherAIChatCompletion:TogetherAIChatCompletion', ('top_p', 'top_k', 'repetition_penalty'), n=True, max_context=32768)
+ProviderRegistry.register('local', '.LocalChatCompletion:LocalChatCompletion', OPENAI_PARAMETERS)
@@ -19,7 +19,7 @@ class PyFileExecutor:
     """
 
     @staticmethod
-    def save_code_to_file(file_path, code, language='python'):
+    def save_code_to_file(file_path, code, language='python', require_block=False):
         """
         Saves the provided code to the specified file path as a .py file after extracting the code.
 
@@ -27,12 +27,18 @@ class PyFileExecutor:
         - file_path (str): Path to the .py file.
         - code (str): Code to be saved to the file.
         - language (str): Language of the code to be extracted.
+        - require_block (bool): Refuse to write if the code has no closed block of the language, e.g. because
+          it is a model response without code. By default the code is then saved as it is.
 
         Returns:
         - str: Error output if there is an error, None if there is no error.
         """
         try:
-            extracted_code = CodeExtractor.extract_code(code, language)
+            extracted_code = CodeExtractor.extract_code(code, language, default=None)
+            if extracted_code is None:
+                if require_block:
+                    return PyFileExecutor.get_no_block_error(language)
+                extracted_code = code
             code_to_save = extracted_code if extracted_code else code
 
             # Create the directory if it does not exist
@@ -49,6 +55,19 @@ class PyFileExecutor:
         except Exception as e:
             return str(e)
 
+    @staticmethod
+    def get_no_block_error(language='python'):
+        """
+        Returns the error output reported when a response has no code block to run.
+
+        Parameters:
+        - language (str): Language of the missing code block.
+
+        Returns:
+        - str: The error output.
+        """
+        return f"No closed ```{language} code block found in the response, so nothing was written or run. Reply with the complete code in one ```{language} block."
+
     @staticmethod
     def is_error(output):
         """
@@ -0,0 +1,235 @@
+import time
+import contextlib
+import sqlite3
+import threading
+
+class RateLimiter:
+    """
+    RateLimiter: This class holds requests back so they stay under a provider's requests-per-minute and tokens-per-minute limits.
+
+    Every (api, model) pair has one token bucket per limit. A bucket holds up to one minute's worth
+    of budget and refills continuously at `limit / 60` per second. A request takes its cost from every
+    bucket at once (1 request and its estimated tokens). The bucket may go into debt, and the request
+    then waits exactly as long as the refill needs to pay the debt back. Requests are admitted in the
+    order they arrive, and the average rate never exceeds the limit.
+
+    Limits are configured per API, optionally narrowed to one model. Without a configured limit a
+    request is never delayed.
+
+    By default the buckets live in this process. After `use_shared_store(db_path)` they are kept in
+    a SQLite database instead and updated in `BEGIN IMMEDIATE` transactions, so several CLI processes
+    on one host that point at the same file share a single budget.
+
+    Static methods:
+    - configure(api, requests_per_minute=None, tokens_per_minute=None, model=None): Sets the limits.
+    - use_shared_store(db_path): Keeps the buckets in a SQLite file shared between processes.
+    - get_limits(api, model=None): Returns the limits that apply to a model.
+    - reserve(api, model, tokens): Takes a request's budget and returns how long it has to wait.
+    - acquire(api, model, tokens, cancel_event=None, max_wait=None): Takes a request's budget and waits.
+    - get_stats(api=None): Returns the per-model counters of this process.
+    - reset(): Removes all limits, buckets and counters of this process.
+
+    Example usage:
+        RateLimiter.configure('openai', requests_per_minute=500, tokens_per_minute=90000)
+        RateLimiter.use_shared_store('/tmp/autochatbot_ratelimit.db')
+        RateLimiter.acquire('openai', 'gpt-3.5-turbo', TokenEstimator.estimate_request(conversation, 500))
+        response = GPT3ChatCompletion.make_api_request(...)
+    """
+    _lock = threading.Lock()
+    _limits = {}
+    _buckets = {}
+    _stats = {}
+    _shared_path = None
+
+    @staticmethod
+    def configure(api, requests_per_minute=None, tokens_per_minute=None, model=None):
+        """
+        Sets the limits of an API, or of one of its models. A limit of None or 0 is not enforced.
+
+        Args:
+        - api (str): The API name.
+        - requests_per_minute (int, optional): Maximum requests per minute.
+        - tokens_per_minute (int, optional): Maximum estimated tokens (prompt plus max_tokens) per minute.
+        - model (str, optional): Only apply the limits to this model. Defaults to every model of the API.
+
+        Raises:
+        - ValueError: If a limit is negative.
+        """
+        limits = {'requests': requests_per_minute, 'tokens': tokens_per_minute}
+        for dimension, limit in limits.items():
+            if limit is not None and limit < 0:
+                raise ValueError(f"{dimension} per minute must not be negative.")
+        with RateLimiter._lock:
+            RateLimiter._limits[(api, model)] = {dimension: limit for dimension, limit in limits.items() if limit}
+
+    @staticmethod
+    def use_shared_store(db_path):
+        """
+        Keeps the buckets in a SQLite file so that processes using the same file share their budget.
+
+        Args:
+        - db_path (str or None): Path of the SQLite file, created if missing. None keeps the buckets in this process.
+        """
+        if db_path is not None:
+            with RateLimiter._connect(db_path) as connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS buckets ("
+                    "key TEXT NOT NULL, dimension TEXT NOT NULL, level REAL NOT NULL, updated REAL NOT NULL, "
+                    "PRIMARY KEY (key, dimension))"
+                )
+        RateLimiter._shared_path = db_path
+
+    @staticmethod
+    def get_limits(api, model=None):
+        """
+        Returns the limits that apply to a model: its own, or else the API-wide ones.
+
+        Args:
+        - api (str): The API name.
+        - model (str, optional): The model name.
+
+        Returns:
+        - dict: Maps 'requests' and/or 'tokens' to their per-minute limit. Empty if nothing is limited.
+        """
+        with RateLimiter._lock:
+            limits = RateLimiter._limits.get((api, model))
+            if limits is None:
+                limits = RateLimiter._limits.get((api, None), {})
+            return dict(limits)
+
+    @staticmethod
+    def reserve(api, model, tokens):
+        """
+        Takes one request and `tokens` tokens from the model's buckets.
+
+        Args:
+        - api (str): The API name.
+        - model (str): The model name.
+        - tokens (int): Estimated tokens of the request.
+
+        Returns:
+        - float: Seconds the caller has to wait before sending the request.
+        """
+        limits = RateLimiter.get_limits(api, model)
+        if not limits:
+            return 0.0
+        costs = {'requests': 1, 'tokens': tokens}
+        costs = {dimension: (costs[dimension], limit) for dimension, limit in limits.items()}
+        key = f"{api}/{model}"
+        if RateLimiter._shared_path is not None:
+            delay = RateLimiter._reserve_shared(key, costs)
+        else:
+            delay = RateLimiter._reserve_local(key, costs)
+        RateLimiter._count(key, delay)
+        return delay
+
+    @staticmethod
+    def acquire(api, model, tokens, cancel_event=None, max_wait=None):
+        """
+        Takes a request's budget and blocks until the request may be sent.
+
+        Args:
+        - api (str): The API name.
+        - model (str): The model name.
+        - tokens (int): Estimated tokens of the request.
+        - cancel_event (threading.Event, optional): Ends the wait early when set.
+        - max_wait (float, optional): Gives up at once, without waiting, if the request would have to
+          wait longer than this many seconds. The budget stays taken.
+
+        Returns:
+        - bool: True if the request may be sent, False if the wait was cancelled or given up.
+        """
+        delay = RateLimiter.reserve(api, model, tokens)
+        if delay <= 0:
+            return True
+        if max_wait is not None and delay > max_wait:
+            return False
+        if cancel_event is None:
+            time.sleep(delay)
+            return True
+        return not cancel_event.wait(delay)
+
+    @staticmethod
+    def get_stats(api=None):
+        """
+        Returns the counters of this process.
+
+        Args:
+        - api (str, optional): Only report the models of this API.
+
+        Returns:
+        - dict: Maps 'api/model' to 'requests', 'delayed' (requests that had to wait) and 'wait_time' (seconds).
+        """
+        with RateLimiter._lock:
+            return {
+                key: dict(stats) for key, stats in RateLimiter._stats.items()
+                if api is None or key.startswith(f"{api}/")
+            }
+
+    @staticmethod
+    def reset():
+        """
+        Removes all limits, in-process buckets and counters, and stops using the shared store.
+        """
+        with RateLimiter._lock:
+            RateLimiter._limits.clear()
+            RateLimiter._buckets.clear()
+            RateLimiter._stats.clear()
+        RateLimiter._shared_path = None
+
+    @staticmethod
+    def _take(level, updated, cost, limit, now):
+        """
+        Refills a bucket up to `now`, takes `cost` from it and returns its new level and the wait.
+        """
+        rate = limit / 60.0
+        level = min(float(limit), level + (now - updated) * rate)
+        level -= cost
+        return level, max(0.0, -level / rate)
+
+    @staticmethod
+    def _reserve_local(key, costs):
+        now = time.time()
+        delay = 0.0
+        with RateLimiter._lock:
+            buckets = RateLimiter._buckets.setdefault(key, {})
+            for dimension, (cost, limit) in costs.items():
+                level, updated = buckets.get(dimension, (float(limit), now))
+                level, wait = RateLimiter._take(level, updated, cost, limit, now)
+                buckets[dimension] = (level, now)
+                delay = max(delay, wait)
+        return delay
+
+    @staticmethod
+    def _reserve_shared(key, costs):
+        delay = 0.0
+        with RateLimiter._connect(RateLimiter._shared_path) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            for dimension, (cost, limit) in costs.items():
+                row = connection.execute(
+                    "SELECT level, updated FROM buckets WHERE key = ? AND dimension = ?", (key, dimension)
+                ).fetchone()
+                level, updated = row if row is not None else (float(limit), now)
+                level, wait = RateLimiter._take(level, updated, cost, limit, now)
+                connection.execute(
+                    "INSERT OR REPLACE INTO buckets (key, dimension, level, updated) VALUES (?, ?, ?, ?)",
+                    (key, dimension, level, now)
+                )
+                delay = max(delay, wait)
+            connection.execute("COMMIT")
+        return delay
+
+    @staticmethod
+    def _connect(db_path):
+        # Autocommit mode, so transactions are explicit. Closing the connection rolls back a transaction left open by an error.
+        return contextlib.closing(sqlite3.connect(db_path, timeout=30, isolation_level=None))
+
+    @staticmethod
+    def _count(key, delay):
+        with RateLimiter._lock:
+            stats = RateLimiter._stats.setdefault(key, {'requests': 0, 'delayed': 0, 'wait_time': 0.0})
+            stats['requests'] += 1
+            if delay > 0:
+                stats['delayed'] += 1
+                stats['wait_time'] += delay
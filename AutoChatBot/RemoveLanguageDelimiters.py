@@ -4,9 +4,21 @@ class CodeExtractor:
     """
     A class to extract code blocks from a string based on the specified language.
     If no language is specified, it attempts to infer the language and extract the code block.
+
+    Fenced blocks are found in a single pass over the text: plain substring searches jump from one
+    run of three backticks or tildes to the next, and one precompiled pattern parses the line of
+    each hit that is a fence line (three or more backticks or tildes, optionally indented, followed
+    by an info string whose first word is the language tag). An opening fence may also follow text on
+    its line, as in "Here: ```python", if its info string is at most one word. A block is closed by a
+    fence line of the same character that is at least as long and has no info string, so fences nested
+    inside a longer fence (e.g. a ```python block inside a ````markdown block) stay part of its code.
+    The work is linear in the length of the text whatever the number of blocks or languages.
     
     Static Methods:
-    - extract_code(input_string, language=None): Extracts the code block for the specified language from the input string.
+    - extract_blocks(input_string, language=None): Returns every fenced code block with its language and offsets.
+    - extract_code(input_string, language=None, default=INPUT): Extracts the code block for the specified language from the input string.
+    - match_fence_line(line): Matches the fence of a single line.
+    - can_open(fence, info, inline): Tells whether a fence opens a block.
     
     Usage example:
         input_string = '''
@@ -20,10 +32,141 @@ class CodeExtractor:
         '''
         extracted_code = CodeExtractor.extract_code(input_string)
         print(extracted_code)
+
+        for block in CodeExtractor.extract_blocks(input_string):
+            print(block['language'], block['start'], block['end'])
     """
+    FENCE_PATTERN = re.compile(r'([ \t]*)(`{3,}|~{3,})([^\n]*)')
+    FENCE_MARKERS = ('```', '~~~')
+    INPUT = object()
+
+    @staticmethod
+    def extract_blocks(input_string, language=None):
+        """
+        Returns the fenced code blocks of the input string, in order.
+
+        Args:
+        - input_string (str): The text, e.g. a model response.
+        - language (str, optional): Only return blocks tagged with this language (case-insensitive).
+          An empty string selects untagged blocks.
+
+        Returns:
+        - list: One dict per block:
+          - 'language' (str): The first word of the opening fence's info string, '' if there is none.
+          - 'info' (str): The whole info string, e.g. 'python src/app.py'.
+          - 'code' (str): The lines between the fences, without the indentation of the opening fence.
+          - 'start', 'end' (int): Offsets of the block in the input string, from the opening fence up
+            to the end of the closing fence.
+          - 'closed' (bool): False for a block that runs to the end of the text without a closing fence.
+        """
+        wanted = None if language is None else language.lower()
+        blocks = []
+        opening = None
+        for match, inline in CodeExtractor._iter_fence_lines(input_string):
+            indent, fence, info = match.groups()
+            info = info.strip()
+            if opening is None:
+                if CodeExtractor.can_open(fence, info, inline):
+                    opening = (match, indent, fence, info)
+            elif not inline and fence[0] == opening[2][0] and len(fence) >= len(opening[2]) and not info:
+                blocks.append(CodeExtractor._make_block(input_string, opening, match.start(), match.end(), True))
+                opening = None
+        if opening is not None:
+            blocks.append(CodeExtractor._make_block(input_string, opening, len(input_string), len(input_string), False))
+        if wanted is not None:
+            blocks = [block for block in blocks if block['language'].lower() == wanted]
+        return blocks
+
+    @staticmethod
+    def _iter_fence_lines(input_string):
+        """
+        Yields (FENCE_PATTERN match, inline) for every line with a fence, in order. A fence at the start
+        of a line (after indentation) is matched there; otherwise the line's first fence is matched,
+        with inline True.
+        """
+        hits = [input_string.find(marker) for marker in CodeExtractor.FENCE_MARKERS]
+        while True:
+            found = [hit for hit in hits if hit >= 0]
+            if not found:
+                return
+            hit = min(found)
+            line_start = input_string.rfind('\n', 0, hit) + 1
+            match = CodeExtractor.FENCE_PATTERN.match(input_string, line_start)
+            if match is not None:
+                yield match, False
+            else:
+                match = CodeExtractor.FENCE_PATTERN.match(input_string, hit)
+                yield match, True
+            position = match.end()
+            hits = [
+                input_string.find(marker, position) if 0 <= hit < position else hit
+                for marker, hit in zip(CodeExtractor.FENCE_MARKERS, hits)
+            ]
+
+    @staticmethod
+    def match_fence_line(line):
+        """
+        Matches a single line the way `extract_blocks` matches the lines of a text.
+
+        Args:
+        - line (str): The line, without its newline.
+
+        Returns:
+        - tuple: (FENCE_PATTERN match or None, whether the fence follows text on the line).
+        """
+        match = CodeExtractor.FENCE_PATTERN.match(line)
+        if match is not None:
+            return match, False
+        hits = [hit for hit in (line.find(marker) for marker in CodeExtractor.FENCE_MARKERS) if hit >= 0]
+        if not hits:
+            return None, False
+        return CodeExtractor.FENCE_PATTERN.match(line, min(hits)), True
+
+    @staticmethod
+    def can_open(fence, info, inline):
+        """
+        Tells whether a fence opens a block.
+
+        Args:
+        - fence (str): The run of backticks or tildes.
+        - info (str): The stripped info string after it.
+        - inline (bool): Whether text precedes the fence on its line.
+
+        Returns:
+        - bool: True if the fence opens a block.
+        """
+        # A backtick fence's info string cannot contain backticks: "```a```" is inline code
+        if fence[0] == '`' and '`' in info:
+            return False
+        # After text, only "```" or "```lang" at the end of the line: "the ```python fence" is prose
+        return not (inline and len(info.split()) > 1)
+
+    @staticmethod
+    def _make_block(input_string, opening, code_end, end, closed):
+        """
+        Builds the dict of a block whose code runs from after the opening fence line to code_end.
+        """
+        match, indent, _, info = opening
+        code_start = min(match.end() + 1, code_end)
+        code = input_string[code_start:code_end]
+        if code.endswith('\n'):
+            code = code[:-1]
+        if code.endswith('\r'):
+            code = code[:-1]
+        if indent:
+            code = '\n'.join(CodeExtractor._remove_indent(line, len(indent)) for line in code.split('\n'))
+        language = info.split()[0] if info else ''
+        return {'language': language, 'info': info, 'code': code, 'start': match.start(), 'end': end, 'closed': closed}
+
+    @staticmethod
+    def _remove_indent(line, width):
+        removed = 0
+        while removed < width and removed < len(line) and line[removed] in ' \t':
+            removed += 1
+        return line[removed:]
     
     @staticmethod
-    def extract_code(input_string, language=None):
+    def extract_code(input_string, language=None, default=INPUT):
         """
         Extracts the code block for the specified language from the input string.
         If no language is specified, it attempts to infer the language and extract the code block.
@@ -31,25 +174,16 @@ class CodeExtractor:
         Args:
         - input_string (str): The input string containing the code block.
         - language (str, optional): The programming language of the code block to extract.
+        - default (optional): Returned if there is no such block, e.g. None to tell that case apart.
+          Defaults to the input string unchanged.
         
         Returns:
-        - str: The extracted code block, or an empty string if no code block is found.
+        - str: The code of the first closed block (of that language, if given), stripped, or the default.
         """
-        if language:
-            pattern = rf'```{language}(.*?)```'
-        else:
-            pattern = r'```(\w+)?(.*?)```'
-        
-        match = re.search(pattern, input_string, re.DOTALL)
-        if match:
-            if language:
-                return match.group(1).strip()
-            else:
-                # match.group(1) is the language (if present)
-                # match.group(2) is the code block
-                return match.group(2).strip()
-        else:
-            return input_string
+        for block in CodeExtractor.extract_blocks(input_string, language):
+            if block['closed']:
+                return block['code'].strip()
+        return input_string if default is CodeExtractor.INPUT else default
 
 # Usage example:
 if __name__ == "__main__":
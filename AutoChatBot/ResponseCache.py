@@ -0,0 +1,271 @@
+import os
+import time
+import json
+import sqlite3
+import hashlib
+import tempfile
+import threading
+import contextlib
+
+class ResponseCache:
+    """
+    ResponseCache: This class stores chat completion responses on disk, addressed by a hash of the full request.
+
+    The key is the SHA-256 of the canonical JSON of the API name, the conversation and every sampling
+    parameter, so a request is only answered from the cache when all of them are identical. Entries
+    live in `<cache_dir>/<key[:2]>/<key>.json`. A hit refreshes the entry's modification time.
+
+    The total size of the entries is kept in `<cache_dir>/index.sqlite` and updated by every store,
+    so a store costs one `stat` instead of a scan of the whole cache. Only when the total passes
+    `max_bytes` is the directory scanned: the least recently used entries are deleted until the cache
+    is back under `EVICT_TO * max_bytes` (which leaves room for many stores before the next scan),
+    temporary files left behind by crashed writers are removed, and the exact total is stored again.
+
+    Writes go to a temporary file that is atomically renamed into place, and readers treat missing or
+    unreadable entries as misses, so several CLI processes can share one cache directory. The total
+    is updated in `BEGIN IMMEDIATE` transactions; if concurrent writers make it drift, the next scan
+    corrects it.
+
+    Static methods:
+    - configure(cache_dir, max_bytes): Enables the cache.
+    - disable(): Disables the cache.
+    - is_enabled(): Returns whether the cache is enabled.
+    - make_key(api, **request_params): Returns the content address of a request.
+    - get(key): Returns the cached response or None.
+    - put(key, response): Stores a response and evicts old entries if needed.
+    - get_size(): Returns the total size of the entries.
+    - get_stats(): Returns the hit/miss counters of this process.
+
+    Example usage:
+        ResponseCache.configure('.autochatbot_cache', max_bytes=256 * 1024 * 1024)
+        key = ResponseCache.make_key('openai', model='gpt-3.5-turbo', conversation=conversation, temperature=0)
+        response = ResponseCache.get(key)
+        if response is None:
+            response = GPT3ChatCompletion.make_api_request(...)
+            ResponseCache.put(key, response)
+    """
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+    KEY_VERSION = 1
+    EVICT_TO = 0.9
+    TEMP_FILE_MAX_AGE = 3600
+    INDEX_FILE = 'index.sqlite'
+    TOTALS_SCHEMA = "CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, bytes INTEGER NOT NULL)"
+
+    _cache_dir = None
+    _max_bytes = DEFAULT_MAX_BYTES
+    _lock = threading.Lock()
+    _stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    @staticmethod
+    def configure(cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Enables the cache.
+
+        Args:
+        - cache_dir (str): Directory holding the cache entries. Created if missing.
+        - max_bytes (int, optional): Size cap of the cache directory. Defaults to 512 MB.
+
+        Raises:
+        - ValueError: If max_bytes is smaller than 1.
+        """
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1.")
+        os.makedirs(cache_dir, exist_ok=True)
+        ResponseCache._cache_dir = cache_dir
+        ResponseCache._max_bytes = max_bytes
+        with ResponseCache._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(ResponseCache.TOTALS_SCHEMA)
+            row = connection.execute("SELECT bytes FROM totals WHERE name = 'entries'").fetchone()
+            if row is None:
+                # New index (or a cache written before the index existed): count the entries once.
+                ResponseCache._scan(connection, evict=False)
+            connection.execute("COMMIT")
+
+    @staticmethod
+    def disable():
+        """
+        Disables the cache. Entries on disk are kept.
+        """
+        ResponseCache._cache_dir = None
+
+    @staticmethod
+    def is_enabled():
+        """
+        Returns:
+        - bool: True if `configure` was called and the cache was not disabled since.
+        """
+        return ResponseCache._cache_dir is not None
+
+    @staticmethod
+    def make_key(api, **request_params):
+        """
+        Returns the content address of a request.
+
+        Args:
+        - api (str): The API name.
+        - **request_params: The conversation, model and every sampling parameter of the request.
+
+        Returns:
+        - str: Hex SHA-256 digest of the canonical JSON of the request.
+        """
+        request = {'version': ResponseCache.KEY_VERSION, 'api': api, 'params': request_params}
+        canonical = json.dumps(request, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get(key):
+        """
+        Returns the cached response for a key and marks it as recently used.
+
+        Args:
+        - key (str): The key returned by `make_key`.
+
+        Returns:
+        - dict or None: The cached response, or None on a miss or if the cache is disabled.
+        """
+        if not ResponseCache.is_enabled():
+            return None
+        entry_path = ResponseCache._entry_path(key)
+        try:
+            with open(entry_path, 'r') as file:
+                response = json.load(file)
+            os.utime(entry_path)
+        except (OSError, json.JSONDecodeError):
+            ResponseCache._count('misses')
+            return None
+        ResponseCache._count('hits')
+        return response
+
+    @staticmethod
+    def put(key, response):
+        """
+        Stores a response and adds its size to the recorded total. If the total passes the size cap,
+        the cache is scanned and its least recently used entries are evicted.
+
+        Args:
+        - key (str): The key returned by `make_key`.
+        - response (dict): The response to store.
+        """
+        if not ResponseCache.is_enabled():
+            return
+        entry_path = ResponseCache._entry_path(key)
+        directory = os.path.dirname(entry_path)
+        os.makedirs(directory, exist_ok=True)
+        try:
+            old_size = os.stat(entry_path).st_size
+        except FileNotFoundError:
+            old_size = 0
+        file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'w') as file:
+                json.dump(response, file)
+                file.flush()
+                new_size = os.fstat(file.fileno()).st_size
+            os.replace(temp_path, entry_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        ResponseCache._count('stores')
+
+        with ResponseCache._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(ResponseCache.TOTALS_SCHEMA)
+            connection.execute("UPDATE totals SET bytes = bytes + ? WHERE name = 'entries'", (new_size - old_size,))
+            row = connection.execute("SELECT bytes FROM totals WHERE name = 'entries'").fetchone()
+            # Without a total (the index was removed since `configure`), the scan counts the entries again.
+            if row is None or row[0] > ResponseCache._max_bytes:
+                ResponseCache._scan(connection, evict=True)
+            connection.execute("COMMIT")
+
+    @staticmethod
+    def get_size():
+        """
+        Returns:
+        - int: The total size of the cache entries in bytes, as recorded in the index.
+        """
+        if not ResponseCache.is_enabled():
+            return 0
+        with ResponseCache._connect() as connection:
+            row = connection.execute("SELECT bytes FROM totals WHERE name = 'entries'").fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def get_stats():
+        """
+        Returns the counters of this process.
+
+        Returns:
+        - dict: 'hits', 'misses', 'stores' and 'evictions'.
+        """
+        with ResponseCache._lock:
+            return dict(ResponseCache._stats)
+
+    @staticmethod
+    def reset_stats():
+        """
+        Resets the counters of this process to zero.
+        """
+        with ResponseCache._lock:
+            for name in ResponseCache._stats:
+                ResponseCache._stats[name] = 0
+
+    @staticmethod
+    def _entry_path(key):
+        return os.path.join(ResponseCache._cache_dir, key[:2], f'{key}.json')
+
+    @staticmethod
+    def _count(name, amount=1):
+        with ResponseCache._lock:
+            ResponseCache._stats[name] += amount
+
+    @staticmethod
+    def _connect():
+        # Autocommit mode, so transactions are explicit. Closing the connection rolls back a transaction left open by an error.
+        index_path = os.path.join(ResponseCache._cache_dir, ResponseCache.INDEX_FILE)
+        return contextlib.closing(sqlite3.connect(index_path, timeout=30, isolation_level=None))
+
+    @staticmethod
+    def _scan(connection, evict):
+        """
+        Walks the cache directory, removes stale temporary files and, if `evict` is set, deletes least
+        recently used entries until the cache is under `EVICT_TO * max_bytes`. Stores the exact total in
+        the index. Must be called inside a write transaction on `connection`.
+        """
+        entries = []
+        total_size = 0
+        stale_before = time.time() - ResponseCache.TEMP_FILE_MAX_AGE
+        for bucket in os.scandir(ResponseCache._cache_dir):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith('.tmp'):
+                    # Left behind by a writer that crashed before renaming it into place.
+                    if stat.st_mtime < stale_before:
+                        with contextlib.suppress(FileNotFoundError):
+                            os.remove(entry.path)
+                    continue
+                if not entry.name.endswith('.json'):
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+        if evict and total_size > ResponseCache._max_bytes:
+            target_size = ResponseCache._max_bytes * ResponseCache.EVICT_TO
+            entries.sort()
+            for _, size, path in entries:
+                if total_size <= target_size:
+                    break
+                try:
+                    os.remove(path)
+                    ResponseCache._count('evictions')
+                except FileNotFoundError:
+                    pass  # Another process evicted it first.
+                total_size -= size
+
+        connection.execute("INSERT OR REPLACE INTO totals (name, bytes) VALUES ('entries', ?)", (total_size,))
@@ -0,0 +1,221 @@
+import time
+import random
+import threading
+import email.utils
+import requests
+
+class RetryPolicy:
+    """
+    RetryPolicy: This class retries provider requests that failed for a transient reason, using exponential backoff with full jitter.
+
+    A request is retried when the provider answered with a retryable status code (429, 5xx, ...) or
+    the connection failed. The n-th retry waits a random time between 0 and
+    `min(max_delay, base_delay * 2**n)` ("full jitter"), or at least as long as the server's
+    `Retry-After` header asks for. Retrying stops after `max_retries` retries or when the next wait
+    would end later than `max_total_time` seconds after the first attempt, or after the run's deadline;
+    the last error is returned (or raised, for connection exceptions).
+
+    Static methods:
+    - configure(max_retries, base_delay, max_delay, max_total_time): Changes the policy settings.
+    - call(provider, send, cancel_event=None, deadline=None): Calls `send` until it succeeds or retrying is given up.
+    - is_retryable(response): Tells whether an error response is worth retrying.
+    - get_retry_after(response): Reads the Retry-After delay of an error response.
+    - compute_delay(retry_number, retry_after=None): Returns the wait before a retry.
+    - get_stats(provider=None): Returns the per-provider retry counters.
+
+    Example usage:
+        RetryPolicy.configure(max_retries=5, max_total_time=60)
+        response = RetryPolicy.call('openai', lambda: GPT3ChatCompletion.make_api_request(api_key, conversation))
+        print(RetryPolicy.get_stats('openai'))
+        # {'openai': {'requests': 1, 'attempts': 2, 'retries': 1, 'gave_up': 0}}
+    """
+    RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+    RETRYABLE_ERROR_TYPES = frozenset({'connection_error', 'timeout_error'})
+    RETRYABLE_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+    _settings = {'max_retries': 4, 'base_delay': 1.0, 'max_delay': 30.0, 'max_total_time': 120.0}
+    _lock = threading.Lock()
+    _stats = {}
+
+    @staticmethod
+    def configure(max_retries=None, base_delay=None, max_delay=None, max_total_time=None):
+        """
+        Changes the policy settings. Arguments left as None keep their current value.
+
+        Args:
+        - max_retries (int, optional): Retries after the first attempt. 0 disables retrying.
+        - base_delay (float, optional): Backoff scale in seconds.
+        - max_delay (float, optional): Upper bound of a single backoff wait in seconds.
+        - max_total_time (float, optional): Seconds after the first attempt beyond which no retry is started.
+
+        Raises:
+        - ValueError: If a setting is negative.
+        """
+        settings = {
+            'max_retries': max_retries,
+            'base_delay': base_delay,
+            'max_delay': max_delay,
+            'max_total_time': max_total_time,
+        }
+        for name, value in settings.items():
+            if value is None:
+                continue
+            if value < 0:
+                raise ValueError(f"{name} must not be negative.")
+            RetryPolicy._settings[name] = value
+
+    @staticmethod
+    def is_retryable(response):
+        """
+        Tells whether an error response is worth retrying.
+
+        Args:
+        - response (dict): A provider response.
+
+        Returns:
+        - bool: True for transient errors (rate limits, server errors, connection failures).
+        """
+        error = response.get('error') if isinstance(response, dict) else None
+        if not isinstance(error, dict):
+            return False
+        return (error.get('status_code') in RetryPolicy.RETRYABLE_STATUS_CODES
+                or error.get('type') in RetryPolicy.RETRYABLE_ERROR_TYPES)
+
+    @staticmethod
+    def get_retry_after(response):
+        """
+        Reads the Retry-After delay of an error response.
+
+        Args:
+        - response (dict): A provider error response whose error may carry a `retry_after` value,
+          either in seconds or as an HTTP date.
+
+        Returns:
+        - float or None: The delay in seconds, or None if the server did not ask for one.
+        """
+        value = response.get('error', {}).get('retry_after')
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except (TypeError, ValueError):
+            pass
+        try:
+            retry_time = email.utils.parsedate_to_datetime(str(value))
+        except (TypeError, ValueError):
+            return None
+        return max(retry_time.timestamp() - time.time(), 0.0)
+
+    @staticmethod
+    def compute_delay(retry_number, retry_after=None):
+        """
+        Returns the wait before a retry.
+
+        Args:
+        - retry_number (int): 0 for the first retry, 1 for the second, ...
+        - retry_after (float, optional): Delay requested by the server.
+
+        Returns:
+        - float: Seconds to wait.
+        """
+        settings = RetryPolicy._settings
+        backoff = min(settings['max_delay'], settings['base_delay'] * (2 ** retry_number))
+        delay = random.uniform(0, backoff)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    @staticmethod
+    def call(provider, send, cancel_event=None, deadline=None):
+        """
+        Calls `send` until it returns a non-retryable response or retrying is given up.
+
+        Args:
+        - provider (str): Provider name used for the counters.
+        - send (callable): Sends the request and returns the response dict.
+        - cancel_event (threading.Event, optional): Stops retrying as soon as it is set.
+        - deadline (Deadline, optional): No retry is started if its wait would end after the deadline.
+
+        Returns:
+        - dict: The first successful or non-retryable response, or the last error response.
+
+        Raises:
+        - requests.exceptions.RequestException: The last connection error, if retrying is given up on one.
+        """
+        settings = dict(RetryPolicy._settings)
+        start_time = time.monotonic()
+        RetryPolicy._count(provider, 'requests')
+        retry_number = 0
+        while True:
+            RetryPolicy._count(provider, 'attempts')
+            error = None
+            try:
+                response = send()
+            except RetryPolicy.RETRYABLE_EXCEPTIONS as e:
+                error = e
+                response = {'error': {'message': str(e), 'type': 'connection_error'}}
+            if not RetryPolicy.is_retryable(response):
+                return response
+
+            delay = RetryPolicy.compute_delay(retry_number, RetryPolicy.get_retry_after(response))
+            elapsed = time.monotonic() - start_time
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            out_of_time = elapsed + delay > settings['max_total_time'] or (
+                deadline is not None and deadline.remaining() is not None and delay >= deadline.remaining())
+            if retry_number >= settings['max_retries'] or out_of_time or cancelled:
+                RetryPolicy._count(provider, 'gave_up')
+                if error is not None:
+                    raise error
+                return response
+
+            RetryPolicy._count(provider, 'retries')
+            if RetryPolicy._wait(delay, cancel_event):
+                RetryPolicy._count(provider, 'gave_up')
+                if error is not None:
+                    raise error
+                return response
+            retry_number += 1
+
+    @staticmethod
+    def get_stats(provider=None):
+        """
+        Returns the per-provider retry counters of this process.
+
+        Args:
+        - provider (str, optional): Only report this provider.
+
+        Returns:
+        - dict: Maps provider names to 'requests', 'attempts', 'retries' and 'gave_up' counts.
+        """
+        with RetryPolicy._lock:
+            if provider is not None:
+                return {provider: dict(RetryPolicy._stats.get(provider, RetryPolicy._empty_stats()))}
+            return {name: dict(stats) for name, stats in RetryPolicy._stats.items()}
+
+    @staticmethod
+    def reset_stats():
+        """
+        Resets the retry counters of this process.
+        """
+        with RetryPolicy._lock:
+            RetryPolicy._stats.clear()
+
+    @staticmethod
+    def _empty_stats():
+        return {'requests': 0, 'attempts': 0, 'retries': 0, 'gave_up': 0}
+
+    @staticmethod
+    def _count(provider, name):
+        with RetryPolicy._lock:
+            stats = RetryPolicy._stats.setdefault(provider, RetryPolicy._empty_stats())
+            stats[name] += 1
+
+    @staticmethod
+    def _wait(delay, cancel_event=None):
+        """
+        Sleeps for `delay` seconds. Returns True if the wait was cut short by `cancel_event`.
+        """
+        if cancel_event is None:
+            time.sleep(delay)
+            return False
+        return cancel_event.wait(delay)
@@ -0,0 +1,148 @@
+import json
+
+class SSEStreamParser:
+    """
+    SSEStreamParser: This class parses server-sent-event (SSE) streams returned by OpenAI-compatible chat completion endpoints.
+
+    Both OpenAI and TogetherAI answer a request with `"stream": true` by sending lines such as:
+
+        data: {"choices": [{"delta": {"content": "Hel"}}]}
+
+        data: {"choices": [{"delta": {"content": "lo"}}]}
+
+        data: [DONE]
+
+    SSE is UTF-8 by specification, so pass the raw byte lines (`response.iter_lines()`) and let the
+    parser decode them; `decode_unicode=True` would use requests' ISO-8859-1 fallback for a
+    `text/event-stream` answer without a charset.
+
+    Static methods:
+    - iter_events(lines): Yields the data payload of every event until the `[DONE]` marker.
+    - extract_token(event): Returns the text carried by a single decoded event, if any.
+    - extract_finish_reason(event): Returns the finish_reason of a single decoded event, if any.
+    - iter_tokens(lines): Yields the text tokens of a stream and returns its finish_reason.
+
+    Example usage:
+        response = session.post(url, json=payload, headers=headers, stream=True)
+        for token in SSEStreamParser.iter_tokens(response.iter_lines()):
+            print(token, end='', flush=True)
+    """
+    DONE_MARKER = '[DONE]'
+
+    @staticmethod
+    def iter_events(lines):
+        """
+        Yields the data payload of every event until the `[DONE]` marker.
+
+        Multi-line `data:` fields are joined with a newline as the SSE specification requires.
+        Comment lines and other fields (`event:`, `id:`, `retry:`) are ignored.
+
+        Args:
+        - lines (iterable of str or bytes): The raw lines of the response body.
+
+        Yields:
+        - str: The data payload of one event.
+        """
+        data_lines = []
+        for line in lines:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            line = line.rstrip('\r')
+            if not line:
+                if data_lines:
+                    data = '\n'.join(data_lines)
+                    data_lines = []
+                    if data == SSEStreamParser.DONE_MARKER:
+                        return
+                    yield data
+                continue
+            if line.startswith(':'):
+                continue
+            field, _, value = line.partition(':')
+            if field == 'data':
+                data_lines.append(value[1:] if value.startswith(' ') else value)
+        if data_lines:
+            data = '\n'.join(data_lines)
+            if data != SSEStreamParser.DONE_MARKER:
+                yield data
+
+    @staticmethod
+    def extract_token(event):
+        """
+        Returns the text carried by a single decoded event.
+
+        Args:
+        - event (dict): A decoded stream chunk.
+
+        Returns:
+        - str or None: The chunk text, or None if the chunk only carries metadata (role, finish_reason, usage).
+
+        Raises:
+        - ValueError: If the chunk reports an error instead of a completion.
+        """
+        if 'error' in event:
+            raise ValueError(f"Stream error: {event['error']}")
+        choices = event.get('choices') or [{}]
+        choice = choices[0]
+        delta = choice.get('delta')
+        if delta is not None:
+            return delta.get('content')
+        return choice.get('text')
+
+    @staticmethod
+    def extract_finish_reason(event):
+        """
+        Returns the finish_reason of a single decoded event.
+
+        Args:
+        - event (dict): A decoded stream chunk.
+
+        Returns:
+        - str or None: Why the completion ended ('stop', 'length', ...), reported by its last chunk only.
+        """
+        choices = event.get('choices') or [{}]
+        return choices[0].get('finish_reason')
+
+    @staticmethod
+    def iter_tokens(lines):
+        """
+        Yields the text tokens of a stream. The generator returns the stream's finish_reason, so a
+        caller can read it with `finish_reason = yield from SSEStreamParser.iter_tokens(lines)`.
+
+        Args:
+        - lines (iterable of str or bytes): The raw lines of the response body.
+
+        Yields:
+        - str: Non-empty text tokens in arrival order.
+
+        Returns:
+        - str or None: The finish_reason of the last chunk that carried one.
+
+        Raises:
+        - ValueError: If an event is not valid JSON or reports an error.
+        """
+        finish_reason = None
+        for data in SSEStreamParser.iter_events(lines):
+            try:
+                event = json.loads(data)
+            except json.JSONDecodeError:
+                raise ValueError(f"Invalid JSON in stream event: {data}")
+            token = SSEStreamParser.extract_token(event)
+            if token:
+                yield token
+            finish_reason = SSEStreamParser.extract_finish_reason(event) or finish_reason
+        return finish_reason
+
+# Usage example:
+if __name__ == "__main__":
+    lines = [
+        'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+        '',
+        'data: {"choices": [{"delta": {"content": "Hello"}}]}',
+        '',
+        'data: {"choices": [{"delta": {"content": " world"}}]}',
+        '',
+        'data: [DONE]',
+        '',
+    ]
+    print(''.join(SSEStreamParser.iter_tokens(lines)))
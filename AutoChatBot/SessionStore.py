@@ -0,0 +1,275 @@
+import os
+import re
+import json
+import time
+import atexit
+import struct
+import threading
+from .TokenEstimator import TokenEstimator
+
+class SessionStore:
+    """
+    SessionStore: This class keeps multi-turn conversations as append-only JSONL logs, so a session can be resumed by a later run.
+
+    Each session has two files in the sessions directory:
+    - `<session_id>.jsonl`: one line per turn, `{"time": ..., "request": [messages], "response": message}`,
+      where `request` holds the messages the turn added (the question, plus a context's system message
+      on the first turn) and `response` the assistant message.
+    - `<session_id>.idx`: the byte offset of every line as a little-endian uint64, so the number of
+      turns and any single turn are read in O(1) without parsing the log.
+
+    Appends are flushed immediately, so other processes see them, but `fsync` runs only every
+    `fsync_every` turns, after `fsync_interval` seconds, and when the process exits. A log or index
+    left half-written by a crash is cut back to its last complete turn before the next append.
+    A session should have one writer at a time.
+
+    Static methods:
+    - configure(sessions_dir, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL): Sets the sessions directory.
+    - append_turn(session_id, request, response): Appends a turn and returns its number.
+    - count_turns(session_id): Returns the number of turns of a session.
+    - read_turn(session_id, turn): Returns one turn.
+    - load_conversation(session_id, max_tokens=None): Returns the messages of a session, or its newest turns that fit.
+    - sync(): Fsyncs the pending appends.
+    - close(): Fsyncs and closes all open logs.
+
+    Example usage:
+        SessionStore.configure('.autochatbot_sessions')
+        history = SessionStore.load_conversation('refactor-parser')
+        conversation = history + [{"role": "user", "content": "Now add type hints."}]
+        response = ChatAPIHandler.make_api_request(..., conversation=conversation)
+        SessionStore.append_turn('refactor-parser', conversation[len(history):], response['choices'][0]['message'])
+
+    Command line:
+        AutoChatBot --session refactor-parser --question "Now add type hints."
+    """
+    DEFAULT_DIR = '.autochatbot_sessions'
+    FSYNC_EVERY = 8
+    FSYNC_INTERVAL = 1.0
+    OFFSET = struct.Struct('<Q')
+    SESSION_ID_PATTERN = re.compile(r'[A-Za-z0-9_-][A-Za-z0-9._-]*')
+
+    _sessions_dir = DEFAULT_DIR
+    _fsync_every = FSYNC_EVERY
+    _fsync_interval = FSYNC_INTERVAL
+    _lock = threading.Lock()
+    _writers = {}
+    _exit_hook_registered = False
+
+    @staticmethod
+    def configure(sessions_dir=DEFAULT_DIR, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL):
+        """
+        Sets the directory sessions are kept in and how often appends are fsynced. Logs opened
+        before are synced and closed.
+
+        Args:
+        - sessions_dir (str, optional): Directory of the session logs. Created on the first append.
+        - fsync_every (int, optional): Fsync after this many appended turns. Defaults to 8.
+        - fsync_interval (float, optional): Fsync once this many seconds passed since the last one. Defaults to 1.
+
+        Raises:
+        - ValueError: If fsync_every is smaller than 1.
+        """
+        if fsync_every < 1:
+            raise ValueError("fsync_every must be at least 1.")
+        SessionStore.close()
+        SessionStore._sessions_dir = sessions_dir
+        SessionStore._fsync_every = fsync_every
+        SessionStore._fsync_interval = fsync_interval
+
+    @staticmethod
+    def append_turn(session_id, request, response):
+        """
+        Appends a turn to a session, creating the session if needed.
+
+        Args:
+        - session_id (str): The session name.
+        - request (list): The messages the turn added to the conversation.
+        - response (dict): The assistant message.
+
+        Returns:
+        - int: The number of the turn, counting from 0.
+
+        Raises:
+        - ValueError: If the session id is not a plain file name.
+        """
+        line = json.dumps({'time': time.time(), 'request': request, 'response': response}, ensure_ascii=False) + '\n'
+        with SessionStore._lock:
+            writer = SessionStore._open_writer(session_id)
+            offset = writer['log'].seek(0, os.SEEK_END)
+            writer['log'].write(line.encode('utf-8'))
+            writer['log'].flush()
+            turn = writer['index'].seek(0, os.SEEK_END) // SessionStore.OFFSET.size
+            writer['index'].write(SessionStore.OFFSET.pack(offset))
+            writer['index'].flush()
+            writer['pending'] += 1
+            if (writer['pending'] >= SessionStore._fsync_every
+                    or time.monotonic() - writer['synced_at'] >= SessionStore._fsync_interval):
+                SessionStore._sync_writer(writer)
+        return turn
+
+    @staticmethod
+    def count_turns(session_id):
+        """
+        Args:
+        - session_id (str): The session name.
+
+        Returns:
+        - int: The number of turns of the session, 0 if it does not exist.
+        """
+        try:
+            return os.path.getsize(SessionStore._get_path(session_id, '.idx')) // SessionStore.OFFSET.size
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def read_turn(session_id, turn):
+        """
+        Reads one turn through the offset index.
+
+        Args:
+        - session_id (str): The session name.
+        - turn (int): The turn number, counting from 0. Negative numbers count from the end.
+
+        Returns:
+        - dict: 'time', 'request' (list of messages) and 'response' (the assistant message).
+
+        Raises:
+        - IndexError: If the session has no such turn.
+        """
+        count = SessionStore.count_turns(session_id)
+        if turn < 0:
+            turn += count
+        if not 0 <= turn < count:
+            raise IndexError(f"Session '{session_id}' has no turn {turn}.")
+        with open(SessionStore._get_path(session_id, '.idx'), 'rb') as index:
+            index.seek(turn * SessionStore.OFFSET.size)
+            offset, = SessionStore.OFFSET.unpack(index.read(SessionStore.OFFSET.size))
+        with open(SessionStore._get_path(session_id, '.jsonl'), 'rb') as log:
+            log.seek(offset)
+            return json.loads(log.readline())
+
+    @staticmethod
+    def load_conversation(session_id, max_tokens=None):
+        """
+        Returns the messages of a session, oldest first: each turn's request followed by its response.
+
+        With max_tokens, the system messages the session started with are kept, and as many of the
+        newest whole turns as fit next to them into that many estimated tokens (see TokenEstimator).
+        Only those turns are read from the log.
+
+        Args:
+        - session_id (str): The session name.
+        - max_tokens (int, optional): Token budget of the returned messages. Defaults to no budget.
+
+        Returns:
+        - list: The messages, empty if the session does not exist.
+        """
+        count = SessionStore.count_turns(session_id)
+        if count == 0:
+            return []
+        if max_tokens is None:
+            messages = []
+            with open(SessionStore._get_path(session_id, '.jsonl'), 'rb') as log:
+                for _ in range(count):
+                    messages.extend(SessionStore._get_messages(json.loads(log.readline())))
+            return messages
+        first = SessionStore._get_messages(SessionStore.read_turn(session_id, 0))
+        system_count = 0
+        while system_count < len(first) and first[system_count].get('role') == 'system':
+            system_count += 1
+        leading = first[:system_count]
+        budget = max_tokens - TokenEstimator.estimate_conversation(leading)
+        turns = []
+        for turn in range(count - 1, -1, -1):
+            messages = first[system_count:] if turn == 0 else SessionStore._get_messages(SessionStore.read_turn(session_id, turn))
+            cost = sum(TokenEstimator.estimate_message(message) for message in messages)
+            if cost > budget:
+                break
+            budget -= cost
+            turns.append(messages)
+        return leading + [message for messages in reversed(turns) for message in messages]
+
+    @staticmethod
+    def sync():
+        """
+        Fsyncs the appends that are not on disk yet.
+        """
+        with SessionStore._lock:
+            for writer in SessionStore._writers.values():
+                SessionStore._sync_writer(writer)
+
+    @staticmethod
+    def close():
+        """
+        Fsyncs and closes every open session log. Runs when the process exits.
+        """
+        with SessionStore._lock:
+            for writer in SessionStore._writers.values():
+                SessionStore._sync_writer(writer)
+                writer['log'].close()
+                writer['index'].close()
+            SessionStore._writers.clear()
+
+    @staticmethod
+    def _get_messages(record):
+        return list(record['request']) + [record['response']]
+
+    @staticmethod
+    def _get_path(session_id, extension):
+        if not SessionStore.SESSION_ID_PATTERN.fullmatch(session_id or ''):
+            raise ValueError(f"Invalid session id '{session_id}'. Use letters, digits, '.', '_' and '-'.")
+        return os.path.join(SessionStore._sessions_dir, session_id + extension)
+
+    @staticmethod
+    def _open_writer(session_id):
+        """
+        Returns the open log and index of a session, opening them (and cutting back a half-written
+        last turn) the first time. Called with the lock held.
+        """
+        writer = SessionStore._writers.get(session_id)
+        if writer is not None:
+            return writer
+        log_path = SessionStore._get_path(session_id, '.jsonl')
+        index_path = SessionStore._get_path(session_id, '.idx')
+        os.makedirs(SessionStore._sessions_dir, exist_ok=True)
+        for path in (log_path, index_path):
+            if not os.path.exists(path):
+                open(path, 'ab').close()
+        log = open(log_path, 'r+b')
+        index = open(index_path, 'r+b')
+        SessionStore._repair(log, index)
+        writer = {'log': log, 'index': index, 'pending': 0, 'synced_at': time.monotonic()}
+        SessionStore._writers[session_id] = writer
+        if not SessionStore._exit_hook_registered:
+            atexit.register(SessionStore.close)
+            SessionStore._exit_hook_registered = True
+        return writer
+
+    @staticmethod
+    def _repair(log, index):
+        """
+        Cuts the log and index back to the last turn that was completely written to both.
+        """
+        log_size = log.seek(0, os.SEEK_END)
+        count = index.seek(0, os.SEEK_END) // SessionStore.OFFSET.size
+        end = 0
+        while count > 0:
+            index.seek((count - 1) * SessionStore.OFFSET.size)
+            offset, = SessionStore.OFFSET.unpack(index.read(SessionStore.OFFSET.size))
+            if offset < log_size:
+                log.seek(offset)
+                line = log.readline()
+                if line.endswith(b'\n'):
+                    end = offset + len(line)
+                    break
+            count -= 1
+        index.truncate(count * SessionStore.OFFSET.size)
+        log.truncate(end)
+
+    @staticmethod
+    def _sync_writer(writer):
+        if writer['pending']:
+            os.fsync(writer['log'].fileno())
+            os.fsync(writer['index'].fileno())
+            writer['pending'] = 0
+        writer['synced_at'] = time.monotonic()
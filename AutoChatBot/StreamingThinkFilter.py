@@ -0,0 +1,107 @@
+class StreamingThinkFilter:
+    """
+    StreamingThinkFilter: This class removes ❬think❭ and <think> spans from text that arrives in chunks, such as a streamed completion, and optionally routes their content to a separate sink.
+
+    Tags may be split across chunks anywhere. As with `TextProcessor.filter_think`, a span opened with
+    either tag is closed by either closing tag. Only a possible partial tag is held back between chunks
+    (at most 8 characters), so memory stays O(chunk) however long the text and its think spans are.
+
+    Unlike `TextProcessor.filter_think`, which keeps an unclosed span in the message, a span the stream
+    ends inside of counts as think content: its text was routed away before its end was known.
+    The sink receives the raw think content, with a newline between consecutive spans.
+
+    Methods:
+    - feed(chunk): Adds text and returns the message text it completed.
+    - finish(): Ends the stream and returns the message text held back.
+
+    Example usage:
+        think_filter = StreamingThinkFilter(think_sink=think_file.write)
+        for token in stream:
+            print(think_filter.feed(token), end='', flush=True)
+        print(think_filter.finish())
+    """
+    OPENING_TAGS = ('❬think❭', '<think>')
+    CLOSING_TAGS = ('❬/think❭', '</think>')
+
+    def __init__(self, think_sink=None):
+        """
+        Args:
+        - think_sink (callable, optional): Called with each piece of think content. Defaults to dropping it.
+        """
+        self.think_sink = think_sink
+        self.in_think = False
+        self.think_spans = 0
+        self._pending = ''
+
+    def feed(self, chunk):
+        """
+        Adds the next piece of text.
+
+        Args:
+        - chunk (str): The text.
+
+        Returns:
+        - str: The message text outside think spans that can be released, possibly empty.
+        """
+        text = self._pending + chunk
+        self._pending = ''
+        message = []
+        position = 0
+        while True:
+            tags = self.CLOSING_TAGS if self.in_think else self.OPENING_TAGS
+            found, tag = self._find_tag(text, position, tags)
+            if found < 0:
+                end = len(text) - self._get_partial_tag_length(text, position, tags)
+                self._route(text[position:end], message)
+                self._pending = text[end:]
+                return ''.join(message)
+            self._route(text[position:found], message)
+            position = found + len(tag)
+            if not self.in_think:
+                if self.think_spans and self.think_sink is not None:
+                    self.think_sink('\n')
+                self.think_spans += 1
+            self.in_think = not self.in_think
+
+    def finish(self):
+        """
+        Ends the stream. Text held back as a possible partial tag is released as what it turned out to be.
+
+        Returns:
+        - str: The remaining message text, possibly empty.
+        """
+        message = []
+        self._route(self._pending, message)
+        self._pending = ''
+        return ''.join(message)
+
+    def _route(self, text, message):
+        if not text:
+            return
+        if not self.in_think:
+            message.append(text)
+        elif self.think_sink is not None:
+            self.think_sink(text)
+
+    @staticmethod
+    def _find_tag(text, position, tags):
+        """
+        Returns the offset and the tag of the first of the tags in text from position, or (-1, None).
+        """
+        found, found_tag = -1, None
+        for tag in tags:
+            offset = text.find(tag, position)
+            if offset >= 0 and (found < 0 or offset < found):
+                found, found_tag = offset, tag
+        return found, found_tag
+
+    @staticmethod
+    def _get_partial_tag_length(text, position, tags):
+        """
+        Returns the length of the longest end of text (after position) that is the start of one of the tags.
+        """
+        for length in range(min(max(len(tag) for tag in tags) - 1, len(text) - position), 0, -1):
+            suffix = text[len(text) - length:]
+            if any(tag.startswith(suffix) for tag in tags):
+                return length
+        return 0
@@ -0,0 +1,163 @@
+import sys
+import hashlib
+
+class StringTable:
+    """
+    StringTable: This class deduplicates message contents by their SHA-256 hash, so a system prompt or example exchange shared by many contexts is stored once.
+
+    `strip_context` takes a context (as found in the context JSON files), adds the content of each of its
+    messages to the table and returns a copy whose message contents are set to None, together with one
+    reference per message: the index of its content in `strings`, or None if the content was not a string
+    and was kept in place. `restore_context` puts the contents back. `ContextIndex` and `ContextStore`
+    write `strings` once and the stripped contexts with their references.
+
+    `intern_strings` is the in-memory counterpart: it replaces the strings of loaded JSON data with
+    interned ones (`sys.intern`), so identical contents in different contexts and files share one object.
+
+    Methods:
+    - add(text): Returns the index of a string, adding it if it is new.
+    - strip_context(context): Returns the context without its message contents, and the references to them.
+    - get_report(): Returns how much the table deduplicated.
+
+    Static methods:
+    - restore_context(context, references, get_string): Puts the message contents back into a stripped context.
+    - intern_strings(data): Interns every string of loaded JSON data.
+    - make_report(messages, strings, message_bytes, stored_bytes): Builds a report from counts.
+    - format_report(report): Formats a report for printing.
+
+    Example usage:
+        table = StringTable()
+        stripped, references = table.strip_context(context)
+        context = StringTable.restore_context(stripped, references, table.strings.__getitem__)
+        print(StringTable.format_report(table.get_report()))
+    """
+
+    def __init__(self):
+        self.strings = []
+        self._indexes = {}
+        self._references = 0
+        self._referenced_bytes = 0
+        self._stored_bytes = 0
+
+    def add(self, text):
+        """
+        Returns the index of a string in `strings`, adding it if no string with the same hash was added yet.
+
+        Args:
+        - text (str): The string.
+
+        Returns:
+        - int: Its index.
+        """
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).digest()
+        index = self._indexes.get(digest)
+        if index is None:
+            index = self._indexes[digest] = len(self.strings)
+            self.strings.append(text)
+            self._stored_bytes += len(data)
+        self._references += 1
+        self._referenced_bytes += len(data)
+        return index
+
+    def strip_context(self, context):
+        """
+        Moves the message contents of a context into the table. The context itself is not modified.
+
+        Args:
+        - context (dict): A context, with its messages in 'context'.
+
+        Returns:
+        - tuple: (the context with None instead of each string content, list with one reference per
+          message: the index of its content or None). The list is empty if the context has no messages.
+        """
+        messages = context.get('context') if isinstance(context, dict) else None
+        if not isinstance(messages, list):
+            return context, []
+        stripped_messages, references = [], []
+        for message in messages:
+            if isinstance(message, dict) and isinstance(message.get('content'), str):
+                references.append(self.add(message['content']))
+                message = dict(message, content=None)
+            else:
+                references.append(None)
+            stripped_messages.append(message)
+        return dict(context, context=stripped_messages), references
+
+    @staticmethod
+    def restore_context(context, references, get_string):
+        """
+        Puts the message contents back into a context returned by `strip_context`, in place.
+
+        Args:
+        - context (dict): The stripped context.
+        - references (list): Its references.
+        - get_string (callable): Returns the string at an index.
+
+        Returns:
+        - dict: The context.
+        """
+        if references:
+            for message, reference in zip(context['context'], references):
+                if reference is not None:
+                    message['content'] = get_string(reference)
+        return context
+
+    def get_report(self):
+        """
+        Returns:
+        - dict: 'messages' (contents added), 'strings' (distinct contents), 'message_bytes' and
+          'stored_bytes' (UTF-8 size of all and of the distinct contents) and 'ratio'
+          (message_bytes / stored_bytes, 1.0 if nothing was added).
+        """
+        return StringTable.make_report(self._references, len(self.strings), self._referenced_bytes, self._stored_bytes)
+
+    @staticmethod
+    def make_report(messages, strings, message_bytes, stored_bytes):
+        """
+        Builds a report in the shape of `get_report` from counts read back from a compiled file.
+
+        Args:
+        - messages (int), strings (int), message_bytes (int), stored_bytes (int): See `get_report`.
+
+        Returns:
+        - dict: The report.
+        """
+        return {
+            'messages': messages,
+            'strings': strings,
+            'message_bytes': message_bytes,
+            'stored_bytes': stored_bytes,
+            'ratio': message_bytes / stored_bytes if stored_bytes else 1.0,
+        }
+
+    @staticmethod
+    def format_report(report):
+        """
+        Args:
+        - report (dict): A report as returned by `get_report`.
+
+        Returns:
+        - str: One line describing the deduplication.
+        """
+        return (f"Deduplicated {report['messages']} message contents into {report['strings']} strings: "
+                f"{report['message_bytes']} -> {report['stored_bytes']} bytes ({report['ratio']:.2f}x)")
+
+    @staticmethod
+    def intern_strings(data):
+        """
+        Replaces every string in loaded JSON data, keys included, with its interned copy.
+
+        Args:
+        - data: Data as returned by `json.load`.
+
+        Returns:
+        - The data, with dicts and lists rebuilt around the interned strings.
+        """
+        if isinstance(data, str):
+            return sys.intern(data)
+        if isinstance(data, dict):
+            return {sys.intern(key): StringTable.intern_strings(value) for key, value in data.items()}
+        if isinstance(data, list):
+            return [StringTable.intern_strings(item) for item in data]
+        return data
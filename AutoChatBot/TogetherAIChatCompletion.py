@@ -1,20 +1,33 @@
-import os
 import json
 import requests
-from dotenv import load_dotenv
+from .EnvLoader import EnvLoader
+from .HTTPSessionPool import HTTPSessionPool
+from .SSEStreamParser import SSEStreamParser
 
 class TogetherAIChatCompletion:
     """
     TogetherAIChatCompletion: This class handles TogetherAI API chat completion requests.
+
+    Static methods:
+    - load_api_key(): Loads the API key from the environment or .env file.
+    - build_request(conversation, ...): Builds the payload and headers of a request.
+    - make_api_request(conversation, ...): Sends a request and returns the response JSON or an error dict.
+    - stream_api_request(conversation, ...): Sends a streaming request and yields text tokens as they arrive.
     """
+    API_URL = 'https://api.together.xyz/v1/chat/completions'
 
     @staticmethod
     def load_api_key():
-        load_dotenv()
-        return os.getenv("TOGETHERAI_API_KEY")
+        return EnvLoader.getenv("TOGETHERAI_API_KEY")
 
     @staticmethod
-    def make_api_request(conversation, api_key=None, model="cognitivecomputations/dolphin-2.5-mixtral-8x7b", max_tokens=4000, temperature=1.0, top_p=0.7, top_k=50, repetition_penalty=1):
+    def build_request(conversation, api_key=None, model="cognitivecomputations/dolphin-2.5-mixtral-8x7b", max_tokens=4000, temperature=1.0, top_p=0.7, top_k=50, repetition_penalty=1, stream=False):
+        """
+        Builds the JSON payload and headers of a chat completion request.
+
+        Returns:
+        - tuple: (payload, headers) ready to be posted to the chat completions endpoint.
+        """
         api_key = api_key if api_key else TogetherAIChatCompletion.load_api_key()
         
         payload = {
@@ -25,18 +38,38 @@ class TogetherAIChatCompletion:
             "top_p": top_p,
             "top_k": top_k,
             "repetition_penalty": repetition_penalty,
-            "stream": False
+            "stream": stream
         }
 
         headers = {
-            "accept": "application/json",
+            "accept": "text/event-stream" if stream else "application/json",
             "content-type": "application/json",
             "Authorization": f"Bearer {api_key}",
         }
+        return payload, headers
+
+    @staticmethod
+    def make_api_request(conversation, api_key=None, model="cognitivecomputations/dolphin-2.5-mixtral-8x7b", max_tokens=4000, temperature=1.0, top_p=0.7, top_k=50, repetition_penalty=1, timeout=None):
+        payload, headers = TogetherAIChatCompletion.build_request(
+            conversation, api_key, model, max_tokens, temperature, top_p, top_k, repetition_penalty
+        )
 
         try:
-            response = requests.post('https://api.together.xyz/v1/chat/completions', json=payload, headers=headers)
+            session = HTTPSessionPool.get_session('togetherai')
+            timeout = timeout or HTTPSessionPool.get_timeout()
+            response = session.post(TogetherAIChatCompletion.API_URL, json=payload, headers=headers, timeout=timeout)
             response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            return {"error": {
+                "message": str(e),
+                "type": "request_error",
+                "status_code": e.response.status_code,
+                "retry_after": e.response.headers.get("Retry-After"),
+            }}
+        except requests.exceptions.Timeout as e:
+            return {"error": {"message": str(e), "type": "timeout_error"}}
+        except requests.exceptions.ConnectionError as e:
+            return {"error": {"message": str(e), "type": "connection_error"}}
         except requests.exceptions.RequestException as e:
             return {"error": {"message": str(e), "type": "request_error"}}
         
@@ -45,4 +78,29 @@ class TogetherAIChatCompletion:
         except json.JSONDecodeError:
             return {"error": {"message": "Invalid JSON response", "type": "json_error"}}
         
-        return response_json
\ No newline at end of file
+        return response_json
+
+    @staticmethod
+    def stream_api_request(conversation, api_key=None, model="cognitivecomputations/dolphin-2.5-mixtral-8x7b", max_tokens=4000, temperature=1.0, top_p=0.7, top_k=50, repetition_penalty=1, timeout=None):
+        """
+        Sends a streaming chat completion request and yields the text tokens as they arrive.
+        The read timeout applies to the wait for each chunk, not to the whole stream.
+
+        Yields:
+        - str: The next piece of the completion text.
+
+        Returns:
+        - str or None: The finish_reason of the stream (see `SSEStreamParser.iter_tokens`).
+
+        Raises:
+        - requests.exceptions.RequestException: If the request fails or the API answers with an error status.
+        - ValueError: If a stream event is malformed or reports an error.
+        """
+        payload, headers = TogetherAIChatCompletion.build_request(
+            conversation, api_key, model, max_tokens, temperature, top_p, top_k, repetition_penalty, stream=True
+        )
+        session = HTTPSessionPool.get_session('togetherai')
+        timeout = timeout or HTTPSessionPool.get_timeout()
+        with session.post(TogetherAIChatCompletion.API_URL, json=payload, headers=headers, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            return (yield from SSEStreamParser.iter_tokens(response.iter_lines()))
@@ -1,6 +1,5 @@
-import os
-import requests
-from dotenv import load_dotenv
+from .EnvLoader import EnvLoader
+from .HTTPSessionPool import HTTPSessionPool
 
 class TogetherAIModelRetriever:
     """
@@ -9,8 +8,7 @@ class TogetherAIModelRetriever:
 
     @staticmethod
     def get_api_key():
-        load_dotenv()
-        return os.getenv("TOGETHERAI_API_KEY")
+        return EnvLoader.getenv("TOGETHERAI_API_KEY")
 
     @staticmethod
     def get_available_models(api_key=None):
@@ -21,7 +19,7 @@ class TogetherAIModelRetriever:
             "Authorization": f"Bearer {api_key}",
         }
 
-        response = requests.get(endpoint_url, headers=headers)
+        response = HTTPSessionPool.get_session('togetherai').get(endpoint_url, headers=headers, timeout=HTTPSessionPool.get_timeout())
         
         if response.status_code == 200:
             models = response.json()
@@ -0,0 +1,109 @@
+class TokenEstimator:
+    """
+    TokenEstimator: This class estimates how many tokens a text or a conversation will use, without a tokenizer.
+
+    Provider tokenizers average roughly four characters of English text or code per token, so the
+    estimate is `ceil(len(text) / CHARS_PER_TOKEN)` plus a small per-message overhead for the role
+    and the chat template. The estimate is meant for budgeting (rate limits, context windows), not
+    for billing.
+
+    Static methods:
+    - estimate_text(text): Estimates the tokens of a text.
+    - estimate_message(message): Estimates the tokens of one chat message.
+    - estimate_conversation(conversation): Estimates the prompt tokens of a conversation.
+    - estimate_request(conversation, max_tokens): Estimates prompt plus completion tokens of a request.
+    - select_newest(messages, budget): Returns the newest messages that fit into a token budget.
+
+    Example usage:
+        conversation = [{"role": "user", "content": "What is a closure?"}]
+        print(TokenEstimator.estimate_request(conversation, max_tokens=500))
+        # 512
+    """
+    CHARS_PER_TOKEN = 4
+    TOKENS_PER_MESSAGE = 4
+    TOKENS_PER_CONVERSATION = 3
+
+    @staticmethod
+    def estimate_text(text):
+        """
+        Estimates the tokens of a text.
+
+        Args:
+        - text (str): The text.
+
+        Returns:
+        - int: The estimated token count, 0 for an empty text.
+        """
+        if not text:
+            return 0
+        return -(-len(text) // TokenEstimator.CHARS_PER_TOKEN)
+
+    @staticmethod
+    def estimate_message(message):
+        """
+        Estimates the tokens of one chat message, including its role and template overhead.
+
+        Args:
+        - message (dict): A message with 'role' and 'content' keys.
+
+        Returns:
+        - int: The estimated token count.
+        """
+        content = message.get('content') or ''
+        if not isinstance(content, str):
+            content = str(content)
+        return TokenEstimator.TOKENS_PER_MESSAGE + TokenEstimator.estimate_text(content)
+
+    @staticmethod
+    def estimate_conversation(conversation):
+        """
+        Estimates the prompt tokens of a conversation.
+
+        Args:
+        - conversation (list): List of message dicts.
+
+        Returns:
+        - int: The estimated token count.
+        """
+        return TokenEstimator.TOKENS_PER_CONVERSATION + sum(
+            TokenEstimator.estimate_message(message) for message in conversation
+        )
+
+    @staticmethod
+    def estimate_request(conversation, max_tokens=0):
+        """
+        Estimates the tokens a request can use: its prompt plus the largest completion it allows.
+
+        Args:
+        - conversation (list): List of message dicts.
+        - max_tokens (int, optional): The request's completion limit.
+
+        Returns:
+        - int: The estimated token count.
+        """
+        return TokenEstimator.estimate_conversation(conversation) + (max_tokens or 0)
+
+    @staticmethod
+    def select_newest(messages, budget):
+        """
+        Selects the longest run of newest messages whose estimated tokens fit into a budget. The run
+        never starts with an assistant message, so it does not begin with an answer to a dropped question.
+
+        Args:
+        - messages (list): List of message dicts, oldest first.
+        - budget (int): Token budget for the selected messages.
+
+        Returns:
+        - list: The selected messages, oldest first.
+        """
+        start = len(messages)
+        used = 0
+        while start > 0:
+            cost = TokenEstimator.estimate_message(messages[start - 1])
+            if used + cost > budget:
+                break
+            used += cost
+            start -= 1
+        while start < len(messages) and start > 0 and messages[start].get('role') == 'assistant':
+            start += 1
+        return messages[start:]
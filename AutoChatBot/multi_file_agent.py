@@ -1,10 +1,12 @@
 import os
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional
 from AutoChatBot.ChatAPIHandler import ChatAPIHandler
 from AutoChatBot.ConversationPreparer import ConversationPreparer
 from AutoChatBot.RemoveLanguageDelimiters import CodeExtractor
+from AutoChatBot.LanguageRegistry import LanguageRegistry
 from AutoChatBot.response_processor import TextProcessor
+from AutoChatBot.CodeBlockStopper import CodeBlockStopper
 
 class MultiFileAgent:
     """
@@ -17,9 +19,15 @@ class MultiFileAgent:
         Constructs the conversation history based on reference and rewrite files.
     - construct_task_string(question: str) -> str:
         Constructs the task string for the prompt.
-    - generate_file_content(conversation: List[Dict[str, str]], file_path: str, task: str, args) -> str:
+    - generate_file_content(conversation: List[Dict[str, str]], file_path: str, task: str, args, deadline = None) -> str:
         Generates content for a file using AutoChatBot.
-    - execute(reference_files: List[str], rewrite_files: List[str], question: str = None, question_file_path: str = None, args = None, debug: bool = False) -> Dict[str, str]:
+    - generate_files_content(conversation: List[Dict[str, str]], file_paths: List[str], task: str, args, deadline = None) -> Dict[str, str]:
+        Generates several files from one response, one code block per file.
+    - split_files(response: str, file_paths: List[str]) -> Dict[str, str]:
+        Routes the code blocks of a response to the files their info strings name.
+    - format_files(files: Dict[str, str]) -> str:
+        Formats files as code blocks tagged with their paths.
+    - execute(reference_files: List[str], rewrite_files: List[str], question: str = None, question_file_path: str = None, args = None, debug: bool = False, deadline = None) -> Dict[str, str]:
         Orchestrates the multi-file generation and update process.
     """
 
@@ -96,7 +104,7 @@ class MultiFileAgent:
         return f"TASK:\n\n{question}\n\n"
 
     @staticmethod
-    def generate_file_content(conversation: List[Dict[str, str]], file_path: str, task: str, args) -> str:
+    def generate_file_content(conversation: List[Dict[str, str]], file_path: str, task: str, args, deadline = None) -> Optional[str]:
         """
         Generates content for a file using AutoChatBot.
 
@@ -105,59 +113,173 @@ class MultiFileAgent:
         file_path (str): Path to the file to update.
         task (str): The task string.
         args (Namespace): Parsed CLI arguments for API call.
+        deadline (Deadline, optional): End of the run, bounding the API call. Default is `None`.
+
+        The request is sent with the newest turns of the conversation that fit into `args.context_tokens`
+        (or the model window minus `args.max_tokens`); the full conversation is kept for later files.
+        With `args.early_stop`, the completion is streamed and ends as soon as the file's code block is
+        complete (see `CodeBlockStopper`); what that saved is printed.
 
         Returns:
-        str: Generated content for the file.
+        Optional[str]: Generated content for the file, or `None` if the response has no code block for it
+        (see `LanguageRegistry.extract_content`).
 
         Raises:
         ValueError: If the response format is invalid or does not contain the expected keys.
+        TimeoutError: If the deadline passed before the request could be sent.
+        requests.exceptions.RequestException: If an early-stopped stream could not be opened.
         """
         task_modified = task + f"Now show me only the rewritten {file_path}:\n\n"
         conversation.append({"role": "user", "content": task_modified})
+        token_budget = ConversationPreparer.get_token_budget(args.api, args.max_tokens, getattr(args, 'context_tokens', None))
+
+        language = LanguageRegistry.get_language(file_path)
+        if getattr(args, 'early_stop', False) and language is not None:
+            stream = CodeBlockStopper.stream_api_request(
+                api=args.api,
+                model=args.model,
+                temperature=args.temperature,
+                max_tokens=args.max_tokens,
+                conversation=ConversationPreparer.fit_to_token_budget(conversation, token_budget),
+                language=language,
+                top_p=args.top_p,
+                frequency_penalty=args.frequency_penalty,
+                presence_penalty=args.presence_penalty,
+                stop_sequences=args.stop_sequences,
+                top_k=args.top_k,
+                repetition_penalty=args.repetition_penalty,
+                deadline=deadline
+            )
+            stream.consume()
+            response = stream.to_response()
+            print(f"{file_path}: {CodeBlockStopper.format_savings(response['early_stop'])}")
+        else:
+            response = ChatAPIHandler.make_api_request(
+                api=args.api,
+                model=args.model,
+                temperature=args.temperature,
+                max_tokens=args.max_tokens,
+                conversation=ConversationPreparer.fit_to_token_budget(conversation, token_budget),
+                top_p=args.top_p,
+                frequency_penalty=args.frequency_penalty,
+                presence_penalty=args.presence_penalty,
+                stop_sequences=args.stop_sequences,
+                top_k=args.top_k,
+                repetition_penalty=args.repetition_penalty,
+                deadline=deadline
+            )
+        if "error" in response:
+            raise ValueError(f"API request for {file_path} failed: {response['error'].get('message')}")
+        content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+        # Use the response processor to remove <think> content
+        content = TextProcessor.execute(content, remove_think=True)
+
+        content = LanguageRegistry.extract_content(file_path, content)
+
+        return content
+
+    @staticmethod
+    def generate_files_content(conversation: List[Dict[str, str]], file_paths: List[str], task: str, args, deadline = None) -> Dict[str, str]:
+        """
+        Generates several files from one response, in which the model writes one code block per file
+        and names the file after the language in the opening fence, as in ```python path/to/file.py.
+
+        Parameters:
+        conversation (List[Dict[str, str]]): The conversation history.
+        file_paths (List[str]): Paths of the files to update.
+        task (str): The task string.
+        args (Namespace): Parsed CLI arguments for API call.
+        deadline (Deadline, optional): End of the run, bounding the API call. Default is `None`.
+
+        Returns:
+        Dict[str, str]: Generated content of the files the response has a block for, in the order of `file_paths`.
+
+        Raises:
+        ValueError: If the API request failed.
+        TimeoutError: If the deadline passed before the request could be sent.
+        """
+        example = file_paths[0]
+        task_modified = task + (
+            f"Now show me only the rewritten {', '.join(file_paths)}. Put each file in its own code block and "
+            f"write its path after the language in the opening fence, like ```{LanguageRegistry.get_language(example) or ''} {example}\n\n"
+        )
+        conversation.append({"role": "user", "content": task_modified})
+        token_budget = ConversationPreparer.get_token_budget(args.api, args.max_tokens, getattr(args, 'context_tokens', None))
 
         response = ChatAPIHandler.make_api_request(
             api=args.api,
             model=args.model,
             temperature=args.temperature,
             max_tokens=args.max_tokens,
-            conversation=conversation,
+            conversation=ConversationPreparer.fit_to_token_budget(conversation, token_budget),
             top_p=args.top_p,
             frequency_penalty=args.frequency_penalty,
             presence_penalty=args.presence_penalty,
             stop_sequences=args.stop_sequences,
             top_k=args.top_k,
-            repetition_penalty=args.repetition_penalty
+            repetition_penalty=args.repetition_penalty,
+            deadline=deadline
         )
+        if "error" in response:
+            raise ValueError(f"API request for {', '.join(file_paths)} failed: {response['error'].get('message')}")
         content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
-
-        # Use the response processor to remove <think> content
         content = TextProcessor.execute(content, remove_think=True)
+        return MultiFileAgent.split_files(content, file_paths)
 
-        if file_path.endswith(".py"):
-            content = CodeExtractor.extract_code(content, language="python")
-        elif file_path.endswith(".cpp"):
-            content = CodeExtractor.extract_code(content, language="cpp")
-        elif file_path.endswith(".rs"):
-            content = CodeExtractor.extract_code(content, language="rust")
-        elif file_path.endswith(".h"):
-            content = CodeExtractor.extract_code(content, language="cpp")
-        elif file_path.endswith(".toml"):
-            content = CodeExtractor.extract_code(content, language="toml")
-        elif file_path.endswith(".js"):
-            content = CodeExtractor.extract_code(content, language="javascript")
-        elif file_path.endswith(".html"):
-            content = CodeExtractor.extract_code(content, language="html")
-        elif file_path.endswith(".css"):
-            content = CodeExtractor.extract_code(content, language="css")
-        elif file_path.endswith("MakeLists.txt"):
-            content = CodeExtractor.extract_code(content, language="cmake")
-        elif file_path.endswith(".design") or file_path.endswith(".md"):
-            content = CodeExtractor.extract_code(content, language="markdown")
+    @staticmethod
+    def split_files(response: str, file_paths: List[str]) -> Dict[str, str]:
+        """
+        Routes the closed code blocks of a response to files. A block belongs to a file if a word of its
+        info string (also in the form title="...") is the file's path, or its name if no other file has that name.
+        The first block of a file is used.
 
-        return content
+        Parameters:
+        response (str): The response text.
+        file_paths (List[str]): Paths of the files.
+
+        Returns:
+        Dict[str, str]: Post-processed content (see `LanguageRegistry`) of the files that have a block,
+        in the order of `file_paths`.
+        """
+        paths = {os.path.normpath(file_path): file_path for file_path in file_paths}
+        names = {}
+        for file_path in file_paths:
+            names.setdefault(os.path.basename(file_path), []).append(file_path)
+
+        found = {}
+        for block in CodeExtractor.extract_blocks(response):
+            if not block['closed']:
+                continue
+            for word in block['info'].split():
+                word = word.rpartition('=')[2].strip('"\'`:')
+                file_path = paths.get(os.path.normpath(word)) if word else None
+                if file_path is None and len(names.get(os.path.basename(word), [])) == 1:
+                    file_path = names[os.path.basename(word)][0]
+                if file_path is not None:
+                    if file_path not in found:
+                        found[file_path] = LanguageRegistry.post_process(file_path, block['code'].strip())
+                    break
+        return {file_path: found[file_path] for file_path in file_paths if file_path in found}
 
     @staticmethod
-    def execute(reference_files: List[str], rewrite_files: List[str], question: str = None, question_file_path: str = None, args = None, debug: bool = False) -> Dict[str, str]:
+    def format_files(files: Dict[str, str]) -> str:
+        """
+        Formats files the way `generate_files_content` asks the model to write them.
+
+        Parameters:
+        files (Dict[str, str]): Content by file path.
+
+        Returns:
+        str: One code block per file, tagged with its language and path.
+        """
+        return "".join(
+            f"```{LanguageRegistry.get_language(file_path) or ''} {file_path}\n{content}\n```\n\n"
+            for file_path, content in files.items()
+        )
+
+    @staticmethod
+    def execute(reference_files: List[str], rewrite_files: List[str], question: str = None, question_file_path: str = None, args = None, debug: bool = False, deadline = None) -> Dict[str, str]:
         """
         Orchestrates the multi-file generation and update process.
 
@@ -168,9 +290,14 @@ class MultiFileAgent:
         question_file_path (str, optional): The path to the file containing the question. Default is `None`.
         args (Namespace): Parsed CLI arguments for API call.
         debug (bool): Debug flag.
+        deadline (Deadline, optional): End of the run. Files not started before it are skipped. Default is `None`.
+
+        With `args.multi_block`, all rewrite files are first requested in one response (see
+        `generate_files_content`); only the files it has no code block for are requested one by one.
 
         Returns:
-        Dict[str, str]: Dictionary with file paths as keys and generated content as values.
+        Dict[str, str]: Dictionary with file paths as keys and generated content as values. Files whose
+        response had no code block for them are left out, so they are not overwritten.
         """
         # Step 1: Decide conversation from question or question_file_path
         question = ConversationPreparer.decide_conversation(file_path=question_file_path, question=question)
@@ -181,13 +308,30 @@ class MultiFileAgent:
         # Step 3: Construct task string
         task_string = MultiFileAgent.construct_task_string(question)
 
-        # Step 4: Generate and update content for each rewrite file
+        # Step 4: With args.multi_block, generate all rewrite files from one response
         result = {}
+        if getattr(args, 'multi_block', False) and len(rewrite_files) > 1 and not (deadline is not None and deadline.expired()):
+            result = MultiFileAgent.generate_files_content(conversation, rewrite_files, task_string, args, deadline)
+            conversation.append({"role": "assistant", "content": MultiFileAgent.format_files(result)})
+            if len(result) < len(rewrite_files):
+                print(f"The response had no code block for {len(rewrite_files) - len(result)} file(s), requesting them one by one.")
+
+        # Step 5: Generate and update content for each remaining rewrite file
         for file_path in rewrite_files:
-            content = MultiFileAgent.generate_file_content(conversation, file_path, task_string, args)
+            if file_path in result:
+                continue
+            if deadline is not None and deadline.expired():
+                print(f"Deadline reached, skipping {len(rewrite_files) - len(result)} remaining file(s).")
+                break
+            content = MultiFileAgent.generate_file_content(conversation, file_path, task_string, args, deadline)
+            if content is None:
+                print(f"The response had no code block for {file_path}, leaving it unchanged.")
+                conversation.pop()
+                continue
             result[file_path] = content
             conversation.append({"role": "assistant", "content": content + "\n\n"})
 
+        result = {file_path: result[file_path] for file_path in rewrite_files if file_path in result}
         if debug:
             print(json.dumps(result, indent=4))
 
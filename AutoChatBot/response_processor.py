@@ -1,4 +1,5 @@
 import re
+from .StreamingThinkFilter import StreamingThinkFilter
 
 class TextProcessor:
     """
@@ -7,10 +8,12 @@ class TextProcessor:
     Static Methods:
     - filter_think(input_string): Separates text into message/think components
     - execute(input_string, remove_think=True): Public processing interface
+    - filter_think_stream(chunks, think_sink=None, think_path=None): Removes think bubbles from streamed text
     
     Usage:
         processed = TextProcessor.execute("Hello ❬think❭hidden❬/think❭ world")
     """
+    THINK_PATTERN = re.compile(r'(?:❬think❭|<think>)(.*?)(?:❬/think❭|</think>)', re.DOTALL)
     
     @staticmethod
     def filter_think(input_string):
@@ -26,8 +29,7 @@ class TextProcessor:
         if not input_string:
             return ('', '')
         
-        # Updated regex pattern to handle both ❬think❭ and <think> tags
-        think_pattern = re.compile(r'(?:❬think❭|<think>)(.*?)(?:❬/think❭|</think>)', re.DOTALL)
+        think_pattern = TextProcessor.THINK_PATTERN
         think_blocks = think_pattern.findall(input_string)
         # Process each line within think blocks to strip whitespace
         think_content = '\n'.join(
@@ -54,6 +56,41 @@ class TextProcessor:
         message, think = TextProcessor.filter_think(input_string)
         return message
 
+    @staticmethod
+    def filter_think_stream(chunks, think_sink=None, think_path=None):
+        """
+        Removes think bubbles from text arriving in chunks, yielding the message text as it is released.
+        Tags split across chunks are handled, and only a possible partial tag is buffered
+        (see `StreamingThinkFilter`).
+        
+        Args:
+            chunks (iterable of str): The text, in pieces, e.g. a `ChatCompletionStream`
+            think_sink (callable, optional): Called with each piece of think content
+            think_path (str, optional): File the think content is written to as it arrives
+            
+        Yields:
+            str: The next non-empty piece of message content
+        """
+        think_file = open(think_path, 'w', encoding='utf-8') if think_path else None
+        try:
+            def route_think(text):
+                if think_sink is not None:
+                    think_sink(text)
+                if think_file is not None:
+                    think_file.write(text)
+
+            think_filter = StreamingThinkFilter(route_think if think_sink or think_file else None)
+            for chunk in chunks:
+                message = think_filter.feed(chunk)
+                if message:
+                    yield message
+            message = think_filter.finish()
+            if message:
+                yield message
+        finally:
+            if think_file is not None:
+                think_file.close()
+
 # Example usage
 if __name__ == "__main__":
     sample_input = '''Hello! ❬think❭Planning response...❬/think❭
@@ -3,6 +3,9 @@ import tempfile
 import os
 import json
 import argparse
+import subprocess
+import sys
+import requests
 from unittest.mock import patch, MagicMock
 from AutoChatBot.AutoChatBot import ChatBot
 from AutoChatBot.multi_file_agent import MultiFileAgent
@@ -68,7 +71,7 @@ class TestAutoChatBot(unittest.TestCase):
         
         result = ChatBot.execute_multifile_agent(self.reference_files, self.rewrite_files, self.question, None, args, self.debug)
         self.assertEqual(result, {"rewrite_file_1.txt": "Updated content 1", "rewrite_file_2.txt": "Updated content 2"})
-        mock_execute.assert_called_once_with(self.reference_files, self.rewrite_files, self.question, None, args, self.debug)
+        mock_execute.assert_called_once_with(self.reference_files, self.rewrite_files, self.question, None, args, self.debug, None)
 
     @patch.object(PythonFileExecutor, 'execute', return_value={"execute_file_1.py": ("Output 1", ""), "execute_file_2.py": ("Output 2", "")})
     def test_execute_files(self, mock_execute):
@@ -96,6 +99,7 @@ class TestAutoChatBot(unittest.TestCase):
             debug=self.debug,
             output_dir=self.output_dir,
             show_available_context=False,
+            search_context=None,
             show_models=False,
             file_path=None,
             api='openai',
@@ -109,18 +113,138 @@ class TestAutoChatBot(unittest.TestCase):
             repetition_penalty=1,
             stop_sequences=None,
             context=None,
+            context_tokens=None,
+            last_messages=None,
+            session=None,
+            session_dir=".autochatbot_sessions",
             save_path='response.tmp',
             run_code=False,
-            run_code_with_unittest=False
+            run_code_with_unittest=False,
+            batch_input=None,
+            cache_dir=None,
+            max_retries=4,
+            retry_max_time=120,
+            requests_per_minute=None,
+            tokens_per_minute=None,
+            connect_timeout=10,
+            read_timeout=120,
+            deadline=None
         )
 
         with patch('builtins.open', unittest.mock.mock_open()) as mock_file:
             ChatBot.main()
-            mock_execute_multifile_agent.assert_called_once_with(self.reference_files, self.rewrite_files, None, self.question_file, mock_parse_args.return_value, self.debug)
+            mock_execute_multifile_agent.assert_called_once_with(self.reference_files, self.rewrite_files, None, self.question_file, mock_parse_args.return_value, self.debug, unittest.mock.ANY)
             mock_execute_files.assert_called_once_with(self.execute_files)
             mock_file.assert_any_call('rewrite_file_1.txt', 'w')
             mock_file.assert_any_call('rewrite_file_2.txt', 'w')
 
+    @patch('AutoChatBot.ChatAPIHandler.ChatAPIHandler.make_api_request', return_value={
+        'error': {'message': 'Invalid API key'}
+    })
+    def test_main_exits_when_multi_file_agent_fails(self, mock_make_api_request):
+        rewrite_file = os.path.join(self.tempdir.name, 'module.py')
+        args = ParserCreator.create_parser().parse_args(
+            ['--api', 'openai', '--multi_file_agent', '--rewrite_files', rewrite_file, '--question', 'Refactor it.']
+        )
+        with patch('argparse.ArgumentParser.parse_args', return_value=args), patch('builtins.print') as mock_print:
+            with self.assertRaises(SystemExit) as context:
+                ChatBot.main()
+        self.assertEqual(context.exception.code, 1)
+        self.assertFalse(os.path.exists(rewrite_file))
+        self.assertTrue(any('Invalid API key' in str(call) for call in mock_print.call_args_list))
+
+    @patch('AutoChatBot.GPTChatCompletionSaver.ChatCompletionSaver.save_to_file')
+    @patch('AutoChatBot.ChatAPIHandler.ChatAPIHandler.make_api_request')
+    def test_main_resumes_session(self, mock_make_api_request, mock_save_to_file):
+        from AutoChatBot.SessionStore import SessionStore
+        session_dir = os.path.join(self.tempdir.name, 'sessions')
+        answers = iter(["A closure captures variables.", "Use nonlocal."])
+        mock_make_api_request.side_effect = lambda **kwargs: {
+            'choices': [{'message': {'role': 'assistant', 'content': next(answers)}}]
+        }
+        try:
+            for question in ("What is a closure?", "How do I assign to a captured variable?"):
+                args = ParserCreator.create_parser().parse_args(
+                    ['--api', 'openai', '--question', question, '--session', 'closures', '--session_dir', session_dir]
+                )
+                with patch('argparse.ArgumentParser.parse_args', return_value=args):
+                    ChatBot.main()
+            self.assertEqual(mock_make_api_request.call_args.kwargs['conversation'], [
+                {"role": "user", "content": "What is a closure?"},
+                {"role": "assistant", "content": "A closure captures variables."},
+                {"role": "user", "content": "How do I assign to a captured variable?"},
+            ])
+            self.assertEqual(SessionStore.count_turns('closures'), 2)
+            self.assertEqual(SessionStore.read_turn('closures', 1)['response']['content'], "Use nonlocal.")
+        finally:
+            SessionStore.configure(SessionStore.DEFAULT_DIR)
+
+    @patch('AutoChatBot.ChatAPIHandler.ChatAPIHandler.stream_api_request')
+    def test_stream_response_exits_on_request_error(self, mock_stream_api_request):
+        def failing_stream():
+            raise requests.exceptions.HTTPError("429 Client Error: Too Many Requests")
+            yield
+
+        mock_stream_api_request.return_value = failing_stream()
+        args = argparse.Namespace(
+            api='openai', model='m', temperature=0, max_tokens=1, top_p=1, frequency_penalty=0,
+            presence_penalty=0, stop_sequences=None, top_k=50, repetition_penalty=1,
+            save_path=os.path.join(self.tempdir.name, 'response.tmp')
+        )
+        with self.assertRaises(SystemExit) as context:
+            ChatBot.stream_response(args, [{"role": "user", "content": "Hi"}])
+        self.assertEqual(context.exception.code, 1)
+
+class TestStartupImports(unittest.TestCase):
+    """
+    Startup: `-h` and `--show_available_context` must not import the HTTP stack, the provider clients
+    or the agents. The import time of the CLI module is only reported, with AUTOCHATBOT_BENCHMARK=1.
+    """
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    HEAVY_MODULES = ('requests', 'urllib3', 'dotenv', 'asyncio', 'AutoChatBot.ChatAPIHandler',
+                     'AutoChatBot.HTTPSessionPool', 'AutoChatBot.GPTChatCompletion',
+                     'AutoChatBot.TogetherAIChatCompletion', 'AutoChatBot.LocalChatCompletion',
+                     'AutoChatBot.TogetherAIModelRetriever', 'AutoChatBot.multi_file_agent',
+                     'AutoChatBot.ttd_agent', 'AutoChatBot.CodeExecutor', 'AutoChatBot.CodeBlockStopper')
+    SCRIPT = (
+        "import sys, json\n"
+        "sys.path.insert(0, {root!r})\n"
+        "sys.argv = ['AutoChatBot'] + {argv!r}\n"
+        "from AutoChatBot.AutoChatBot import ChatBot\n"
+        "try:\n"
+        "    ChatBot.main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(json.dumps(sorted(sys.modules)))\n"
+    )
+
+    def run_cli(self, argv, *options):
+        with tempfile.TemporaryDirectory() as tempdir:
+            return subprocess.run(
+                [sys.executable, *options, '-c', self.SCRIPT.format(root=self.PROJECT_ROOT, argv=argv)],
+                cwd=tempdir, capture_output=True, text=True, timeout=60
+            )
+
+    def test_fast_commands_do_not_import_heavy_modules(self):
+        for argv in (['-h'], ['--api', 'openai', '--show_available_context']):
+            with self.subTest(argv=argv):
+                result = self.run_cli(argv)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                modules = json.loads(result.stdout.splitlines()[-1])
+                for module in self.HEAVY_MODULES:
+                    self.assertNotIn(module, modules)
+
+    @unittest.skipUnless(os.environ.get('AUTOCHATBOT_BENCHMARK'), "Set AUTOCHATBOT_BENCHMARK=1 to run the benchmark.")
+    def test_benchmark_cli_import_time(self):
+        result = self.run_cli(['-h'], '-X', 'importtime')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        cumulative_us = [
+            int(line.split('|')[1]) for line in result.stderr.splitlines()
+            if line.startswith('import time:') and line.rstrip().endswith(' AutoChatBot.AutoChatBot')
+        ]
+        self.assertEqual(len(cumulative_us), 1)
+        print(f"\nImporting AutoChatBot.AutoChatBot for -h: {cumulative_us[0] / 1000:.1f} ms")
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,97 @@
+import unittest
+import tempfile
+import os
+import json
+from unittest.mock import patch
+from AutoChatBot.BatchJsonlProcessor import BatchJsonlProcessor
+from AutoChatBot.ChatAPIHandler import ChatAPIHandler
+from AutoChatBot.ParserCreator import ParserCreator
+
+class TestBatchJsonlProcessor(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tempdir.name, 'questions.jsonl')
+        self.output_path = os.path.join(self.tempdir.name, 'responses.jsonl')
+        with open(self.input_path, 'w') as file:
+            file.write(json.dumps("first question") + "\n")
+            file.write("\n")
+            file.write(json.dumps({"question": "second question"}) + "\n")
+            file.write(json.dumps({"conversation": [{"role": "user", "content": "third question"}]}) + "\n")
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+        ChatAPIHandler._concurrency_limits.clear()
+
+    def test_read_items(self):
+        items = BatchJsonlProcessor.read_items(self.input_path)
+        self.assertEqual(len(items), 3)
+        self.assertEqual(items[0], "first question")
+
+    def test_read_items_invalid_line(self):
+        with open(self.input_path, 'a') as file:
+            file.write("{not json}\n")
+        with self.assertRaises(ValueError):
+            BatchJsonlProcessor.read_items(self.input_path)
+        items = BatchJsonlProcessor.read_items(self.input_path, strict=False)
+        self.assertEqual(len(items), 4)
+        self.assertIsInstance(items[3], ValueError)
+
+    def test_build_conversation(self):
+        self.assertEqual(
+            BatchJsonlProcessor.build_conversation("hi"),
+            [{"role": "user", "content": "hi"}]
+        )
+        with self.assertRaises(ValueError):
+            BatchJsonlProcessor.build_conversation({"prompt": "hi"})
+
+    def test_execute_writes_results_in_order(self):
+        def send(**kwargs):
+            content = kwargs['conversation'][-1]['content']
+            if content == "second question":
+                return {"error": {"message": "429 Too Many Requests", "type": "request_error"}}
+            return {"choices": [{"message": {"role": "assistant", "content": f"answer to {content}"}}]}
+
+        args = ParserCreator.create_parser().parse_args([
+            "--api", "togetherai",
+            "--batch_input", self.input_path,
+            "--batch_output", self.output_path,
+            "--batch_workers", "2"
+        ])
+        with patch.object(ChatAPIHandler, '_send_request', side_effect=send):
+            BatchJsonlProcessor.execute(args)
+
+        with open(self.output_path) as file:
+            results = [json.loads(line) for line in file]
+        self.assertEqual([result["index"] for result in results], [0, 1, 2])
+        self.assertEqual(results[0]["content"], "answer to first question")
+        self.assertEqual(results[1]["error"]["type"], "request_error")
+        self.assertEqual(results[2]["content"], "answer to third question")
+
+    def test_execute_records_invalid_items_without_aborting(self):
+        with open(self.input_path, 'a') as file:
+            file.write("{not json}\n")
+            file.write(json.dumps({"prompt": "no question key"}) + "\n")
+            file.write(json.dumps("last question") + "\n")
+
+        args = ParserCreator.create_parser().parse_args([
+            "--api", "togetherai",
+            "--batch_input", self.input_path,
+            "--batch_output", self.output_path
+        ])
+        answer = {"choices": [{"message": {"role": "assistant", "content": "answer"}}]}
+        with patch.object(ChatAPIHandler, '_send_request', return_value=answer) as mock_send_request:
+            responses = BatchJsonlProcessor.execute(args)
+
+        self.assertEqual(mock_send_request.call_count, 4)
+        self.assertEqual(len(responses), 6)
+        with open(self.output_path) as file:
+            results = [json.loads(line) for line in file]
+        self.assertEqual([result["index"] for result in results], list(range(6)))
+        self.assertEqual(results[3]["error"]["type"], "invalid_item")
+        self.assertIn("line 5", results[3]["error"]["message"])
+        self.assertEqual(results[4]["error"]["type"], "invalid_item")
+        self.assertEqual(results[5]["content"], "answer")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+import unittest
+import asyncio
+import threading
+import time
+import argparse
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from AutoChatBot.ChatAPIHandler import ChatAPIHandler, ChatAPIHandler2
+from AutoChatBot.Deadline import Deadline
+from AutoChatBot.GPTChatCompletion import GPT3ChatCompletion
+
+RESPONSE = {'choices': [{'message': {'role': 'assistant', 'content': 'Hello'}}]}
+
+class StalledHandler(BaseHTTPRequestHandler):
+    """
+    Accepts a request and answers only after the client's read timeout has passed.
+    """
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(1.5)
+        try:
+            self.send_response(200)
+            self.end_headers()
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+class TestChatAPIHandler(unittest.TestCase):
+    """
+    Unit tests for ChatAPIHandler. The blocking provider call (`_send_request`) is mocked so no network is used.
+    """
+
+    def setUp(self):
+        self.conversation = [{"role": "user", "content": "Hello"}]
+
+    def tearDown(self):
+        ChatAPIHandler._concurrency_limits.clear()
+
+    @patch.object(ChatAPIHandler, '_send_request', return_value=RESPONSE)
+    def test_make_api_request_is_wrapper_over_async(self, mock_send_request):
+        response = ChatAPIHandler.make_api_request(
+            api="openai", model="gpt-3.5-turbo", temperature=0.5, max_tokens=10, conversation=self.conversation
+        )
+        self.assertEqual(response, RESPONSE)
+        mock_send_request.assert_called_once()
+        self.assertEqual(mock_send_request.call_args.kwargs['conversation'], self.conversation)
+
+    def test_make_api_request_invalid_api(self):
+        with self.assertRaises(ValueError):
+            ChatAPIHandler.make_api_request(api="invalid", model="m", temperature=0, max_tokens=1, conversation=[])
+
+    @patch.object(ChatAPIHandler, '_send_request', return_value=RESPONSE)
+    def test_make_api_request_inside_running_loop(self, mock_send_request):
+        async def caller():
+            return ChatAPIHandler.make_api_request(
+                api="togetherai", model="m", temperature=0, max_tokens=1, conversation=self.conversation
+            )
+        self.assertEqual(asyncio.run(caller()), RESPONSE)
+
+    def test_concurrency_is_bounded_per_api(self):
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def slow_send(**kwargs):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.05)
+            with lock:
+                state['active'] -= 1
+            return RESPONSE
+
+        async def run_all():
+            return await asyncio.gather(*(
+                ChatAPIHandler.make_api_request_async(
+                    api="openai", model="m", temperature=0, max_tokens=1, conversation=self.conversation
+                )
+                for _ in range(6)
+            ))
+
+        ChatAPIHandler.set_concurrency_limit("openai", 2)
+        with patch.object(ChatAPIHandler, '_send_request', side_effect=slow_send):
+            responses = asyncio.run(run_all())
+        self.assertEqual(responses, [RESPONSE] * 6)
+        self.assertEqual(state['peak'], 2)
+
+    def test_cancellation_releases_slot(self):
+        def slow_send(**kwargs):
+            time.sleep(0.2)
+            return RESPONSE
+
+        async def run():
+            task = asyncio.ensure_future(ChatAPIHandler.make_api_request_async(
+                api="openai", model="m", temperature=0, max_tokens=1, conversation=self.conversation
+            ))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            semaphore = ChatAPIHandler._get_semaphore("openai")
+            self.assertFalse(semaphore.locked())
+
+        ChatAPIHandler.set_concurrency_limit("openai", 1)
+        with patch.object(ChatAPIHandler, '_send_request', side_effect=slow_send):
+            asyncio.run(run())
+
+    def test_set_concurrency_limit_rejects_invalid_value(self):
+        with self.assertRaises(ValueError):
+            ChatAPIHandler.set_concurrency_limit("openai", 0)
+        self.assertEqual(ChatAPIHandler.get_concurrency_limit("openai"), ChatAPIHandler.DEFAULT_CONCURRENCY)
+
+    def test_make_batch_requests_preserves_order_and_isolates_errors(self):
+        def send(**kwargs):
+            content = kwargs['conversation'][0]['content']
+            if content == 'fail':
+                raise ConnectionError('connection reset')
+            time.sleep(0.05 if content == 'slow' else 0)
+            return {'choices': [{'message': {'role': 'assistant', 'content': content.upper()}}]}
+
+        conversations = [[{"role": "user", "content": content}] for content in ['slow', 'fail', 'fast']]
+        with patch.object(ChatAPIHandler, '_send_request', side_effect=send):
+            responses = ChatAPIHandler.make_batch_requests(
+                conversations, api="openai", model="m", temperature=0, max_tokens=1, max_workers=3
+            )
+        self.assertEqual(responses[0]['choices'][0]['message']['content'], 'SLOW')
+        self.assertEqual(responses[1], {'error': {'message': 'connection reset', 'type': 'ConnectionError'}})
+        self.assertEqual(responses[2]['choices'][0]['message']['content'], 'FAST')
+
+    def test_make_batch_requests_respects_worker_count(self):
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def slow_send(**kwargs):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.02)
+            with lock:
+                state['active'] -= 1
+            return RESPONSE
+
+        with patch.object(ChatAPIHandler, '_send_request', side_effect=slow_send):
+            responses = ChatAPIHandler.make_batch_requests(
+                [self.conversation] * 8, api="openai", model="m", temperature=0, max_tokens=1, max_workers=3
+            )
+        self.assertEqual(len(responses), 8)
+        self.assertEqual(state['peak'], 3)
+
+    def test_make_batch_requests_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            ChatAPIHandler.make_batch_requests([self.conversation], api="invalid", model="m", temperature=0, max_tokens=1)
+        with self.assertRaises(ValueError):
+            ChatAPIHandler.make_batch_requests([self.conversation], api="openai", model="m", temperature=0, max_tokens=1, max_workers=0)
+
+    @patch.object(ChatAPIHandler, '_send_request', return_value=RESPONSE)
+    def test_timeout_is_capped_by_deadline(self, mock_send_request):
+        ChatAPIHandler.make_api_request(
+            api="openai", model="m", temperature=0, max_tokens=1, conversation=self.conversation, deadline=Deadline(5)
+        )
+        connect_timeout, read_timeout = mock_send_request.call_args.kwargs['timeout']
+        self.assertLessEqual(connect_timeout, 5)
+        self.assertLessEqual(read_timeout, 5)
+
+    @patch.object(ChatAPIHandler, '_send_request', return_value=RESPONSE)
+    def test_expired_deadline_raises_without_sending(self, mock_send_request):
+        deadline = Deadline(0.001)
+        time.sleep(0.01)
+        with self.assertRaises(TimeoutError):
+            ChatAPIHandler.make_api_request(
+                api="openai", model="m", temperature=0, max_tokens=1, conversation=self.conversation, deadline=deadline
+            )
+        mock_send_request.assert_not_called()
+
+    @patch.object(ChatAPIHandler, '_send_request', return_value=RESPONSE)
+    def test_chat_api_handler2_delegates(self, mock_send_request):
+        args = argparse.Namespace(
+            api="openai", model="gpt-3.5-turbo", temperature=0.7, max_tokens=100, top_p=0.9,
+            frequency_penalty=0.5, presence_penalty=0.6, stop_sequences=None, top_k=40, repetition_penalty=1.2
+        )
+        self.assertEqual(ChatAPIHandler2.make_api_request(args, self.conversation), RESPONSE)
+        self.assertEqual(mock_send_request.call_args.kwargs['top_k'], 40)
+
+    def test_read_timeout_is_reported_as_error_for_every_backend(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StalledHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+        try:
+            for api in ("openai", "local"):
+                with self.subTest(api=api), \
+                        patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key', 'LOCAL_API_URL': url}), \
+                        patch.object(GPT3ChatCompletion, 'API_URL', url):
+                    response = ChatAPIHandler.make_api_request(
+                        api=api, model="m", temperature=0, max_tokens=1,
+                        conversation=self.conversation, deadline=Deadline(0.5)
+                    )
+                    self.assertEqual(response['error']['type'], 'timeout_error')
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import unittest
+import tempfile
+import os
+import time
+import requests
+from unittest.mock import patch, MagicMock
+from AutoChatBot.RetryPolicy import RetryPolicy
+from AutoChatBot.ChatCompletionStream import ChatCompletionStream
+from AutoChatBot.ChatAPIHandler import ChatAPIHandler
+from AutoChatBot.Deadline import Deadline
+
+class TestChatCompletionStream(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.save_path = os.path.join(self.tempdir.name, 'response.tmp')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_tokens_are_saved_as_they_arrive(self):
+        save_path = self.save_path
+
+        def tokens():
+            yield 'Hello'
+            with open(save_path) as file:
+                self.assertEqual(file.read(), 'Hello')
+            yield ' world'
+
+        stream = ChatCompletionStream(tokens(), model='dummy', save_path=save_path)
+        self.assertEqual(list(stream), ['Hello', ' world'])
+        with open(save_path) as file:
+            self.assertEqual(file.read(), 'Hello world')
+
+    def test_stats_and_response(self):
+        stream = ChatCompletionStream(iter(['a', 'b', 'c']), model='dummy')
+        self.assertEqual(stream.consume(), 'abc')
+        self.assertEqual(stream.chunk_count, 3)
+        self.assertIsNotNone(stream.time_to_first_token)
+        self.assertGreaterEqual(stream.total_time, stream.time_to_first_token)
+
+        response = stream.to_response()
+        self.assertEqual(response['choices'][0]['message']['content'], 'abc')
+        self.assertEqual(response['model'], 'dummy')
+
+    def test_empty_stream(self):
+        stream = ChatCompletionStream(iter([]))
+        self.assertEqual(stream.consume(), '')
+        self.assertIsNone(stream.time_to_first_token)
+
+    def test_stop_ends_stream_and_closes_it(self):
+        closed = []
+
+        def tokens():
+            try:
+                yield 'a'
+                yield 'b'
+                yield 'c'
+            finally:
+                closed.append(True)
+
+        stream = ChatCompletionStream(tokens())
+        received = []
+        for token in stream:
+            received.append(token)
+            if token == 'b':
+                stream.stop()
+        self.assertEqual(received, ['a', 'b'])
+        self.assertEqual(closed, [True])
+        self.assertTrue(stream.stopped_early)
+        self.assertIsNotNone(stream.total_time)
+        self.assertEqual(stream.to_response()['choices'][0]['finish_reason'], 'cancelled')
+
+    def test_finish_reason_is_the_generator_return_value(self):
+        def tokens():
+            yield 'a'
+            return 'length'
+
+        stream = ChatCompletionStream(tokens(), save_path=self.save_path)
+        stream.consume()
+        self.assertEqual(stream.to_response()['choices'][0]['finish_reason'], 'length')
+        self.assertIsNone(ChatCompletionStream(iter(['a'])).to_response()['choices'][0]['finish_reason'])
+
+    def test_stream_stops_and_closes_at_deadline(self):
+        closed = []
+
+        def tokens():
+            try:
+                while True:
+                    time.sleep(0.01)
+                    yield 'x'
+            finally:
+                closed.append(True)
+
+        stream = ChatCompletionStream(tokens(), model='dummy', save_path=self.save_path, deadline=Deadline(0.1))
+        with self.assertRaises(TimeoutError):
+            for _ in stream:
+                pass
+        self.assertEqual(closed, [True])
+        self.assertLess(stream.chunk_count, 50)
+
+    @patch('AutoChatBot.GPTChatCompletion.HTTPSessionPool.get_session')
+    @patch('AutoChatBot.GPTChatCompletion.GPT3ChatCompletion.load_api_key', return_value='key')
+    def test_chat_api_handler_streams_openai(self, mock_load_api_key, mock_get_session):
+        http_response = MagicMock()
+        http_response.__enter__.return_value = http_response
+        http_response.iter_lines.return_value = iter([
+            'data: {"choices": [{"delta": {"content": "def f():"}}]}',
+            '',
+            'data: {"choices": [{"delta": {"content": " pass"}}]}',
+            '',
+            'data: {"choices": [{"delta": {}, "finish_reason": "stop"}]}',
+            '',
+            'data: [DONE]',
+        ])
+        mock_get_session.return_value.post.return_value = http_response
+
+        stream = ChatAPIHandler.stream_api_request(
+            api='openai', model='gpt-3.5-turbo', temperature=0, max_tokens=10,
+            conversation=[{'role': 'user', 'content': 'hi'}], save_path=self.save_path
+        )
+        self.assertEqual(stream.consume(), 'def f(): pass')
+        self.assertEqual(stream.finish_reason, 'stop')
+        posted_json = mock_get_session.return_value.post.call_args.kwargs['json']
+        self.assertTrue(posted_json['stream'])
+        with open(self.save_path) as file:
+            self.assertEqual(file.read(), 'def f(): pass')
+
+    def make_http_response(self, status_code, lines=()):
+        http_response = MagicMock()
+        http_response.__enter__.return_value = http_response
+        if status_code >= 400:
+            error_response = requests.Response()
+            error_response.status_code = status_code
+            error_response.headers['Retry-After'] = '0'
+            http_response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+                f"{status_code} Error", response=error_response
+            )
+        http_response.iter_lines.return_value = iter(lines)
+        return http_response
+
+    @patch.object(RetryPolicy, '_wait', return_value=False)
+    @patch('AutoChatBot.GPTChatCompletion.HTTPSessionPool.get_session')
+    @patch('AutoChatBot.GPTChatCompletion.GPT3ChatCompletion.load_api_key', return_value='key')
+    def test_stream_opening_is_retried_on_rate_limit(self, mock_load_api_key, mock_get_session, mock_wait):
+        RetryPolicy.reset_stats()
+        mock_get_session.return_value.post.side_effect = [
+            self.make_http_response(429),
+            self.make_http_response(200, [b'data: {"choices": [{"delta": {"content": "ok"}}]}', b'', b'data: [DONE]']),
+        ]
+        stream = ChatAPIHandler.stream_api_request(
+            api='openai', model='m', temperature=0, max_tokens=10, conversation=[{'role': 'user', 'content': 'hi'}]
+        )
+        self.assertEqual(stream.consume(), 'ok')
+        self.assertEqual(mock_get_session.return_value.post.call_count, 2)
+        self.assertEqual(RetryPolicy.get_stats('openai')['openai']['retries'], 1)
+
+    @patch.object(RetryPolicy, '_wait', return_value=False)
+    @patch('AutoChatBot.GPTChatCompletion.HTTPSessionPool.get_session')
+    @patch('AutoChatBot.GPTChatCompletion.GPT3ChatCompletion.load_api_key', return_value='key')
+    def test_stream_gives_up_with_http_error(self, mock_load_api_key, mock_get_session, mock_wait):
+        mock_get_session.return_value.post.side_effect = lambda *args, **kwargs: self.make_http_response(503)
+        saved_settings = dict(RetryPolicy._settings)
+        RetryPolicy.configure(max_retries=1)
+        try:
+            stream = ChatAPIHandler.stream_api_request(
+                api='openai', model='m', temperature=0, max_tokens=10, conversation=[{'role': 'user', 'content': 'hi'}]
+            )
+            with self.assertRaises(requests.exceptions.HTTPError):
+                stream.consume()
+        finally:
+            RetryPolicy._settings.update(saved_settings)
+        self.assertEqual(mock_get_session.return_value.post.call_count, 2)
+
+    def test_chat_api_handler_invalid_api(self):
+        with self.assertRaises(ValueError):
+            ChatAPIHandler.stream_api_request(api='invalid', model='m', temperature=0, max_tokens=1, conversation=[])
+
+if __name__ == '__main__':
+    unittest.main()
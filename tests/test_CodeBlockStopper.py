@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import patch
+from AutoChatBot.CodeBlockStopper import CodeBlockStopper
+from AutoChatBot.ChatCompletionStream import ChatCompletionStream
+
+class TestCodeBlockStopper(unittest.TestCase):
+
+    def make_stream(self, tokens, read, finish_reason=None):
+        def generate():
+            for token in tokens:
+                read.append(token)
+                yield token
+            return finish_reason
+        return ChatCompletionStream(generate(), model='dummy')
+
+    def test_aborts_after_the_block(self):
+        read = []
+        tokens = ["Sure:\n```python\n", "print(1)\n", "```", "\n", "This prints 1.", " It is short.", " Bye."]
+        stopper = CodeBlockStopper(self.make_stream(tokens, read), 'python', max_tokens=1000)
+
+        self.assertEqual(stopper.consume(), "Sure:\n```python\nprint(1)\n```\n")
+        self.assertEqual(read, tokens[:4])  # nothing after the closing fence line was read
+        self.assertTrue(stopper.stream.stopped_early)
+        savings = stopper.get_savings()
+        self.assertEqual(savings['method'], 'abort')
+        self.assertEqual(savings['tokens_saved'], 1000 - savings['tokens'])
+        self.assertIsNotNone(savings['seconds_saved'])
+        response = stopper.to_response()
+        self.assertEqual(response['choices'][0]['message']['content'], stopper.content)
+        self.assertEqual(response['choices'][0]['finish_reason'], 'cancelled')
+        self.assertEqual(response['early_stop'], savings)
+
+    def test_ignores_other_languages_and_think_spans(self):
+        read = []
+        tokens = ["<think>```python\nno\n```\n</think>", "```bash\nls\n```\n", "```python\nyes\n```\n", "tail"]
+        stopper = CodeBlockStopper(self.make_stream(tokens, read), 'python')
+        stopper.consume()
+        self.assertEqual(read, tokens[:3])
+        self.assertIsNone(stopper.get_savings()['tokens_saved'])
+
+    def test_completion_that_ends_on_its_own(self):
+        tokens = ["```python\nprint(1)\n```"]
+        stopper = CodeBlockStopper(self.make_stream(tokens, []), 'python', max_tokens=100, stop_sequence_sent=True)
+        self.assertEqual(stopper.consume(), tokens[0])
+        self.assertIsNone(stopper.get_savings())
+        self.assertIn("nothing was saved", CodeBlockStopper.format_savings(None))
+
+    def test_restores_fence_left_out_by_stop_sequence(self):
+        tokens = ["Here:\n```python\nprint(1)"]
+        stopper = CodeBlockStopper(self.make_stream(tokens, []), 'python', max_tokens=100, stop_sequence_sent=True)
+        self.assertEqual(stopper.consume(), "Here:\n```python\nprint(1)\n```\n")
+        self.assertEqual(stopper.get_savings()['method'], 'stop_sequence')
+
+        unsent = CodeBlockStopper(self.make_stream(tokens, []), 'python', max_tokens=100)
+        self.assertEqual(unsent.consume(), tokens[0])
+        self.assertIsNone(unsent.get_savings())
+
+        # Cut off by max_tokens: the block is incomplete, not ended by the stop sequence
+        truncated = CodeBlockStopper(self.make_stream(tokens, [], 'length'), 'python', max_tokens=100, stop_sequence_sent=True)
+        self.assertEqual(truncated.consume(), tokens[0])
+        self.assertIsNone(truncated.get_savings())
+        self.assertEqual(truncated.to_response()['choices'][0]['finish_reason'], 'length')
+
+    def test_get_stop_sequences(self):
+        self.assertEqual(CodeBlockStopper.get_stop_sequences('openai', 'python', ['\n\n']), (['\n\n', '\n```\n'], True))
+        self.assertEqual(CodeBlockStopper.get_stop_sequences('openai', 'python', ['a', 'b', 'c', 'd']), (['a', 'b', 'c', 'd'], False))
+        self.assertEqual(CodeBlockStopper.get_stop_sequences('openai', '', None), (None, False))
+        self.assertEqual(CodeBlockStopper.get_stop_sequences('togetherai', 'python', None), (None, False))
+
+    @patch('AutoChatBot.CodeBlockStopper.ChatAPIHandler.stream_api_request')
+    def test_stream_api_request_sends_stop_sequence(self, mock_stream_api_request):
+        mock_stream_api_request.return_value = self.make_stream(["```python\nx\n```\n", "rest"], [])
+        stopper = CodeBlockStopper.stream_api_request(
+            api='local', model='m', temperature=0, max_tokens=50,
+            conversation=[{'role': 'user', 'content': 'Hi'}], language='python'
+        )
+        self.assertEqual(mock_stream_api_request.call_args.kwargs['stop_sequences'], ['\n```\n'])
+        self.assertTrue(stopper.stop_sequence_sent)
+        self.assertEqual(stopper.consume(), "```python\nx\n```\n")
+
+    def test_format_savings(self):
+        line = CodeBlockStopper.format_savings({'method': 'abort', 'tokens': 40, 'tokens_saved': 60, 'seconds_saved': 1.5})
+        self.assertEqual(line, "Stopped after the code block (abort) at ~40 tokens, saving up to 60 tokens and 1.5s.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
+import threading
 import unittest
 from unittest.mock import patch, MagicMock
 from AutoChatBot.CodeExecutor import CodeExecutor
+from AutoChatBot.ChatCompletionStream import ChatCompletionStream
+from AutoChatBot.CodeBlockStopper import CodeBlockStopper
 
 class TestCodeExecutor(unittest.TestCase):
 
@@ -11,10 +14,19 @@ class TestCodeExecutor(unittest.TestCase):
         
         result = CodeExecutor.execute_code(True, "print('Hello, World!')", "sandbox_scripts/test_script.py")
         
-        mock_pyfile_executor.save_code_to_file.assert_called_once_with("sandbox_scripts/test_script.py", "print('Hello, World!')")
+        mock_pyfile_executor.save_code_to_file.assert_called_once_with("sandbox_scripts/test_script.py", "print('Hello, World!')", require_block=True)
         mock_pyfile_executor.execute_code.assert_called_once_with("sandbox_scripts/test_script.py")
         self.assertIsNone(result)
 
+    @patch('AutoChatBot.CodeExecutor.PyFileExecutor')
+    def test_execute_code_without_block_does_not_run(self, mock_pyfile_executor):
+        mock_pyfile_executor.save_code_to_file.return_value = "No closed ```python code block found"
+
+        result = CodeExecutor.execute_code(True, "Sure, I can help with that.", "sandbox_scripts/test_script.py")
+
+        self.assertEqual(result, "No closed ```python code block found")
+        mock_pyfile_executor.execute_code.assert_not_called()
+
     @patch('AutoChatBot.CodeExecutor.PyFileExecutor')
     def test_execute_code_does_not_run_code(self, mock_pyfile_executor):
         result = CodeExecutor.execute_code(False, "print('Hello, World!')")
@@ -83,6 +95,159 @@ class TestCodeExecutor(unittest.TestCase):
         mock_conversation_preparer.str_to_dict_list.assert_called()
         mock_conversation_preparer.extend_context.assert_called()
 
+    @patch('AutoChatBot.CodeExecutor.ChatAPIHandler')
+    @patch('AutoChatBot.CodeExecutor.ConversationPreparer')
+    @patch('AutoChatBot.CodeExecutor.CodeErrorFormatter')
+    @patch('AutoChatBot.CodeExecutor.PyFileExecutor')
+    def test_retry_api_request_skips_attempts_after_deadline(self, mock_pyfile_executor, mock_code_error_formatter, mock_conversation_preparer, mock_chat_api_handler):
+        mock_pyfile_executor.execute_code.return_value = "Syntax Error"
+        deadline = MagicMock()
+        deadline.expired.return_value = True
+
+        result = CodeExecutor.retry_api_request(
+            api="dummy_api", model="dummy_model", temperature=0.5, max_tokens=100,
+            top_p=1.0, frequency_penalty=0, presence_penalty=0, stop_sequences=[],
+            top_k=50, repetition_penalty=1.0, save_path="dummy_path",
+            code_save_path="sandbox_scripts/test_script.py", run_code=True,
+            response_content="print('Hello, World!')", max_attempts=3, deadline=deadline
+        )
+
+        self.assertFalse(result)
+        mock_chat_api_handler.make_api_request.assert_not_called()
+
+    @patch('AutoChatBot.CodeExecutor.ChatAPIHandler')
+    @patch('AutoChatBot.CodeExecutor.ConversationPreparer')
+    @patch('AutoChatBot.CodeExecutor.CodeErrorFormatter')
+    @patch('AutoChatBot.CodeExecutor.PyFileExecutor')
+    def test_retry_api_request_passes_conversation_by_keyword(self, mock_pyfile_executor, mock_code_error_formatter, mock_conversation_preparer, mock_chat_api_handler):
+        mock_pyfile_executor.execute_code.side_effect = ["Syntax Error", None]
+        mock_conversation_preparer.extend_context.return_value = [{'role': 'user', 'content': 'Formatted error'}]
+        mock_chat_api_handler.make_api_request.return_value = {'choices': [{'message': {'content': "print(1)"}}]}
+
+        with patch('AutoChatBot.CodeExecutor.ChatCompletionSaver'):
+            CodeExecutor.retry_api_request(
+                api="dummy_api", model="dummy_model", temperature=0.5, max_tokens=100,
+                top_p=0.8, frequency_penalty=0, presence_penalty=0, stop_sequences=[],
+                top_k=50, repetition_penalty=1.0, save_path="dummy_path",
+                code_save_path="sandbox_scripts/test_script.py", run_code=True,
+                response_content="print('Hello, World!')", max_attempts=2
+            )
+
+        kwargs = mock_chat_api_handler.make_api_request.call_args.kwargs
+        self.assertEqual(kwargs['conversation'], [{'role': 'user', 'content': 'Formatted error'}])
+        self.assertEqual(kwargs['top_p'], 0.8)
+
+    @patch('AutoChatBot.CodeExecutor.PyFileExecutor')
+    def test_stream_and_execute_starts_code_before_stream_ends(self, mock_pyfile_executor):
+        started = threading.Event()
+        mock_pyfile_executor.save_code_to_file.return_value = None
+        mock_pyfile_executor.execute_code.side_effect = lambda path: started.set()
+        started_before_explanation = []
+
+        def tokens():
+            yield "Here it is:\n```py"
+            yield "thon\nprint(1)\n``"
+            yield "`\n"
+            started_before_explanation.append(started.wait(5))
+            yield "This prints 1."
+
+        stream = ChatCompletionStream(tokens())
+        with patch('builtins.print'):
+            content, error_output = CodeExecutor.stream_and_execute(stream, "sandbox_scripts/test_script.py")
+
+        self.assertEqual(started_before_explanation, [True])
+        self.assertEqual(content, "Here it is:\n```python\nprint(1)\n```\nThis prints 1.")
+        self.assertIsNone(error_output)
+        mock_pyfile_executor.save_code_to_file.assert_called_once_with(
+            "sandbox_scripts/test_script.py", "Here it is:\n```python\nprint(1)\n```\n", 'python'
+        )
+        mock_pyfile_executor.execute_code.assert_called_once_with("sandbox_scripts/test_script.py")
+
+    @patch('AutoChatBot.CodeExecutor.PyFileExecutor')
+    def test_stream_and_execute_without_block_runs_nothing(self, mock_pyfile_executor):
+        mock_pyfile_executor.get_no_block_error.return_value = "No code block"
+        stream = ChatCompletionStream(iter(["print(", "1)\n```"]))
+        with patch('builtins.print'):
+            content, error_output = CodeExecutor.stream_and_execute(stream, "sandbox_scripts/test_script.py")
+
+        self.assertEqual((content, error_output), ("print(1)\n```", "No code block"))
+        mock_pyfile_executor.save_code_to_file.assert_not_called()
+        mock_pyfile_executor.execute_code.assert_not_called()
+
+    @patch('AutoChatBot.CodeExecutor.PyFileExecutor')
+    def test_stream_and_execute_runs_block_closed_at_end_of_stream(self, mock_pyfile_executor):
+        mock_pyfile_executor.save_code_to_file.return_value = None
+        mock_pyfile_executor.execute_code.return_value = None
+        stream = ChatCompletionStream(iter(["```python\nprint(1)\n", "```"]))
+        with patch('builtins.print'):
+            content, error_output = CodeExecutor.stream_and_execute(stream, "sandbox_scripts/test_script.py")
+
+        self.assertIsNone(error_output)
+        mock_pyfile_executor.save_code_to_file.assert_called_once_with("sandbox_scripts/test_script.py", content, require_block=True)
+        mock_pyfile_executor.execute_code.assert_called_once_with("sandbox_scripts/test_script.py")
+
+    @patch('AutoChatBot.CodeExecutor.PyFileExecutor')
+    def test_stream_and_execute_ignores_blocks_in_think_spans(self, mock_pyfile_executor):
+        mock_pyfile_executor.save_code_to_file.return_value = None
+        mock_pyfile_executor.execute_code.return_value = None
+        tokens = ["<thi", "nk>Draft:\n```python\nprint('draft')\n```\n</th", "ink>", "```python\nprint(1)\n```\n"]
+        with patch('builtins.print'):
+            content, error_output = CodeExecutor.stream_and_execute(ChatCompletionStream(iter(tokens)), "sandbox_scripts/test_script.py")
+
+        self.assertEqual(content, "```python\nprint(1)\n```\n")
+        mock_pyfile_executor.save_code_to_file.assert_called_once_with("sandbox_scripts/test_script.py", content, 'python')
+
+    @patch('AutoChatBot.CodeExecutor.ConversationPreparer')
+    @patch('AutoChatBot.CodeExecutor.CodeErrorFormatter')
+    @patch('AutoChatBot.CodeExecutor.ChatAPIHandler')
+    @patch('AutoChatBot.CodeExecutor.PyFileExecutor')
+    def test_retry_api_request_streams_retries(self, mock_pyfile_executor, mock_chat_api_handler, mock_code_error_formatter, mock_conversation_preparer):
+        mock_pyfile_executor.save_code_to_file.return_value = None
+        mock_pyfile_executor.execute_code.side_effect = ["Syntax Error", None]
+        mock_conversation_preparer.extend_context.return_value = [{'role': 'user', 'content': 'Formatted error'}]
+        mock_chat_api_handler.stream_api_request.return_value = ChatCompletionStream(iter(["```python\nprint(1)\n```\n"]))
+
+        with patch('builtins.print'):
+            result = CodeExecutor.retry_api_request(
+                api="dummy_api", model="dummy_model", temperature=0.5, max_tokens=100,
+                top_p=1.0, frequency_penalty=0, presence_penalty=0, stop_sequences=[],
+                top_k=50, repetition_penalty=1.0, save_path="dummy_path",
+                code_save_path="sandbox_scripts/test_script.py", run_code=True,
+                response_content="print('Hello, World!')", max_attempts=2, stream=True
+            )
+
+        self.assertTrue(result)
+        mock_chat_api_handler.make_api_request.assert_not_called()
+        self.assertEqual(mock_chat_api_handler.stream_api_request.call_args.kwargs['save_path'], "dummy_path")
+        self.assertEqual(mock_pyfile_executor.execute_code.call_count, 2)
+
+    @patch('AutoChatBot.CodeExecutor.ConversationPreparer')
+    @patch('AutoChatBot.CodeExecutor.CodeErrorFormatter')
+    @patch('AutoChatBot.CodeExecutor.CodeBlockStopper.stream_api_request')
+    @patch('AutoChatBot.CodeExecutor.ChatAPIHandler')
+    @patch('AutoChatBot.CodeExecutor.PyFileExecutor')
+    def test_retry_api_request_early_stop(self, mock_pyfile_executor, mock_chat_api_handler, mock_stopper_stream_api_request, mock_code_error_formatter, mock_conversation_preparer):
+        mock_pyfile_executor.save_code_to_file.return_value = None
+        mock_pyfile_executor.execute_code.side_effect = ["Syntax Error", None]
+        mock_conversation_preparer.extend_context.return_value = [{'role': 'user', 'content': 'Formatted error'}]
+        stream = ChatCompletionStream(iter(["```python\nprint(1)\n```\n", "Explanation."]))
+        mock_stopper_stream_api_request.return_value = CodeBlockStopper(stream, 'python', max_tokens=100)
+
+        with patch('builtins.print'):
+            result = CodeExecutor.retry_api_request(
+                api="dummy_api", model="dummy_model", temperature=0.5, max_tokens=100,
+                top_p=1.0, frequency_penalty=0, presence_penalty=0, stop_sequences=[],
+                top_k=50, repetition_penalty=1.0, save_path="dummy_path",
+                code_save_path="sandbox_scripts/test_script.py", run_code=True,
+                response_content="print('Hello, World!')", max_attempts=2, early_stop=True
+            )
+
+        self.assertTrue(result)
+        self.assertEqual(mock_stopper_stream_api_request.call_args.kwargs['language'], 'python')
+        self.assertTrue(stream.stopped_early)
+        mock_chat_api_handler.make_api_request.assert_not_called()
+        mock_chat_api_handler.stream_api_request.assert_not_called()
+
     def test_run_code_with_unittest(self):
         # Placeholder test case for future implementation of run_code_with_unittest
         self.assertTrue(True)
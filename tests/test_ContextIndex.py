@@ -0,0 +1,106 @@
+import unittest
+import tempfile
+import os
+import json
+from unittest.mock import patch
+from AutoChatBot.ContextIndex import ContextIndex
+from AutoChatBot.ContextManager import ContextManager
+
+class TestContextIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.folder = self.test_dir.name
+        self.write_json('a.json', {
+            "banana": {"description": "bots", "context": [{"role": "system", "content": "You are a helpful assistant."}]},
+            "äpfel": {"context": [{"role": "system", "content": "Grüß dich"}]},
+        })
+        self.write_json('b.json', {"cherry": {"context": [{"role": "user", "content": "Hi"}]}})
+        self.index_path = ContextIndex.get_index_path(self.folder)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+        ContextManager.invalidate_cache()
+
+    def write_json(self, file_name, data):
+        with open(os.path.join(self.folder, file_name), 'w') as file:
+            json.dump(data, file)
+
+    def test_build_and_lookup(self):
+        self.assertEqual(ContextIndex.build(self.folder), 3)
+        self.assertEqual(ContextIndex.names(self.index_path), ['banana', 'cherry', 'äpfel'])
+        self.assertEqual(ContextIndex.lookup(self.index_path, 'cherry'), {"context": [{"role": "user", "content": "Hi"}]})
+        self.assertEqual(ContextIndex.lookup(self.index_path, 'äpfel')['context'][0]['content'], "Grüß dich")
+        self.assertIsNone(ContextIndex.lookup(self.index_path, 'durian'))
+
+    def test_lookup_in_large_index(self):
+        self.write_json('many.json', {f"context_{i:05d}": {"context": [{"role": "user", "content": str(i)}]} for i in range(5000)})
+        ContextIndex.build(self.folder)
+        self.assertEqual(ContextIndex.lookup(self.index_path, 'context_04321')['context'][0]['content'], '4321')
+        self.assertIsNone(ContextIndex.lookup(self.index_path, 'context_99999'))
+
+    def test_failed_build_removes_temp_file(self):
+        with patch('AutoChatBot.ContextIndex.os.replace', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                ContextIndex.build(self.folder)
+        self.assertEqual([name for name in os.listdir(self.folder) if name.endswith('.tmp')], [])
+        self.assertFalse(os.path.exists(self.index_path))
+
+    def test_is_fresh_tracks_source_files(self):
+        self.assertFalse(ContextIndex.is_fresh(self.folder))
+        ContextIndex.build(self.folder)
+        self.assertTrue(ContextIndex.is_fresh(self.folder))
+        self.write_json('c.json', {"durian": {"context": []}})
+        self.assertFalse(ContextIndex.is_fresh(self.folder))
+
+    def test_shared_message_contents_are_stored_once(self):
+        prompt = "You are a careful reviewer. " * 100
+        self.write_json('c.json', {
+            f"review_{i}": {"context": [{"role": "system", "content": prompt}, {"role": "user", "content": str(i)}]}
+            for i in range(20)
+        })
+        ContextIndex.build(self.folder)
+        self.assertLess(os.path.getsize(self.index_path), 3 * len(prompt))
+        self.assertEqual(ContextIndex.lookup(self.index_path, 'review_7'),
+                         {"context": [{"role": "system", "content": prompt}, {"role": "user", "content": "7"}]})
+        report = ContextIndex.get_report(self.index_path)
+        self.assertEqual(report['messages'], 43)
+        self.assertEqual(report['strings'], 1 + 20 + 3)
+        self.assertEqual(report['message_bytes'] - report['stored_bytes'], 19 * len(prompt))
+        self.assertGreater(report['ratio'], 10)
+
+    def test_messages_without_string_content_are_kept(self):
+        self.write_json('c.json', {"durian": {"context": [{"role": "user", "content": [{"type": "text", "text": "Hi"}]},
+                                                          {"role": "user", "content": "Hi"}, "not a message"]}})
+        ContextIndex.build(self.folder)
+        self.assertEqual(ContextIndex.lookup(self.index_path, 'durian')['context'],
+                         [{"role": "user", "content": [{"type": "text", "text": "Hi"}]},
+                          {"role": "user", "content": "Hi"}, "not a message"])
+
+    def test_invalid_index_raises(self):
+        with open(self.index_path, 'wb') as file:
+            file.write(b'not an index')
+        with self.assertRaises(ValueError):
+            ContextIndex.lookup(self.index_path, 'banana')
+
+    def test_load_context_uses_fresh_index_only(self):
+        ContextIndex.build(self.folder)
+        with patch.object(ContextManager, 'load_context_data') as mock_load_context_data:
+            context_data = ContextManager.load_context(self.folder, 'banana')
+            mock_load_context_data.assert_not_called()
+        self.assertEqual(list(context_data), ['banana'])
+        self.assertEqual(ContextManager.get_specific_context(context_data, 'banana'),
+                         [{"role": "system", "content": "You are a helpful assistant."}])
+        self.assertEqual(ContextManager.load_context(self.folder, 'durian'), {})
+
+    def test_load_context_falls_back_without_index(self):
+        self.assertEqual(list(ContextManager.load_context(self.folder, 'cherry')), ['cherry'])
+        ContextIndex.build(self.folder)
+        self.write_json('b.json', {"cherry": {"context": [{"role": "user", "content": "Changed"}]}})
+        index_mtime = os.stat(self.index_path).st_mtime
+        os.utime(os.path.join(self.folder, 'b.json'), (index_mtime + 10, index_mtime + 10))
+        context_data = ContextManager.load_context(self.folder, 'cherry')
+        self.assertEqual(context_data['cherry']['context'][0]['content'], 'Changed')
+
+if __name__ == '__main__':
+    unittest.main()
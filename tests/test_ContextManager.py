@@ -52,6 +52,7 @@ class TestContextManager(unittest.TestCase):
     def tearDown(self):
         # Cleanup the temporary directory
         self.test_dir.cleanup()
+        ContextManager.invalidate_cache()
 
     def test_load_context_data(self):
         context_data = ContextManager.load_context_data(self.test_dir.name)
@@ -80,6 +81,47 @@ class TestContextManager(unittest.TestCase):
         }
         self.assertEqual(context_data, expected_data)
 
+    def test_unchanged_files_are_parsed_once(self):
+        ContextManager.invalidate_cache()
+        first = ContextManager.load_context_data(self.test_dir.name)
+        stats = ContextManager.get_cache_stats()
+        second = ContextManager.load_context_data(self.test_dir.name)
+        self.assertEqual(first, second)
+        after = ContextManager.get_cache_stats()
+        self.assertEqual(after['misses'], stats['misses'])
+        self.assertEqual(after['hits'] - stats['hits'], 4)
+        self.assertEqual(after['files'], 4)
+
+    def test_modified_file_is_parsed_again(self):
+        ContextManager.load_context_data(self.test_dir.name)
+        with open(os.path.join(self.test_dir.name, 'context1.json'), 'w') as f:
+            json.dump({"cherry": {"context": []}}, f)
+        context_data = ContextManager.load_context_data(self.test_dir.name)
+        self.assertIn('cherry', context_data)
+        self.assertNotIn('banana', context_data)
+
+    def test_identical_strings_are_shared(self):
+        prompt = "You are a careful reviewer. " * 50
+        for file_name, context_name in (('review1.json', 'review_a'), ('review2.json', 'review_b')):
+            with open(os.path.join(self.test_dir.name, file_name), 'w') as f:
+                json.dump({context_name: {"context": [{"role": "system", "content": prompt}]}}, f)
+        context_data = ContextManager.load_context_data(self.test_dir.name)
+        first = context_data['review_a']['context'][0]
+        second = context_data['review_b']['context'][0]
+        self.assertEqual(first['content'], prompt)
+        self.assertIs(first['content'], second['content'])
+        self.assertIs(first['role'], context_data['apple']['context'][0]['role'])
+
+    def test_invalidate_cache(self):
+        ContextManager.load_context_data(self.test_dir.name)
+        ContextManager.invalidate_cache(os.path.join(self.test_dir.name, 'context1.json'))
+        self.assertEqual(ContextManager.get_cache_stats()['files'], 3)
+        ContextManager.invalidate_cache(self.test_dir.name)
+        self.assertEqual(ContextManager.get_cache_stats()['files'], 0)
+        misses = ContextManager.get_cache_stats()['misses']
+        ContextManager.load_context_data(self.test_dir.name)
+        self.assertEqual(ContextManager.get_cache_stats()['misses'] - misses, 4)
+
     def test_load_context_data_with_empty_file(self):
         context_data = ContextManager.load_context_data(self.test_dir.name)
         self.assertNotIn('empty', context_data)
@@ -140,5 +182,18 @@ class TestContextManager(unittest.TestCase):
         specific_context = ContextManager.get_specific_context(context_data, 'empty_context', n=3)
         self.assertEqual(specific_context, [None])
 
+    def test_get_specific_context_with_token_budget(self):
+        context_data = ContextManager.load_context_data(self.test_dir.name)
+        full_context = ContextManager.get_specific_context(context_data, 'apple')
+        self.assertEqual(len(full_context), 6)
+        # Overhead 3, system message 10, and the last three user/assistant messages (8 + 7 + 9).
+        specific_context = ContextManager.get_specific_context(context_data, 'apple', max_tokens=3 + 10 + 8 + 7 + 9)
+        self.assertEqual(specific_context, [full_context[0]] + full_context[-3:])
+        # Room for the last two, but the window must not start with an assistant message.
+        specific_context = ContextManager.get_specific_context(context_data, 'apple', max_tokens=3 + 10 + 7 + 9)
+        self.assertEqual(specific_context, [full_context[0]] + full_context[-1:])
+        specific_context = ContextManager.get_specific_context(context_data, 'apple', max_tokens=0)
+        self.assertEqual(specific_context, [full_context[0]])
+
 if __name__ == "__main__":
     unittest.main()
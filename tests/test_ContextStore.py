@@ -0,0 +1,125 @@
+import unittest
+import tempfile
+import os
+import json
+import sqlite3
+import contextlib
+from unittest.mock import patch
+from AutoChatBot.ContextStore import ContextStore
+from AutoChatBot.ContextIndex import ContextIndex
+from AutoChatBot.ContextManager import ContextManager
+
+class TestContextStore(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.folder = self.test_dir.name
+        with open(os.path.join(self.folder, 'contexts.json'), 'w') as file:
+            json.dump({
+                "gen_unittest": {
+                    "description": "Write unit tests for a function",
+                    "tags": ["testing", "unit test"],
+                    "id": "1",
+                    "context": [{"role": "system", "content": "You write Python unittest cases."}]
+                },
+                "add_docstrings": {
+                    "description": "Add docstrings to a class",
+                    "tags": ["documentation"],
+                    "context": [
+                        {"role": "system", "content": "You document code."},
+                        {"role": "user", "content": "Explain what the tests cover."},
+                        {"role": "assistant", "content": "Done."}
+                    ]
+                },
+                "translate": {"description": "Translate text", "context": []}
+            }, file)
+        self.db_path = ContextStore.get_db_path(self.folder)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+        ContextManager.invalidate_cache()
+
+    def test_build_and_load_context(self):
+        self.assertEqual(ContextStore.build(self.folder), 3)
+        self.assertTrue(ContextStore.is_fresh(self.folder))
+        context_data = ContextStore.load_context(self.db_path, 'add_docstrings')
+        self.assertEqual(list(context_data), ['add_docstrings'])
+        self.assertEqual(ContextManager.retrieve_context(context_data, 'add_docstrings')['description'], "Add docstrings to a class")
+        self.assertEqual(len(ContextManager.get_specific_context(context_data, 'add_docstrings', n=1)), 2)
+        self.assertEqual(ContextStore.load_context(self.db_path, 'missing'), {})
+
+    def test_shared_message_contents_are_stored_once(self):
+        prompt = "You are a careful reviewer. " * 100
+        with open(os.path.join(self.folder, 'reviews.json'), 'w') as file:
+            json.dump({f"review_{i}": {"context": [{"role": "system", "content": prompt}]} for i in range(20)}, file)
+        ContextStore.build(self.folder)
+        with contextlib.closing(sqlite3.connect(self.db_path)) as connection:
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM strings WHERE content = ?", (prompt,)).fetchone()[0], 1)
+        self.assertEqual(ContextStore.load_context(self.db_path, 'review_3'),
+                         {'review_3': {"context": [{"role": "system", "content": prompt}]}})
+        report = ContextStore.get_report(self.db_path)
+        self.assertEqual((report['messages'], report['strings']), (24, 5))
+        self.assertGreater(report['ratio'], 10)
+
+    def test_search_ranks_metadata_matches_first(self):
+        ContextStore.build(self.folder)
+        results = ContextStore.search(self.db_path, 'unit tests')
+        self.assertEqual([result['name'] for result in results], ['gen_unittest', 'add_docstrings'])
+        self.assertEqual(results[0]['tags'], ["testing", "unit test"])
+        self.assertGreater(results[0]['score'], results[1]['score'])
+        self.assertEqual(ContextStore.search(self.db_path, 'docstrings')[0]['name'], 'add_docstrings')
+        self.assertEqual(ContextStore.search(self.db_path, 'nothing matches "this"'), [])
+        self.assertEqual(ContextStore.search(self.db_path, '***'), [])
+
+    def test_search_without_fts5(self):
+        with patch.object(ContextStore, '_create_fts_table', return_value=False):
+            ContextStore.build(self.folder)
+        results = ContextStore.search(self.db_path, 'unit tests')
+        self.assertEqual(results[0]['name'], 'gen_unittest')
+        self.assertEqual([result['name'] for result in ContextStore.search(self.db_path, 'explain')], ['add_docstrings'])
+
+    def test_stale_store_is_rebuilt_by_search_contexts(self):
+        self.assertFalse(ContextStore.is_fresh(self.folder))
+        results = ContextManager.search_contexts(self.folder, 'translate')
+        self.assertEqual(results[0]['name'], 'translate')
+        self.assertTrue(ContextStore.is_fresh(self.folder))
+        with patch.object(ContextManager, 'load_context_data') as mock_load_context_data:
+            self.assertEqual(list(ContextManager.load_context(self.folder, 'translate')), ['translate'])
+            mock_load_context_data.assert_not_called()
+
+    def test_freshness_is_checked_once_per_database(self):
+        ContextStore.build(self.folder)
+        self.assertTrue(ContextStore.is_fresh(self.folder))
+        with patch.object(ContextIndex, 'get_source_signature') as mock_get_source_signature:
+            for _ in range(3):
+                ContextManager.select_context(self.folder, "translate")
+            mock_get_source_signature.assert_not_called()
+
+        with open(os.path.join(self.folder, 'more.json'), 'w') as file:
+            json.dump({"summarize": {"context": []}}, file)
+        self.assertTrue(ContextStore.is_fresh(self.folder))
+        self.assertFalse(ContextStore.is_fresh(self.folder, recheck=True))
+        ContextStore.build(self.folder)  # replacing the database drops the earlier result
+        self.assertTrue(ContextStore.is_fresh(self.folder))
+        with open(os.path.join(self.folder, 'more.json'), 'w') as file:
+            json.dump({"summarize": {"context": []}, "outline": {"context": []}}, file)
+        ContextManager.invalidate_cache(os.path.join(self.folder, 'more.json'))
+        self.assertFalse(ContextStore.is_fresh(self.folder))
+
+    def test_select_context(self):
+        self.assertEqual(ContextManager.select_context(self.folder, "Please add docstrings to my class"), 'add_docstrings')
+        self.assertEqual(ContextManager.select_context(self.folder, "Write unit tests for this function"), 'gen_unittest')
+        self.assertIsNone(ContextManager.select_context(self.folder, "zebra"))
+
+    def test_rebuild_while_reading(self):
+        ContextStore.build(self.folder)
+        self.assertEqual(len(ContextStore.search(self.db_path, 'translate')), 1)
+        with contextlib.closing(sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)) as connection:
+            with open(os.path.join(self.folder, 'more.json'), 'w') as file:
+                json.dump({"summarize": {"description": "Translate and summarize", "context": []}}, file)
+            ContextStore.build(self.folder)
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM contexts").fetchone()[0], 3)
+        self.assertEqual(len(ContextStore.search(self.db_path, 'translate')), 2)
+
+if __name__ == '__main__':
+    unittest.main()
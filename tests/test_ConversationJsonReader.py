@@ -2,6 +2,7 @@ import unittest
 import os
 import tempfile
 import json
+from unittest.mock import patch
 from AutoChatBot.ConversationJsonReader import ConversationJsonReader
 
 class TestConversationJsonReader(unittest.TestCase):
@@ -82,5 +83,68 @@ class TestConversationJsonReader(unittest.TestCase):
         with self.assertRaises(ValueError):
             ConversationJsonReader.read_file(self.json_file_single_correct_path, is_single_file=True, subdirectory_name="non_existent_subdirectory")
 
+    def write(self, file_name, text):
+        path = os.path.join(self.temp_dir.name, file_name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_messages_spanning_chunks(self):
+        conversation = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " + "x" * (i * 7)} for i in range(200)]
+        path = self.write('long.json', json.dumps(conversation, indent=2))
+        self.assertEqual(list(ConversationJsonReader.iter_messages(path, chunk_size=16)), conversation)
+        self.assertEqual(ConversationJsonReader.read_file(path), conversation)
+
+    def test_empty_and_whitespace_conversations(self):
+        self.assertEqual(ConversationJsonReader.read_file(self.write('empty_list.json', ' [ ] \n')), [])
+        self.assertEqual(ConversationJsonReader.read_file(self.write('bom.json', '\ufeff[{"role": "user", "content": "Hi"}]')),
+                         [{"role": "user", "content": "Hi"}])
+
+    def test_invalid_json_is_rejected(self):
+        for text in ('', 'Plain text question', '[', '[{"role": "user", "content": "Hi"}', '[{"role": "user", "content": "Hi"},]',
+                     '[{"role": "user", "content": "Hi"}] extra', '[{"role": "user", "content": "Hi"} {"role": "user", "content": "Hi"}]',
+                     '[INST] Write a function [/INST]', '["Hi"]', '[{"role": "user", "content": tru}]'):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    ConversationJsonReader.read_file(self.write('invalid.json', text))
+
+    def test_invalid_message_is_reported_before_the_rest_is_read(self):
+        path = self.write('invalid_first.json', json.dumps([{"role": "user"}] + [{"role": "user", "content": "x" * 1000}] * 1000))
+        messages = ConversationJsonReader.iter_messages(path, chunk_size=64)
+        with self.assertRaises(ValueError):
+            next(messages)
+
+    def test_non_json_input_is_rejected_without_parsing(self):
+        path = self.write('question.txt', "Why does my code fail?\n" * 100000)
+        with patch.object(json.JSONDecoder, 'raw_decode') as mock_raw_decode:
+            with self.assertRaises(ValueError):
+                ConversationJsonReader.read_file(path)
+            mock_raw_decode.assert_not_called()
+
+    def test_last_n_keeps_leading_system_messages(self):
+        conversation = [{"role": "system", "content": "Be brief."}] + [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": str(i)} for i in range(11)
+        ]
+        path = self.write('tail.json', json.dumps(conversation))
+        self.assertEqual(ConversationJsonReader.read_file(path, last_n=3), [conversation[0]] + conversation[-3:])
+        # The tail does not start with an assistant message
+        self.assertEqual(ConversationJsonReader.read_file(path, last_n=2), [conversation[0]] + conversation[-1:])
+        self.assertEqual(ConversationJsonReader.read_file(path, last_n=100), conversation)
+
+    def test_max_tokens_keeps_newest_messages_that_fit(self):
+        conversation = [{"role": "system", "content": "Be brief."}] + [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": "x" * 40} for i in range(9)
+        ]
+        path = self.write('budget.json', json.dumps(conversation))
+        # Overhead 3, system message 4 + 3, three messages of 4 + 10 each
+        self.assertEqual(ConversationJsonReader.read_file(path, max_tokens=3 + 7 + 3 * 14), [conversation[0]] + conversation[-3:])
+        # The last message is kept even if it does not fit
+        self.assertEqual(ConversationJsonReader.read_file(path, max_tokens=0), [conversation[0]] + conversation[-1:])
+
+    def test_tail_of_single_file_context(self):
+        conversations = ConversationJsonReader.read_file(self.json_file_single_correct_path, is_single_file=True,
+                                                         subdirectory_name="subdirectory_name", last_n=1)
+        self.assertEqual(conversations, [{"role": "system", "content": "Hello! How can I help you today?"}])
+
 if __name__ == '__main__':
     unittest.main()
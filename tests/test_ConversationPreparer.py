@@ -0,0 +1,109 @@
+import unittest
+import tempfile
+import os
+import json
+from AutoChatBot.ConversationPreparer import ConversationPreparer
+from AutoChatBot.ContextManager import ContextManager
+from AutoChatBot.SessionStore import SessionStore
+
+class TestConversationPreparer(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.test_dir.name, 'context'))
+        with open(os.path.join(self.test_dir.name, 'context', 'context.json'), 'w') as file:
+            json.dump({
+                "troubleshootError": {
+                    "description": "Explain and fix an error traceback",
+                    "tags": ["error", "debugging"],
+                    "context": [{"role": "system", "content": "You fix Python errors."}]
+                },
+                "generate_unit_test": {
+                    "description": "Generate a unit test",
+                    "tags": ["testing"],
+                    "context": [{"role": "system", "content": "You write unittest test cases."}]
+                }
+            }, file)
+        self.cwd = os.getcwd()
+        os.chdir(self.test_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.test_dir.cleanup()
+        ContextManager.invalidate_cache()
+
+    def test_str_to_dict_list(self):
+        self.assertEqual(ConversationPreparer.str_to_dict_list("Hi"), [{"role": "user", "content": "Hi"}])
+
+    def test_decide_conversation_reads_tail_of_json_file(self):
+        conversation = [{"role": "system", "content": "Be brief."}] + [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": str(i)} for i in range(5)
+        ]
+        with open('conversation.json', 'w') as file:
+            json.dump(conversation, file)
+        self.assertEqual(ConversationPreparer.decide_conversation(file_path='conversation.json'), conversation)
+        self.assertEqual(ConversationPreparer.decide_conversation(file_path='conversation.json', last_n=1),
+                         [conversation[0], conversation[-1]])
+        with open('question.txt', 'w') as file:
+            file.write("[Draft] Why does this fail?")
+        self.assertEqual(ConversationPreparer.decide_conversation(file_path='question.txt', last_n=1),
+                         "[Draft] Why does this fail?")
+
+    def test_load_session(self):
+        SessionStore.configure('sessions')
+        try:
+            self.assertEqual(ConversationPreparer.load_session('chat', [{"role": "user", "content": "Hi"}]), [])
+            SessionStore.append_turn('chat', [{"role": "user", "content": "x" * 40}], {"role": "assistant", "content": "y" * 40})
+            new = [{"role": "user", "content": "And now?"}]
+            self.assertEqual(len(ConversationPreparer.load_session('chat', new)), 2)
+            # Overhead 3, the new message 4 + 2, and the turn (4 + 10) * 2
+            self.assertEqual(len(ConversationPreparer.load_session('chat', new, max_tokens=3 + 6 + 28)), 2)
+            self.assertEqual(ConversationPreparer.load_session('chat', new, max_tokens=3 + 6 + 27), [])
+        finally:
+            SessionStore.configure(SessionStore.DEFAULT_DIR)
+
+    def test_extend_context_by_name(self):
+        conversation = [{"role": "user", "content": "Hi"}]
+        extended = ConversationPreparer.extend_context('generate_unit_test', conversation)
+        self.assertEqual(extended, [{"role": "system", "content": "You write unittest test cases."}] + conversation)
+
+    def test_extend_context_auto(self):
+        conversation = [{"role": "user", "content": "I get this error traceback: ZeroDivisionError"}]
+        extended = ConversationPreparer.extend_context('auto', conversation)
+        self.assertEqual(extended[0], {"role": "system", "content": "You fix Python errors."})
+        conversation = [{"role": "user", "content": "Write a unit test for my stack"}]
+        self.assertEqual(ConversationPreparer.extend_context('auto', conversation)[0]['content'], "You write unittest test cases.")
+
+    def test_extend_context_auto_without_match(self):
+        conversation = [{"role": "user", "content": "zebra"}]
+        self.assertEqual(ConversationPreparer.extend_context('auto', conversation), conversation)
+
+    def test_extend_context_with_token_budget(self):
+        conversation = [{"role": "user", "content": "Hi"}]
+        extended = ConversationPreparer.extend_context('generate_unit_test', conversation, max_tokens=0)
+        self.assertEqual(extended, [{"role": "system", "content": "You write unittest test cases."}] + conversation)
+
+    def test_get_token_budget(self):
+        self.assertEqual(ConversationPreparer.get_token_budget('openai', 385), 16000)
+        self.assertEqual(ConversationPreparer.get_token_budget('openai', 385, context_tokens=1000), 1000)
+        self.assertIsNone(ConversationPreparer.get_token_budget('local', 100))
+        self.assertIsNone(ConversationPreparer.get_token_budget('unknown', 100))
+
+    def test_fit_to_token_budget_keeps_system_and_last_message(self):
+        conversation = [
+            {"role": "system", "content": "s" * 8},
+            {"role": "user", "content": "a" * 400},
+            {"role": "assistant", "content": "b" * 400},
+            {"role": "user", "content": "c" * 8},
+            {"role": "assistant", "content": "d" * 8},
+            {"role": "user", "content": "task"},
+        ]
+        self.assertIs(ConversationPreparer.fit_to_token_budget(conversation, None), conversation)
+        self.assertIs(ConversationPreparer.fit_to_token_budget(conversation, 10000), conversation)
+        fitted = ConversationPreparer.fit_to_token_budget(conversation, 40)
+        self.assertEqual(fitted, [conversation[0]] + conversation[3:])
+        fitted = ConversationPreparer.fit_to_token_budget(conversation, 1)
+        self.assertEqual(fitted, [conversation[0], conversation[-1]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import patch
+from AutoChatBot.Deadline import Deadline
+
+class TestDeadline(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 100.0
+        patcher = patch('AutoChatBot.Deadline.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_without_seconds_never_expires(self):
+        deadline = Deadline()
+        self.now += 10 ** 6
+        self.assertIsNone(deadline.remaining())
+        self.assertFalse(deadline.expired())
+        self.assertEqual(deadline.cap(30), 30)
+        deadline.check()
+
+    def test_remaining_and_expiry(self):
+        deadline = Deadline(60)
+        self.now += 45
+        self.assertAlmostEqual(deadline.remaining(), 15)
+        self.assertFalse(deadline.expired())
+        self.now += 20
+        self.assertEqual(deadline.remaining(), 0.0)
+        self.assertTrue(deadline.expired())
+
+    def test_cap_shortens_timeouts(self):
+        deadline = Deadline(20)
+        self.assertEqual(deadline.cap(120), 20)
+        self.assertEqual(deadline.cap(10), 10)
+        self.assertEqual(deadline.cap(None), 20)
+
+    def test_check_raises_timeout_error_once_expired(self):
+        deadline = Deadline(1)
+        deadline.check()
+        self.now += 2
+        with self.assertRaises(TimeoutError):
+            deadline.check("the retry")
+
+    def test_rejects_non_positive_seconds(self):
+        with self.assertRaises(ValueError):
+            Deadline(0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,9 @@ import unittest
 import tempfile
 import os
 import json
+import time
+import contextlib
+import io
 from AutoChatBot.DirectoryToJsonConverter import DirectoryToJsonConverter
 
 class TestDirectoryToJsonConverter(unittest.TestCase):
@@ -120,6 +123,48 @@ class TestDirectoryToJsonConverterSingle(unittest.TestCase):
             }
             self.assertEqual(output_data, expected_output_data, "The output JSON file does not have the expected content.")
 
+    def test_incremental_rebuilds_only_changed_subdirectories(self):
+        with tempfile.TemporaryDirectory() as output_directory:
+            output_json_path = os.path.join(output_directory, 'context.json')
+            full_path = os.path.join(output_directory, 'full.json')
+            result = DirectoryToJsonConverter.convert_directories_to_single_json(self.input_directory.name, output_json_path, incremental=True)
+            self.assertEqual(result, {'folders': 2, 'rebuilt': 2})
+
+            result = DirectoryToJsonConverter.convert_directories_to_single_json(self.input_directory.name, output_json_path, incremental=True)
+            self.assertEqual(result, {'folders': 2, 'rebuilt': 0})
+
+            subdir2 = os.path.join(self.input_directory.name, 'subdir2')
+            with open(os.path.join(subdir2, 'role_2.txt'), 'w') as f:
+                f.write('role_2_string')
+            with open(os.path.join(subdir2, 'content_2.txt'), 'w') as f:
+                f.write('content_2_string')
+            os.makedirs(os.path.join(self.input_directory.name, 'subdir3'))
+            result = DirectoryToJsonConverter.convert_directories_to_single_json(self.input_directory.name, output_json_path, incremental=True)
+            self.assertEqual(result, {'folders': 3, 'rebuilt': 2})
+
+            DirectoryToJsonConverter.convert_directories_to_single_json(self.input_directory.name, full_path)
+            with open(output_json_path) as incremental_fp, open(full_path) as full_fp:
+                output_data = json.load(incremental_fp)
+                self.assertEqual(output_data, json.load(full_fp))
+            self.assertEqual(len(output_data['subdir2']['context']), 2)
+            self.assertEqual(output_data['subdir3'], {'context': []})
+
+    def test_incremental_skips_touched_but_unchanged_files(self):
+        with tempfile.TemporaryDirectory() as output_directory:
+            output_json_path = os.path.join(output_directory, 'context.json')
+            DirectoryToJsonConverter.convert_directories_to_single_json(self.input_directory.name, output_json_path, incremental=True)
+            description_file = os.path.join(self.input_directory.name, 'subdir1', 'description.txt')
+            stat = os.stat(description_file)
+            os.utime(description_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            result = DirectoryToJsonConverter.convert_directories_to_single_json(self.input_directory.name, output_json_path, incremental=True)
+            self.assertEqual(result, {'folders': 2, 'rebuilt': 0})
+
+            os.remove(description_file)
+            result = DirectoryToJsonConverter.convert_directories_to_single_json(self.input_directory.name, output_json_path, incremental=True)
+            self.assertEqual(result, {'folders': 2, 'rebuilt': 1})
+            with open(output_json_path) as f:
+                self.assertNotIn('description', json.load(f)['subdir1'])
+
 class TestDirectoryToJsonConverterBasedOnMode(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -196,5 +241,72 @@ class TestDirectoryToJsonConverterBasedOnMode(unittest.TestCase):
             }
             self.assertEqual(json_data, expected_data)
 
+class TestDirectoryToJsonConverterParallel(unittest.TestCase):
+    """
+    The parallel conversion must produce byte-identical output to the serial one. Set
+    AUTOCHATBOT_BENCHMARK=1 to also time both on a synthetic library of 2000 folders with 30 turns each.
+    """
+
+    @staticmethod
+    def make_library(input_directory, folders, turns):
+        for folder in range(folders):
+            subdir_path = os.path.join(input_directory, f'context_{folder:05d}')
+            os.makedirs(subdir_path)
+            with open(os.path.join(subdir_path, 'description.txt'), 'w') as f:
+                f.write(f'Synthetic context {folder}')
+            for turn in range(1, turns + 1):
+                with open(os.path.join(subdir_path, f'role_{turn}.txt'), 'w') as f:
+                    f.write('user' if turn % 2 else 'assistant')
+                with open(os.path.join(subdir_path, f'content_{turn}.txt'), 'w') as f:
+                    f.write(f'Message {turn} of context {folder}\n' * 5)
+
+    @staticmethod
+    def read_bytes(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def convert(self, input_directory, output_directory, max_workers):
+        single_path = os.path.join(output_directory, f'single_{max_workers}', 'context.json')
+        multiple_path = os.path.join(output_directory, f'multiple_{max_workers}')
+        with contextlib.redirect_stdout(io.StringIO()):
+            start_time = time.perf_counter()
+            DirectoryToJsonConverter.convert_directories_to_single_json(input_directory, single_path, max_workers=max_workers)
+            single_time = time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            DirectoryToJsonConverter.convert_directories_to_json(input_directory, multiple_path, max_workers=max_workers)
+            multiple_time = time.perf_counter() - start_time
+        return single_path, multiple_path, single_time, multiple_time
+
+    def assert_identical(self, input_directory, output_directory, max_workers):
+        serial = self.convert(input_directory, output_directory, 1)
+        parallel = self.convert(input_directory, output_directory, max_workers)
+        self.assertEqual(self.read_bytes(serial[0]), self.read_bytes(parallel[0]))
+        self.assertEqual(sorted(os.listdir(serial[1])), sorted(os.listdir(parallel[1])))
+        for file_name in os.listdir(serial[1]):
+            self.assertEqual(self.read_bytes(os.path.join(serial[1], file_name)),
+                             self.read_bytes(os.path.join(parallel[1], file_name)))
+        return serial, parallel
+
+    def test_parallel_output_is_byte_identical(self):
+        with tempfile.TemporaryDirectory() as input_directory, tempfile.TemporaryDirectory() as output_directory:
+            self.make_library(input_directory, folders=40, turns=12)
+            serial, _ = self.assert_identical(input_directory, output_directory, max_workers=8)
+            with open(serial[0]) as f:
+                self.assertEqual(list(json.load(f)), [f'context_{folder:05d}' for folder in range(40)])
+
+    def test_invalid_worker_count(self):
+        with tempfile.TemporaryDirectory() as input_directory, tempfile.TemporaryDirectory() as output_directory:
+            with self.assertRaises(ValueError):
+                DirectoryToJsonConverter.convert_directories_to_single_json(
+                    input_directory, os.path.join(output_directory, 'context.json'), max_workers=0)
+
+    @unittest.skipUnless(os.environ.get('AUTOCHATBOT_BENCHMARK'), "Set AUTOCHATBOT_BENCHMARK=1 to run the benchmark.")
+    def test_benchmark_large_library(self):
+        with tempfile.TemporaryDirectory() as input_directory, tempfile.TemporaryDirectory() as output_directory:
+            self.make_library(input_directory, folders=2000, turns=30)
+            serial, parallel = self.assert_identical(input_directory, output_directory, max_workers=8)
+            print(f"\nsingle:   serial {serial[2]:.2f}s, 8 workers {parallel[2]:.2f}s")
+            print(f"multiple: serial {serial[3]:.2f}s, 8 workers {parallel[3]:.2f}s")
+
 if __name__ == '__main__':
     unittest.main()
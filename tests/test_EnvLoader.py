@@ -0,0 +1,28 @@
+import unittest
+import os
+from unittest.mock import patch
+from AutoChatBot.EnvLoader import EnvLoader
+
+class TestEnvLoader(unittest.TestCase):
+
+    def setUp(self):
+        EnvLoader.reset()
+
+    def tearDown(self):
+        EnvLoader.reset()
+
+    @patch('dotenv.load_dotenv')
+    def test_dotenv_is_loaded_once(self, mock_load_dotenv):
+        EnvLoader.getenv("OPENAI_API_KEY")
+        EnvLoader.getenv("TOGETHERAI_API_KEY")
+        EnvLoader.load()
+        mock_load_dotenv.assert_called_once_with()
+
+    @patch('dotenv.load_dotenv')
+    def test_getenv_reads_environment(self, mock_load_dotenv):
+        with patch.dict(os.environ, {'ENVLOADER_TEST_VALUE': 'from-env'}):
+            self.assertEqual(EnvLoader.getenv("ENVLOADER_TEST_VALUE"), "from-env")
+            self.assertEqual(EnvLoader.getenv("ENVLOADER_TEST_MISSING", "default"), "default")
+
+if __name__ == '__main__':
+    unittest.main()
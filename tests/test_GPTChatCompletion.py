@@ -1,6 +1,13 @@
 import unittest
 from dotenv import load_dotenv
 import os
+import sys
+import subprocess
+import requests
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
 from AutoChatBot.GPTChatCompletion import GPT3ChatCompletion  # Adjust the import according to your module path
 
 class TestGPT3ChatCompletion(unittest.TestCase):
@@ -57,5 +64,63 @@ class TestGPT3ChatCompletion(unittest.TestCase):
         with self.assertRaises(ValueError, msg="Invalid response format"):
             GPT3ChatCompletion.extract_text_from_response(invalid_response)
 
+
+class TestGPT3ChatCompletionErrors(unittest.TestCase):
+    def test_error_from_response(self):
+        response = requests.Response()
+        response.status_code = 429
+        response.reason = 'Too Many Requests'
+        response.headers['Retry-After'] = '7'
+        response._content = b'{"error": {"message": "Rate limit reached", "type": "requests"}}'
+        error = GPT3ChatCompletion.error_from_response(response)['error']
+        self.assertEqual(error['status_code'], 429)
+        self.assertEqual(error['retry_after'], '7')
+        self.assertEqual(error['message'], 'Rate limit reached')
+
+    def test_error_from_response_without_json_body(self):
+        response = requests.Response()
+        response.status_code = 502
+        response.reason = 'Bad Gateway'
+        response._content = b'<html>bad gateway</html>'
+        error = GPT3ChatCompletion.error_from_response(response)['error']
+        self.assertEqual(error['message'], '502 Bad Gateway')
+        self.assertEqual(error['type'], 'request_error')
+
+class TestGPT3ChatCompletionCommandLine(unittest.TestCase):
+    def test_runs_as_module(self):
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run(
+            [sys.executable, '-m', 'AutoChatBot.GPTChatCompletion', '--help'],
+            cwd=project_root, capture_output=True, text=True, timeout=60
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('--question', result.stdout)
+
+class EventStreamHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for content in ["h\u00e9llo", " \u2713"]:
+            event = json.dumps({"choices": [{"delta": {"content": content}}]}, ensure_ascii=False)
+            self.wfile.write(f"data: {event}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, format, *args):
+        pass
+
+class TestGPT3ChatCompletionStream(unittest.TestCase):
+    def test_stream_without_charset_is_decoded_as_utf8(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), EventStreamHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            with patch.object(GPT3ChatCompletion, 'API_URL', f"http://127.0.0.1:{server.server_port}/v1/chat/completions"):
+                tokens = list(GPT3ChatCompletion.stream_api_request("key", [{"role": "user", "content": "Hi"}]))
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual("".join(tokens), "h\u00e9llo \u2713")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import threading
+import time
+import requests
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from AutoChatBot.HTTPSessionPool import HTTPSessionPool
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StalledHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(1)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestHTTPSessionPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def tearDown(self):
+        HTTPSessionPool.close_all()
+        HTTPSessionPool._pool_sizes.clear()
+        HTTPSessionPool._closed_totals.clear()
+        HTTPSessionPool._timeout = HTTPSessionPool.DEFAULT_TIMEOUT
+
+    def test_get_session_returns_shared_session(self):
+        session_1 = HTTPSessionPool.get_session('test_provider')
+        session_2 = HTTPSessionPool.get_session('test_provider')
+        self.assertIs(session_1, session_2)
+        self.assertIsNot(session_1, HTTPSessionPool.get_session('other_provider'))
+
+    def test_connections_are_reused(self):
+        session = HTTPSessionPool.get_session('test_provider')
+        for _ in range(3):
+            response = session.get(self.url)
+            self.assertEqual(response.json(), {"ok": True})
+
+        stats = HTTPSessionPool.get_stats('test_provider')['test_provider']
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['connections'], 1)
+        self.assertEqual(stats['reused'], 2)
+
+    def test_stats_keep_closed_and_evicted_pools(self):
+        HTTPSessionPool.configure('test_provider', 1)
+        session = HTTPSessionPool.get_session('test_provider')
+        session.get(self.url)
+        session.get(self.url.replace('127.0.0.1', 'localhost'))  # a second host evicts the first pool
+        HTTPSessionPool.close_all()
+        HTTPSessionPool.get_session('test_provider').get(self.url)
+
+        stats = HTTPSessionPool.get_stats()['test_provider']
+        self.assertEqual((stats['requests'], stats['connections']), (3, 3))
+
+    def test_configure_sets_pool_size_and_rebuilds_session(self):
+        session = HTTPSessionPool.get_session('test_provider')
+        HTTPSessionPool.configure('test_provider', 4)
+        new_session = HTTPSessionPool.get_session('test_provider')
+        self.assertIsNot(session, new_session)
+        self.assertEqual(HTTPSessionPool.get_stats('test_provider')['test_provider']['pool_size'], 4)
+
+    def test_configure_rejects_invalid_pool_size(self):
+        with self.assertRaises(ValueError):
+            HTTPSessionPool.configure('test_provider', 0)
+
+    def test_get_stats_for_unused_provider(self):
+        stats = HTTPSessionPool.get_stats('unused_provider')
+        self.assertEqual(stats['unused_provider']['requests'], 0)
+        self.assertEqual(stats['unused_provider']['connections'], 0)
+
+    def test_configure_timeout_keeps_unset_values(self):
+        HTTPSessionPool.configure_timeout(read_timeout=30)
+        self.assertEqual(HTTPSessionPool.get_timeout(), (10.0, 30))
+        with self.assertRaises(ValueError):
+            HTTPSessionPool.configure_timeout(connect_timeout=0)
+
+    def test_get_timeout_is_capped_by_deadline(self):
+        class FakeDeadline:
+            def cap(self, seconds):
+                return min(seconds, 5.0)
+        self.assertEqual(HTTPSessionPool.get_timeout(FakeDeadline()), (5.0, 5.0))
+
+    def test_stalled_server_times_out(self):
+        server = HTTPServer(("127.0.0.1", 0), StalledHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            HTTPSessionPool.configure_timeout(read_timeout=0.1)
+            session = HTTPSessionPool.get_session('test_provider')
+            started = time.monotonic()
+            with self.assertRaises(requests.exceptions.Timeout):
+                session.get(f"http://127.0.0.1:{server.server_port}/", timeout=HTTPSessionPool.get_timeout())
+            self.assertLess(time.monotonic() - started, 1)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
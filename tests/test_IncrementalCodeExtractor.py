@@ -0,0 +1,106 @@
+import random
+import unittest
+from AutoChatBot.IncrementalCodeExtractor import IncrementalCodeExtractor
+from AutoChatBot.RemoveLanguageDelimiters import CodeExtractor
+
+class TestIncrementalCodeExtractor(unittest.TestCase):
+
+    TEXT = (
+        "Here is the script:\n"
+        "```python\n"
+        "print('one')\n"
+        "```\n"
+        "And a shell command:\n"
+        "  ~~~~bash\n"
+        "  ls -la\n"
+        "  ~~~~\n"
+        "````\n"
+        "```python\n"
+        "nested\n"
+        "```\n"
+        "````\n"
+        "Done.\n"
+    )
+
+    @staticmethod
+    def split(text, sizes):
+        chunks, position = [], 0
+        for size in sizes:
+            chunks.append(text[position:position + size])
+            position += size
+        chunks.append(text[position:])
+        return chunks
+
+    def test_chunked_matches_extract_blocks(self):
+        expected = CodeExtractor.extract_blocks(self.TEXT)
+        self.assertEqual(len(expected), 3)
+        self.assertEqual(list(IncrementalCodeExtractor.iter_blocks([self.TEXT])), expected)
+        self.assertEqual(list(IncrementalCodeExtractor.iter_blocks(self.TEXT)), expected)  # one character per chunk
+        generator = random.Random(7)
+        for _ in range(200):
+            sizes = [generator.randint(0, 9) for _ in range(len(self.TEXT) // 3)]
+            self.assertEqual(list(IncrementalCodeExtractor.iter_blocks(self.split(self.TEXT, sizes))), expected)
+
+    def test_fence_split_across_chunks(self):
+        chunks = ["text\n`", "`", "`py", "thon\nx = 1\n``", "`\nmore"]
+        blocks = list(IncrementalCodeExtractor.iter_blocks(chunks))
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual(blocks[0]['language'], 'python')
+        self.assertEqual(blocks[0]['code'], 'x = 1')
+        self.assertTrue(blocks[0]['closed'])
+
+    def test_opening_fence_after_text_split_across_chunks(self):
+        text = "Intro\nHere is the fix: ``"
+        chunks = [text, "`py", "thon\nx = 1\n```\nDone."]
+        blocks = list(IncrementalCodeExtractor.iter_blocks(chunks))
+        self.assertEqual(blocks, CodeExtractor.extract_blocks(''.join(chunks)))
+        self.assertEqual((blocks[0]['code'], blocks[0]['start']), ('x = 1', len(text) - 2))
+
+    def test_emits_block_when_closing_fence_arrives(self):
+        extractor = IncrementalCodeExtractor()
+        self.assertEqual(extractor.feed("Intro\n```python\nprint(1)\n"), [])
+        self.assertEqual(extractor.feed("```"), [])  # the line could still go on
+        blocks = extractor.feed("\nThe explanation follows.")
+        self.assertEqual([block['code'] for block in blocks], ['print(1)'])
+        self.assertEqual(blocks[0]['start'], len("Intro\n"))
+        self.assertEqual(extractor.feed(" More explanation.\n"), [])
+        self.assertEqual(extractor.finish(), [])
+
+    def test_language_filter(self):
+        blocks = list(IncrementalCodeExtractor.iter_blocks(self.split(self.TEXT, [5] * 40), language='BASH'))
+        self.assertEqual(blocks, CodeExtractor.extract_blocks(self.TEXT, 'bash'))
+        self.assertEqual([block['code'] for block in blocks], ['ls -la'])
+        self.assertEqual(list(IncrementalCodeExtractor.iter_blocks(self.TEXT, language='rust')), [])
+
+    def test_unclosed_block_is_returned_by_finish(self):
+        extractor = IncrementalCodeExtractor()
+        self.assertEqual(extractor.feed("```python\nprint(1)\nprint(2)\n"), [])
+        blocks = extractor.finish()
+        self.assertEqual(len(blocks), 1)
+        self.assertFalse(blocks[0]['closed'])
+        self.assertEqual(blocks[0]['code'], 'print(1)\nprint(2)')
+        self.assertEqual(extractor.get_buffered_size(), 0)
+
+    def test_closing_fence_without_newline_is_emitted_by_finish(self):
+        extractor = IncrementalCodeExtractor()
+        self.assertEqual(extractor.feed("```\ncode\n```"), [])
+        blocks = extractor.finish()
+        self.assertEqual(blocks, CodeExtractor.extract_blocks("```\ncode\n```"))
+        self.assertTrue(blocks[0]['closed'])
+
+    def test_buffer_is_bounded_by_the_open_block(self):
+        extractor = IncrementalCodeExtractor()
+        prose = "This line is prose and will never be a fence, however long the text gets. " * 20 + "\n"
+        largest = 0
+        for _ in range(7000):  # about 10 MB
+            for position in range(0, len(prose), 64):
+                self.assertEqual(extractor.feed(prose[position:position + 64]), [])
+                largest = max(largest, extractor.get_buffered_size())
+        self.assertLess(largest, 64)
+        extractor.feed("```python\n" + "x = 1\n" * 100)
+        self.assertEqual(extractor.get_buffered_size(), len("```python") + len("x = 1\n") * 100)
+        self.assertEqual(len(extractor.feed("```\n")), 1)
+        self.assertEqual(extractor.get_buffered_size(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
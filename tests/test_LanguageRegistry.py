@@ -0,0 +1,41 @@
+import unittest
+from AutoChatBot.LanguageRegistry import LanguageRegistry
+
+class TestLanguageRegistry(unittest.TestCase):
+
+    def tearDown(self):
+        LanguageRegistry._extensions.pop('.d.ts', None)
+        LanguageRegistry._extensions.pop('.proto', None)
+
+    def test_get_language(self):
+        self.assertEqual(LanguageRegistry.get_language("src/app.py"), "python")
+        self.assertEqual(LanguageRegistry.get_language("include/App.H"), "cpp")
+        self.assertEqual(LanguageRegistry.get_language("build/CMakeLists.txt"), "cmake")
+        self.assertEqual(LanguageRegistry.get_language("docs/README.md"), "markdown")
+        self.assertIsNone(LanguageRegistry.get_language("notes.txt"))
+        self.assertIsNone(LanguageRegistry.get_language("Makefile"))
+
+    def test_longest_extension_wins(self):
+        LanguageRegistry.register('.d.ts', 'typescript-declarations')
+        self.assertEqual(LanguageRegistry.get_language("types/index.d.ts"), "typescript-declarations")
+        self.assertEqual(LanguageRegistry.get_language("src/index.ts"), "typescript")
+
+    def test_extract_content_accepts_aliases(self):
+        response = "Intro\n```bash\nls\n```\n```py\nprint(1)\n```\n"
+        self.assertEqual(LanguageRegistry.extract_content("app.py", response), "print(1)")
+        self.assertEqual(LanguageRegistry.extract_content("run.sh", response), "ls")
+        self.assertIsNone(LanguageRegistry.extract_content("lib.rs", response))
+        self.assertIsNone(LanguageRegistry.extract_content("app.py", "Sure, here is the plan."))
+
+    def test_extract_content_of_unregistered_type_takes_first_block(self):
+        self.assertEqual(LanguageRegistry.extract_content("notes.txt", "Here:\n```\nhello\n```\n"), "hello")
+        self.assertEqual(LanguageRegistry.extract_content("notes.txt", "Updated content"), "Updated content")
+
+    def test_post_process(self):
+        LanguageRegistry.register('.proto', 'protobuf', aliases=('proto',),
+                                  post_process=lambda content, file_path: content + "\n// " + file_path)
+        response = "```proto\nsyntax = \"proto3\";\n```"
+        self.assertEqual(LanguageRegistry.extract_content("api/service.proto", response), 'syntax = "proto3";\n// api/service.proto')
+
+if __name__ == '__main__':
+    unittest.main()
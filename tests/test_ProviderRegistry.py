@@ -0,0 +1,94 @@
+import unittest
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from AutoChatBot.ProviderRegistry import ProviderRegistry
+from AutoChatBot.ChatAPIHandler import ChatAPIHandler
+from AutoChatBot.ParserCreator import ParserCreator
+
+class FakeClient:
+    calls = []
+
+    @staticmethod
+    def load_api_key():
+        return "fake-key"
+
+    @staticmethod
+    def make_api_request(api_key, conversation, model, temperature, max_tokens, timeout=None, top_p=1):
+        FakeClient.calls.append({'api_key': api_key, 'model': model, 'top_p': top_p, 'timeout': timeout})
+        return {'choices': [{'index': 0, 'text': 'legacy completion'}]}
+
+class OpenAICompatibleHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests_seen = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        OpenAICompatibleHandler.requests_seen.append((self.path, body))
+        answer = json.dumps({'choices': [{'message': {'role': 'assistant', 'content': 'local answer'}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(answer)))
+        self.end_headers()
+        self.wfile.write(answer)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestProviderRegistry(unittest.TestCase):
+
+    def tearDown(self):
+        ProviderRegistry._providers.pop('fake', None)
+        FakeClient.calls.clear()
+
+    def test_builtin_providers_are_registered(self):
+        self.assertEqual(ProviderRegistry.names()[:3], ['openai', 'togetherai', 'local'])
+        self.assertTrue(ProviderRegistry.get_capabilities('openai')['streaming'])
+        self.assertEqual(ProviderRegistry.get_capabilities('togetherai')['max_context'], 32768)
+
+    def test_get_unknown_provider_raises(self):
+        with self.assertRaises(ValueError) as context:
+            ProviderRegistry.get('unknown')
+        self.assertIn("'local'", str(context.exception))
+
+    def test_only_accepted_parameters_are_sent_and_response_is_normalized(self):
+        ProviderRegistry.register('fake', FakeClient, parameters=('top_p',), streaming=False)
+        response = ProviderRegistry.make_api_request(
+            'fake', conversation=[], model='m', temperature=0, max_tokens=1, timeout=(1, 2), top_p=0.5, top_k=3
+        )
+        self.assertEqual(FakeClient.calls, [{'api_key': 'fake-key', 'model': 'm', 'top_p': 0.5, 'timeout': (1, 2)}])
+        self.assertEqual(response['choices'][0]['message'], {'role': 'assistant', 'content': 'legacy completion'})
+
+    def test_registered_provider_is_used_by_chat_api_handler_and_parser(self):
+        ProviderRegistry.register('fake', FakeClient, parameters=('top_p',), streaming=False)
+        response = ChatAPIHandler.make_api_request(api='fake', model='m', temperature=0, max_tokens=1, conversation=[])
+        self.assertEqual(response['choices'][0]['message']['content'], 'legacy completion')
+        with self.assertRaises(ValueError):
+            ChatAPIHandler.stream_api_request(api='fake', model='m', temperature=0, max_tokens=1, conversation=[])
+        with patch("sys.argv", ["AutoChatBot", "--api", "fake"]):
+            self.assertEqual(ParserCreator.create_parser().parse_args().api, 'fake')
+
+    def test_local_provider_talks_to_openai_compatible_server(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), OpenAICompatibleHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+        try:
+            with patch.dict(os.environ, {'LOCAL_API_URL': url}):
+                response = ChatAPIHandler.make_api_request(
+                    api='local', model='qwen', temperature=0, max_tokens=5,
+                    conversation=[{"role": "user", "content": "Hi"}], top_k=7
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(response['choices'][0]['message']['content'], 'local answer')
+        path, body = OpenAICompatibleHandler.requests_seen[-1]
+        self.assertEqual(path, '/v1/chat/completions')
+        self.assertEqual(body['model'], 'qwen')
+        self.assertNotIn('top_k', body)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -102,6 +102,16 @@ class TestPyFileExecutor(unittest.TestCase):
 
         self.assertIsNone(error_output)
 
+    def test_save_requires_block(self):
+        save_error = PyFileExecutor.save_code_to_file(self.file_path, "Sure, I can help with that.", require_block=True)
+        self.assertEqual(save_error, PyFileExecutor.get_no_block_error())
+        self.assertFalse(os.path.exists(self.file_path))
+
+        save_error = PyFileExecutor.save_code_to_file(self.file_path, "Here:\n```python\nx = 1\n```\n", require_block=True)
+        self.assertIsNone(save_error)
+        with open(self.file_path) as file:
+            self.assertEqual(file.read(), "x = 1")
+
     def test_is_error(self):
         self.assertTrue(PyFileExecutor.is_error("Error: Something went wrong"))
         self.assertFalse(PyFileExecutor.is_error("All tests ran successfully OK"))
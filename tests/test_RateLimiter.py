@@ -0,0 +1,119 @@
+import unittest
+import os
+import tempfile
+import threading
+from unittest.mock import patch
+from AutoChatBot.RateLimiter import RateLimiter
+from AutoChatBot.ChatAPIHandler import ChatAPIHandler
+from AutoChatBot.Deadline import Deadline
+
+RESPONSE = {'choices': [{'message': {'role': 'assistant', 'content': 'Hello'}}]}
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = patch('AutoChatBot.RateLimiter.time.time', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        RateLimiter.reset()
+
+    def test_unlimited_by_default(self):
+        self.assertEqual(RateLimiter.reserve('openai', 'gpt-3.5-turbo', 10 ** 6), 0.0)
+        self.assertEqual(RateLimiter.get_stats(), {})
+
+    def test_requests_per_minute_burst_then_spacing(self):
+        RateLimiter.configure('openai', requests_per_minute=60)
+        delays = [RateLimiter.reserve('openai', 'm', 1) for _ in range(62)]
+        self.assertEqual(delays[:60], [0.0] * 60)
+        self.assertAlmostEqual(delays[60], 1.0)
+        self.assertAlmostEqual(delays[61], 2.0)
+
+    def test_bucket_refills_over_time(self):
+        RateLimiter.configure('openai', requests_per_minute=60)
+        for _ in range(60):
+            RateLimiter.reserve('openai', 'm', 1)
+        self.now += 5
+        delays = [RateLimiter.reserve('openai', 'm', 1) for _ in range(6)]
+        self.assertEqual(delays[:5], [0.0] * 5)
+        self.assertAlmostEqual(delays[5], 1.0)
+
+    def test_tokens_per_minute(self):
+        RateLimiter.configure('togetherai', tokens_per_minute=6000)
+        self.assertEqual(RateLimiter.reserve('togetherai', 'm', 5000), 0.0)
+        self.assertAlmostEqual(RateLimiter.reserve('togetherai', 'm', 2000), 10.0)
+        stats = RateLimiter.get_stats('togetherai')['togetherai/m']
+        self.assertEqual((stats['requests'], stats['delayed']), (2, 1))
+        self.assertAlmostEqual(stats['wait_time'], 10.0)
+
+    def test_model_limits_override_api_limits_and_buckets_are_per_model(self):
+        RateLimiter.configure('openai', requests_per_minute=1)
+        RateLimiter.configure('openai', requests_per_minute=120, model='fast')
+        self.assertEqual(RateLimiter.get_limits('openai', 'fast'), {'requests': 120})
+        self.assertEqual(RateLimiter.get_limits('openai', 'other'), {'requests': 1})
+        self.assertEqual(RateLimiter.reserve('openai', 'a', 1), 0.0)
+        self.assertEqual(RateLimiter.reserve('openai', 'b', 1), 0.0)
+        self.assertAlmostEqual(RateLimiter.reserve('openai', 'a', 1), 60.0)
+
+    def test_configure_rejects_negative_limits(self):
+        with self.assertRaises(ValueError):
+            RateLimiter.configure('openai', requests_per_minute=-1)
+
+    def test_shared_store_is_shared_between_connections(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, 'ratelimit.db')
+            RateLimiter.configure('openai', requests_per_minute=2)
+            RateLimiter.use_shared_store(db_path)
+            self.assertEqual(RateLimiter.reserve('openai', 'm', 1), 0.0)
+            # Another process starts with empty in-process state but sees the same file.
+            RateLimiter._buckets.clear()
+            self.assertEqual(RateLimiter.reserve('openai', 'm', 1), 0.0)
+            self.assertAlmostEqual(RateLimiter.reserve('openai', 'm', 1), 30.0)
+            self.assertEqual(RateLimiter._buckets, {})
+
+    def test_acquire_can_be_cancelled(self):
+        RateLimiter.configure('openai', requests_per_minute=1)
+        self.assertTrue(RateLimiter.acquire('openai', 'm', 1))
+        cancel_event = threading.Event()
+        cancel_event.set()
+        self.assertFalse(RateLimiter.acquire('openai', 'm', 1, cancel_event=cancel_event))
+
+    def test_acquire_gives_up_beyond_max_wait(self):
+        RateLimiter.configure('openai', requests_per_minute=1)
+        self.assertTrue(RateLimiter.acquire('openai', 'm', 1, max_wait=1))
+        with patch('AutoChatBot.RateLimiter.time.sleep') as mock_sleep:
+            self.assertFalse(RateLimiter.acquire('openai', 'm', 1, max_wait=1))
+        mock_sleep.assert_not_called()
+
+    def test_stream_does_not_wait_past_deadline(self):
+        RateLimiter.configure('openai', requests_per_minute=1)
+        conversation = [{"role": "user", "content": "Hello"}]
+        with patch.object(ChatAPIHandler, '_send_request', return_value=RESPONSE):
+            ChatAPIHandler.make_api_request(api="openai", model="m", temperature=0, max_tokens=1, conversation=conversation)
+        with patch('AutoChatBot.GPTChatCompletion.GPT3ChatCompletion.stream_api_request') as mock_stream_api_request, \
+                patch('AutoChatBot.RateLimiter.time.sleep') as mock_sleep:
+            stream = ChatAPIHandler.stream_api_request(
+                api="openai", model="m", temperature=0, max_tokens=1, conversation=conversation, deadline=Deadline(5)
+            )
+            with self.assertRaises(TimeoutError):
+                next(iter(stream))
+        mock_sleep.assert_not_called()
+        mock_stream_api_request.assert_not_called()
+
+    def test_chat_api_handler_waits_for_rate_limiter(self):
+        ChatAPIHandler.configure_rate_limit('openai', tokens_per_minute=100000)
+        conversation = [{"role": "user", "content": "Hello"}]
+        with patch.object(RateLimiter, 'acquire', return_value=True) as mock_acquire, \
+                patch.object(ChatAPIHandler, '_send_request', return_value=RESPONSE):
+            response = ChatAPIHandler.make_api_request(
+                api="openai", model="m", temperature=0, max_tokens=100, conversation=conversation
+            )
+        self.assertEqual(response, RESPONSE)
+        api, model, tokens = mock_acquire.call_args.args
+        self.assertEqual((api, model), ('openai', 'm'))
+        self.assertGreater(tokens, 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 import unittest
+import os
 import sys
+import time
 from AutoChatBot.RemoveLanguageDelimiters import CodeExtractor
 
 class TestCodeExtractor(unittest.TestCase):
@@ -105,5 +107,66 @@ More text.
         extracted_code = CodeExtractor.extract_code(input_string, 'python')
         self.assertEqual(extracted_code, expected_output)
 
+    def test_extract_blocks_returns_every_block(self):
+        input_string = (
+            "Intro\n"
+            "```python\nprint(1)\n```\n"
+            "Between\n"
+            "~~~ JavaScript {.numberLines}\nconsole.log(2);\n~~~\n"
+            "```\nplain\n```"
+        )
+        blocks = CodeExtractor.extract_blocks(input_string)
+        self.assertEqual([(block['language'], block['code'], block['closed']) for block in blocks],
+                         [('python', 'print(1)', True), ('JavaScript', 'console.log(2);', True), ('', 'plain', True)])
+        for block in blocks:
+            self.assertTrue(input_string[block['start']:block['end']].startswith(('```', '~~~')))
+            self.assertTrue(input_string[block['start']:block['end']].endswith(('```', '~~~')))
+        self.assertEqual(blocks[0]['start'], len("Intro\n"))
+        self.assertEqual(blocks[2]['end'], len(input_string))
+        self.assertEqual([block['code'] for block in CodeExtractor.extract_blocks(input_string, 'javascript')], ['console.log(2);'])
+        self.assertEqual([block['code'] for block in CodeExtractor.extract_blocks(input_string, '')], ['plain'])
+
+    def test_nested_and_unclosed_fences(self):
+        input_string = "````markdown\n# Title\n```python\nx = 1\n```\n````\n```rust\nfn main() {}\n"
+        blocks = CodeExtractor.extract_blocks(input_string)
+        self.assertEqual(blocks[0]['code'], "# Title\n```python\nx = 1\n```")
+        self.assertEqual((blocks[1]['language'], blocks[1]['code'], blocks[1]['closed']), ('rust', 'fn main() {}', False))
+        # Only closed blocks are extracted
+        self.assertEqual(CodeExtractor.extract_code(input_string, 'rust'), input_string)
+
+    def test_indented_fence_and_inline_backticks(self):
+        input_string = "1. Step\n    ```python\n    if x:\n        y()\n    ```\nUse ```python x``` inline.\n"
+        self.assertEqual(CodeExtractor.extract_blocks(input_string)[0]['code'], "if x:\n    y()")
+        self.assertEqual(len(CodeExtractor.extract_blocks(input_string)), 1)
+
+    def test_language_tag_must_match_exactly(self):
+        input_string = "```cpp\nint main() {}\n```\n```c\nint main(void) {}\n```"
+        self.assertEqual(CodeExtractor.extract_code(input_string, 'c'), 'int main(void) {}')
+        self.assertEqual(CodeExtractor.extract_code(input_string, 'CPP'), 'int main() {}')
+
+    def test_default_when_no_block(self):
+        input_string = "Sure, I can help with that."
+        self.assertIsNone(CodeExtractor.extract_code(input_string, 'python', default=None))
+        self.assertEqual(CodeExtractor.extract_code(input_string, 'python'), input_string)
+        self.assertEqual(CodeExtractor.extract_code("```python\n\n```", 'python', default=None), '')
+
+    def test_opening_fence_after_text(self):
+        input_string = "Here: ```python\nx = 1\n```\nThat sets x."
+        self.assertEqual(CodeExtractor.extract_code(input_string, 'python', default=None), 'x = 1')
+        # A fence in prose with a longer info string does not open a block
+        self.assertEqual(CodeExtractor.extract_blocks("Wrap it in a ```python fence\nx = 1\n```\n", 'python'), [])
+        # A closing fence must start its line
+        self.assertFalse(CodeExtractor.extract_blocks("```python\nx = 1 ```\n")[0]['closed'])
+
+    @unittest.skipUnless(os.environ.get('AUTOCHATBOT_BENCHMARK'), "Set AUTOCHATBOT_BENCHMARK=1 to run the benchmark.")
+    def test_benchmark_large_response(self):
+        block = "Some explanation of the next step.\n\n```python\n" + "def f(x):\n    return x * 2\n" * 400 + "```\n\n"
+        input_string = block * 500
+        start_time = time.perf_counter()
+        blocks = CodeExtractor.extract_blocks(input_string)
+        elapsed = time.perf_counter() - start_time
+        self.assertEqual(len(blocks), 500)
+        print(f"\n{len(input_string) / 1e6:.1f} MB, {len(blocks)} blocks: extract_blocks {elapsed * 1000:.1f} ms")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+import tempfile
+import os
+import time
+from unittest.mock import patch
+from AutoChatBot.ResponseCache import ResponseCache
+from AutoChatBot.ChatAPIHandler import ChatAPIHandler
+
+RESPONSE = {'choices': [{'message': {'role': 'assistant', 'content': 'cached answer'}}]}
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        ResponseCache.configure(self.tempdir.name)
+        ResponseCache.reset_stats()
+        self.conversation = [{"role": "user", "content": "Hello"}]
+
+    def tearDown(self):
+        ResponseCache.disable()
+        self.tempdir.cleanup()
+
+    def test_make_key_is_stable_and_parameter_sensitive(self):
+        key_1 = ResponseCache.make_key('openai', model='m', conversation=self.conversation, temperature=0)
+        key_2 = ResponseCache.make_key('openai', temperature=0, conversation=list(self.conversation), model='m')
+        key_3 = ResponseCache.make_key('openai', model='m', conversation=self.conversation, temperature=0.1)
+        key_4 = ResponseCache.make_key('togetherai', model='m', conversation=self.conversation, temperature=0)
+        self.assertEqual(key_1, key_2)
+        self.assertNotEqual(key_1, key_3)
+        self.assertNotEqual(key_1, key_4)
+
+    def test_get_and_put(self):
+        key = ResponseCache.make_key('openai', model='m')
+        self.assertIsNone(ResponseCache.get(key))
+        ResponseCache.put(key, RESPONSE)
+        self.assertEqual(ResponseCache.get(key), RESPONSE)
+        stats = ResponseCache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['stores']), (1, 1, 1))
+
+    def test_corrupt_entry_is_a_miss(self):
+        key = ResponseCache.make_key('openai', model='m')
+        ResponseCache.put(key, RESPONSE)
+        with open(ResponseCache._entry_path(key), 'w') as file:
+            file.write('{truncated')
+        self.assertIsNone(ResponseCache.get(key))
+
+    def test_lru_eviction(self):
+        entry_size = len('{"n": 0}')
+        # Eviction goes down to EVICT_TO of the cap, so leave a little room for two entries.
+        ResponseCache.configure(self.tempdir.name, max_bytes=entry_size * 2 + 4)
+        keys = [ResponseCache.make_key('openai', n=n) for n in range(3)]
+        ResponseCache.put(keys[0], {"n": 0})
+        ResponseCache.put(keys[1], {"n": 1})
+        past = time.time() - 100
+        os.utime(ResponseCache._entry_path(keys[1]), (past, past))
+        os.utime(ResponseCache._entry_path(keys[0]), (past + 50, past + 50))
+
+        ResponseCache.put(keys[2], {"n": 2})
+
+        self.assertEqual(ResponseCache.get(keys[0]), {"n": 0})
+        self.assertIsNone(ResponseCache.get(keys[1]))
+        self.assertEqual(ResponseCache.get(keys[2]), {"n": 2})
+        self.assertEqual(ResponseCache.get_stats()['evictions'], 1)
+
+    def test_store_under_cap_does_not_scan(self):
+        with patch('AutoChatBot.ResponseCache.os.scandir', wraps=os.scandir) as mock_scandir:
+            for n in range(20):
+                ResponseCache.put(ResponseCache.make_key('openai', n=n), {"n": n})
+        mock_scandir.assert_not_called()
+        self.assertEqual(ResponseCache.get_size(), 20 * len('{"n": 0}') + 10 * 1)
+
+    def test_total_is_kept_when_entry_is_replaced_and_index_is_rebuilt(self):
+        key = ResponseCache.make_key('openai', model='m')
+        ResponseCache.put(key, {"a": 1})
+        ResponseCache.put(key, {"a": 12345})
+        self.assertEqual(ResponseCache.get_size(), len('{"a": 12345}'))
+        os.remove(os.path.join(self.tempdir.name, ResponseCache.INDEX_FILE))
+        ResponseCache.configure(self.tempdir.name)
+        self.assertEqual(ResponseCache.get_size(), len('{"a": 12345}'))
+
+    def test_put_rebuilds_missing_total(self):
+        ResponseCache.put(ResponseCache.make_key('openai', n=1), {"n": 1})
+        os.remove(os.path.join(self.tempdir.name, ResponseCache.INDEX_FILE))
+        ResponseCache.put(ResponseCache.make_key('openai', n=2), {"n": 2})
+        self.assertEqual(ResponseCache.get_size(), 2 * len('{"n": 1}'))
+
+    def test_eviction_scan_removes_stale_temp_files(self):
+        key = ResponseCache.make_key('openai', model='m')
+        ResponseCache.put(key, RESPONSE)
+        bucket = os.path.dirname(ResponseCache._entry_path(key))
+        stale_path = os.path.join(bucket, 'crashed.tmp')
+        fresh_path = os.path.join(bucket, 'writing.tmp')
+        for path in (stale_path, fresh_path):
+            with open(path, 'w') as file:
+                file.write('{"partial": ')
+        past = time.time() - ResponseCache.TEMP_FILE_MAX_AGE - 10
+        os.utime(stale_path, (past, past))
+
+        ResponseCache.configure(self.tempdir.name, max_bytes=1)
+        ResponseCache.put(ResponseCache.make_key('openai', model='other'), RESPONSE)
+
+        self.assertFalse(os.path.exists(stale_path))
+        self.assertTrue(os.path.exists(fresh_path))
+
+    def test_disabled_cache(self):
+        ResponseCache.disable()
+        key = ResponseCache.make_key('openai', model='m')
+        ResponseCache.put(key, RESPONSE)
+        self.assertIsNone(ResponseCache.get(key))
+        self.assertEqual(ResponseCache.get_stats()['misses'], 0)
+
+    @patch.object(ChatAPIHandler, '_send_request', return_value=RESPONSE)
+    def test_chat_api_handler_uses_cache(self, mock_send_request):
+        for _ in range(2):
+            response = ChatAPIHandler.make_api_request(
+                api="openai", model="m", temperature=0, max_tokens=10, conversation=self.conversation
+            )
+            self.assertEqual(response, RESPONSE)
+        mock_send_request.assert_called_once()
+        self.assertEqual(ChatAPIHandler.get_cache_stats()['hits'], 1)
+
+    @patch.object(ChatAPIHandler, '_send_request', return_value={"error": {"message": "rate limited", "type": "request_error"}})
+    def test_chat_api_handler_does_not_cache_errors(self, mock_send_request):
+        for _ in range(2):
+            ChatAPIHandler.make_api_request(api="openai", model="m", temperature=0, max_tokens=10, conversation=self.conversation)
+        self.assertEqual(mock_send_request.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import threading
+import email.utils
+import time
+from unittest.mock import patch
+import requests
+from AutoChatBot.RetryPolicy import RetryPolicy
+from AutoChatBot.ChatAPIHandler import ChatAPIHandler
+from AutoChatBot.Deadline import Deadline
+
+SUCCESS = {'choices': [{'message': {'role': 'assistant', 'content': 'Hello'}}]}
+RATE_LIMITED = {'error': {'message': '429 Too Many Requests', 'type': 'request_error', 'status_code': 429, 'retry_after': '2'}}
+SERVER_ERROR = {'error': {'message': '503 Service Unavailable', 'type': 'request_error', 'status_code': 503, 'retry_after': None}}
+BAD_REQUEST = {'error': {'message': '400 Bad Request', 'type': 'invalid_request_error', 'status_code': 400, 'retry_after': None}}
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.saved_settings = dict(RetryPolicy._settings)
+        RetryPolicy.reset_stats()
+        self.waits = []
+        patcher = patch.object(RetryPolicy, '_wait', side_effect=lambda delay, cancel_event=None: self.waits.append(delay) or False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        RetryPolicy._settings.update(self.saved_settings)
+
+    def test_is_retryable(self):
+        self.assertTrue(RetryPolicy.is_retryable(RATE_LIMITED))
+        self.assertTrue(RetryPolicy.is_retryable(SERVER_ERROR))
+        self.assertTrue(RetryPolicy.is_retryable({'error': {'message': 'reset', 'type': 'connection_error'}}))
+        self.assertFalse(RetryPolicy.is_retryable(BAD_REQUEST))
+        self.assertFalse(RetryPolicy.is_retryable(SUCCESS))
+
+    def test_get_retry_after(self):
+        self.assertEqual(RetryPolicy.get_retry_after(RATE_LIMITED), 2.0)
+        self.assertIsNone(RetryPolicy.get_retry_after(SERVER_ERROR))
+        http_date = email.utils.formatdate(time.time() + 30, usegmt=True)
+        delay = RetryPolicy.get_retry_after({'error': {'retry_after': http_date}})
+        self.assertTrue(25 <= delay <= 31, delay)
+
+    def test_compute_delay_full_jitter(self):
+        RetryPolicy.configure(base_delay=1.0, max_delay=5.0)
+        for retry_number in range(6):
+            delay = RetryPolicy.compute_delay(retry_number)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(5.0, 2 ** retry_number))
+        self.assertGreaterEqual(RetryPolicy.compute_delay(0, retry_after=10), 10)
+
+    def test_retries_until_success_and_honours_retry_after(self):
+        responses = iter([RATE_LIMITED, SERVER_ERROR, SUCCESS])
+        response = RetryPolicy.call('openai', lambda: next(responses))
+        self.assertEqual(response, SUCCESS)
+        self.assertEqual(len(self.waits), 2)
+        self.assertGreaterEqual(self.waits[0], 2.0)
+        self.assertEqual(RetryPolicy.get_stats('openai')['openai'],
+                         {'requests': 1, 'attempts': 3, 'retries': 2, 'gave_up': 0})
+
+    def test_non_retryable_error_is_returned_immediately(self):
+        self.assertEqual(RetryPolicy.call('openai', lambda: BAD_REQUEST), BAD_REQUEST)
+        self.assertEqual(self.waits, [])
+
+    def test_gives_up_after_max_retries(self):
+        RetryPolicy.configure(max_retries=2)
+        self.assertEqual(RetryPolicy.call('togetherai', lambda: SERVER_ERROR), SERVER_ERROR)
+        stats = RetryPolicy.get_stats('togetherai')['togetherai']
+        self.assertEqual((stats['attempts'], stats['retries'], stats['gave_up']), (3, 2, 1))
+
+    def test_gives_up_when_total_time_would_be_exceeded(self):
+        RetryPolicy.configure(max_total_time=1)
+        self.assertEqual(RetryPolicy.call('openai', lambda: RATE_LIMITED), RATE_LIMITED)
+        self.assertEqual(self.waits, [])
+
+    def test_no_retry_after_deadline(self):
+        deadline = Deadline(1)
+        self.assertEqual(RetryPolicy.call('openai', lambda: RATE_LIMITED, deadline=deadline), RATE_LIMITED)
+        self.assertEqual(self.waits, [])
+
+    def test_connection_error_is_retried_then_raised(self):
+        RetryPolicy.configure(max_retries=1)
+
+        def send():
+            raise requests.exceptions.ConnectionError("connection refused")
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            RetryPolicy.call('openai', send)
+        self.assertEqual(len(self.waits), 1)
+
+    def test_cancel_event_stops_retrying(self):
+        cancel_event = threading.Event()
+        cancel_event.set()
+        self.assertEqual(RetryPolicy.call('openai', lambda: SERVER_ERROR, cancel_event=cancel_event), SERVER_ERROR)
+        self.assertEqual(self.waits, [])
+
+    def test_configure_rejects_negative_values(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy.configure(max_retries=-1)
+
+    def test_chat_api_handler_retries_transient_errors(self):
+        with patch.object(ChatAPIHandler, '_send_request', side_effect=[RATE_LIMITED, SUCCESS]) as mock_send_request:
+            response = ChatAPIHandler.make_api_request(
+                api="togetherai", model="m", temperature=0, max_tokens=1, conversation=[{"role": "user", "content": "Hi"}]
+            )
+        self.assertEqual(response, SUCCESS)
+        self.assertEqual(mock_send_request.call_count, 2)
+        self.assertEqual(ChatAPIHandler.get_retry_stats('togetherai')['togetherai']['retries'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from AutoChatBot.SSEStreamParser import SSEStreamParser
+
+class TestSSEStreamParser(unittest.TestCase):
+
+    def test_iter_events_stops_at_done(self):
+        lines = [
+            'data: {"a": 1}',
+            '',
+            ': keep-alive comment',
+            '',
+            'data: {"a": 2}',
+            '',
+            'data: [DONE]',
+            '',
+            'data: {"a": 3}',
+            '',
+        ]
+        self.assertEqual(list(SSEStreamParser.iter_events(lines)), ['{"a": 1}', '{"a": 2}'])
+
+    def test_iter_events_joins_multiline_data_and_decodes_bytes(self):
+        lines = [b'event: message', b'data: first', b'data: second', b'']
+        self.assertEqual(list(SSEStreamParser.iter_events(lines)), ['first\nsecond'])
+
+    def test_iter_events_flushes_last_event_without_blank_line(self):
+        self.assertEqual(list(SSEStreamParser.iter_events(['data: tail'])), ['tail'])
+
+    def test_iter_tokens_openai_and_togetherai_formats(self):
+        lines = [
+            'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+            '',
+            'data: {"choices": [{"delta": {"content": "Hello"}}]}',
+            '',
+            'data: {"choices": [{"text": " world", "index": 0}]}',
+            '',
+            'data: {"choices": [{"delta": {}, "finish_reason": "stop"}]}',
+            '',
+            'data: [DONE]',
+            '',
+        ]
+        self.assertEqual(list(SSEStreamParser.iter_tokens(lines)), ['Hello', ' world'])
+
+    def test_iter_tokens_returns_finish_reason(self):
+        def finish_reason_of(lines):
+            tokens = SSEStreamParser.iter_tokens(lines)
+            while True:
+                try:
+                    next(tokens)
+                except StopIteration as end:
+                    return end.value
+
+        lines = ['data: {"choices": [{"delta": {"content": "Hel"}, "finish_reason": null}]}', '',
+                 'data: {"choices": [{"delta": {}, "finish_reason": "length"}]}', '',
+                 'data: {"choices": [], "usage": {"total_tokens": 5}}', '']
+        self.assertEqual(finish_reason_of(lines), 'length')
+        self.assertIsNone(finish_reason_of(lines[:2]))
+
+    def test_iter_tokens_raises_on_error_event(self):
+        lines = ['data: {"error": {"message": "rate limited"}}', '']
+        with self.assertRaises(ValueError):
+            list(SSEStreamParser.iter_tokens(lines))
+
+    def test_iter_tokens_raises_on_invalid_json(self):
+        with self.assertRaises(ValueError):
+            list(SSEStreamParser.iter_tokens(['data: {not json', '']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import tempfile
+import os
+import json
+from unittest.mock import patch
+from AutoChatBot.SessionStore import SessionStore
+
+class TestSessionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        SessionStore.configure(self.test_dir.name)
+
+    def tearDown(self):
+        SessionStore.configure(SessionStore.DEFAULT_DIR)
+        self.test_dir.cleanup()
+
+    def append(self, session_id, number, system=None):
+        request = ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": f"question {number}"}]
+        return SessionStore.append_turn(session_id, request, {"role": "assistant", "content": f"answer {number}"})
+
+    def test_append_and_read_turns(self):
+        self.assertEqual(SessionStore.count_turns('chat'), 0)
+        self.assertEqual(SessionStore.load_conversation('chat'), [])
+        self.assertEqual([self.append('chat', number) for number in range(3)], [0, 1, 2])
+        self.assertEqual(SessionStore.count_turns('chat'), 3)
+        turn = SessionStore.read_turn('chat', 1)
+        self.assertEqual(turn['request'], [{"role": "user", "content": "question 1"}])
+        self.assertEqual(turn['response'], {"role": "assistant", "content": "answer 1"})
+        self.assertEqual(SessionStore.read_turn('chat', -1)['response']['content'], "answer 2")
+        with self.assertRaises(IndexError):
+            SessionStore.read_turn('chat', 3)
+        with open(os.path.join(self.test_dir.name, 'chat.jsonl')) as file:
+            self.assertEqual(len([json.loads(line) for line in file]), 3)
+
+    def test_resume_after_reopening(self):
+        self.append('chat', 0, system="Be brief.")
+        SessionStore.configure(self.test_dir.name)
+        self.append('chat', 1)
+        self.assertEqual(SessionStore.load_conversation('chat'), [
+            {"role": "system", "content": "Be brief."},
+            {"role": "user", "content": "question 0"}, {"role": "assistant", "content": "answer 0"},
+            {"role": "user", "content": "question 1"}, {"role": "assistant", "content": "answer 1"},
+        ])
+
+    def test_load_conversation_with_token_budget(self):
+        self.append('chat', 0, system="Be brief.")
+        for number in range(1, 5):
+            self.append('chat', number)
+        # Overhead 3, system message 4 + 3, and two turns of (4 + 3) + (4 + 3) each
+        conversation = SessionStore.load_conversation('chat', max_tokens=3 + 7 + 2 * 14)
+        self.assertEqual([message['content'] for message in conversation],
+                         ["Be brief.", "question 3", "answer 3", "question 4", "answer 4"])
+        with patch.object(SessionStore, 'read_turn', wraps=SessionStore.read_turn) as mock_read_turn:
+            SessionStore.load_conversation('chat', max_tokens=3 + 7 + 2 * 14)
+            self.assertEqual(mock_read_turn.call_count, 4)
+        self.assertEqual(SessionStore.load_conversation('chat', max_tokens=0), [{"role": "system", "content": "Be brief."}])
+        self.assertEqual(len(SessionStore.load_conversation('chat', max_tokens=1000)), 11)
+
+    def test_half_written_turn_is_dropped(self):
+        self.append('chat', 0)
+        self.append('chat', 1)
+        SessionStore.close()
+        with open(os.path.join(self.test_dir.name, 'chat.jsonl'), 'ab') as file:
+            file.write(b'{"time": 1, "request": [')
+        with open(os.path.join(self.test_dir.name, 'chat.idx'), 'ab') as file:
+            file.write(SessionStore.OFFSET.pack(os.path.getsize(os.path.join(self.test_dir.name, 'chat.jsonl')) - 24))
+            file.write(b'\x01\x02')
+        self.assertEqual(self.append('chat', 2), 2)
+        self.assertEqual([message['content'] for message in SessionStore.load_conversation('chat')],
+                         ["question 0", "answer 0", "question 1", "answer 1", "question 2", "answer 2"])
+
+    def test_fsync_is_batched(self):
+        SessionStore.configure(self.test_dir.name, fsync_every=3, fsync_interval=3600)
+        with patch('AutoChatBot.SessionStore.os.fsync') as mock_fsync:
+            for number in range(7):
+                self.append('chat', number)
+            self.assertEqual(mock_fsync.call_count, 2 * 2)
+            SessionStore.close()
+            self.assertEqual(mock_fsync.call_count, 3 * 2)
+        self.assertEqual(SessionStore.count_turns('chat'), 7)
+
+    def test_invalid_session_id(self):
+        for session_id in ('../escape', '', '.hidden', 'a/b'):
+            with self.subTest(session_id=session_id):
+                with self.assertRaises(ValueError):
+                    self.append(session_id, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import random
+import unittest
+from AutoChatBot.StreamingThinkFilter import StreamingThinkFilter
+from AutoChatBot.response_processor import TextProcessor
+
+class TestStreamingThinkFilter(unittest.TestCase):
+
+    TEXT = "Hello ❬think❭plan A❬/think❭world <think>\nplan B\n</think>! a < b, ❬x❭ and <thin> stay."
+
+    @staticmethod
+    def run_filter(chunks):
+        think = []
+        think_filter = StreamingThinkFilter(think_sink=think.append)
+        message = ''.join(think_filter.feed(chunk) for chunk in chunks) + think_filter.finish()
+        return message, ''.join(think)
+
+    def test_whole_text(self):
+        message, think = self.run_filter([self.TEXT])
+        self.assertEqual(message, TextProcessor.THINK_PATTERN.sub('', self.TEXT))
+        self.assertEqual(think, "plan A\n\nplan B\n")
+
+    def test_tags_split_across_chunks(self):
+        expected = self.run_filter([self.TEXT])
+        self.assertEqual(self.run_filter(self.TEXT), expected)  # one character per chunk
+        generator = random.Random(3)
+        for _ in range(300):
+            cuts = sorted(generator.sample(range(len(self.TEXT) + 1), generator.randint(0, 12)))
+            chunks = [self.TEXT[start:end] for start, end in zip([0] + cuts, cuts + [len(self.TEXT)])]
+            self.assertEqual(self.run_filter(chunks), expected)
+
+    def test_message_is_released_before_the_stream_ends(self):
+        think_filter = StreamingThinkFilter()
+        self.assertEqual(think_filter.feed("Answer: 4"), "Answer: 4")
+        self.assertEqual(think_filter.feed(" <th"), " ")  # might be a tag
+        self.assertEqual(think_filter.feed("ink>hidden"), "")
+        self.assertTrue(think_filter.in_think)
+        self.assertEqual(think_filter.feed("</think> done <"), " done ")
+        self.assertEqual(think_filter.finish(), "<")
+
+    def test_mixed_tags_close_each_other(self):
+        self.assertEqual(self.run_filter(["a<think>b❬/think❭c❬think❭d</think>e"]), ("ace", "b\nd"))
+
+    def test_unclosed_span_is_think_content(self):
+        self.assertEqual(self.run_filter(["Text ❬think❭Unclosed", " thought❬/thi"]), ("Text ", "Unclosed thought❬/thi"))
+
+    def test_pending_is_bounded(self):
+        think_filter = StreamingThinkFilter()
+        for _ in range(10000):
+            think_filter.feed("<think>" + "x" * 100 + "</think>" + "y" * 100 + "❬thin")
+            self.assertLessEqual(len(think_filter._pending), 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from AutoChatBot.StringTable import StringTable
+
+class TestStringTable(unittest.TestCase):
+
+    def test_add_deduplicates_by_content(self):
+        table = StringTable()
+        self.assertEqual(table.add("Hello"), 0)
+        self.assertEqual(table.add("Grüß dich"), 1)
+        self.assertEqual(table.add("Hel" + "lo"), 0)
+        self.assertEqual(table.strings, ["Hello", "Grüß dich"])
+        report = table.get_report()
+        self.assertEqual((report['messages'], report['strings']), (3, 2))
+        self.assertEqual((report['message_bytes'], report['stored_bytes']), (21, 16))
+        self.assertAlmostEqual(report['ratio'], 21 / 16)
+
+    def test_strip_and_restore_context(self):
+        table = StringTable()
+        context = {"description": "d", "context": [
+            {"role": "system", "content": "Shared"},
+            {"role": "user", "content": [{"type": "text", "text": "Hi"}]},
+            {"role": "assistant", "content": "Shared"},
+        ]}
+        stripped, references = table.strip_context(context)
+        self.assertEqual(references, [0, None, 0])
+        self.assertEqual([message['content'] for message in stripped['context']], [None, [{"type": "text", "text": "Hi"}], None])
+        self.assertEqual(context['context'][0]['content'], "Shared")
+        self.assertEqual(StringTable.restore_context(stripped, references, table.strings.__getitem__), context)
+
+    def test_strip_context_without_messages(self):
+        table = StringTable()
+        self.assertEqual(table.strip_context({"context": None}), ({"context": None}, []))
+        self.assertEqual(table.strip_context("not a context"), ("not a context", []))
+        self.assertEqual(StringTable.restore_context({"context": None}, [], table.strings.__getitem__), {"context": None})
+
+    def test_empty_report(self):
+        report = StringTable().get_report()
+        self.assertEqual(report['ratio'], 1.0)
+        self.assertEqual(StringTable.format_report(report),
+                         "Deduplicated 0 message contents into 0 strings: 0 -> 0 bytes (1.00x)")
+
+    def test_intern_strings(self):
+        first = StringTable.intern_strings({"content": "".join(["long ", "prompt"]), "tags": ["a"], "n": 1})
+        second = StringTable.intern_strings({"content": "".join(["long ", "prompt"]), "tags": ["a"], "n": 1})
+        self.assertEqual(first, {"content": "long prompt", "tags": ["a"], "n": 1})
+        self.assertIs(first['content'], second['content'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+from AutoChatBot.TokenEstimator import TokenEstimator
+
+class TestTokenEstimator(unittest.TestCase):
+
+    def test_estimate_text_rounds_up(self):
+        self.assertEqual(TokenEstimator.estimate_text(""), 0)
+        self.assertEqual(TokenEstimator.estimate_text("abcd"), 1)
+        self.assertEqual(TokenEstimator.estimate_text("abcde"), 2)
+
+    def test_estimate_conversation_adds_overhead(self):
+        conversation = [
+            {"role": "system", "content": "a" * 40},
+            {"role": "user", "content": "b" * 8}
+        ]
+        expected = TokenEstimator.TOKENS_PER_CONVERSATION + 2 * TokenEstimator.TOKENS_PER_MESSAGE + 10 + 2
+        self.assertEqual(TokenEstimator.estimate_conversation(conversation), expected)
+
+    def test_estimate_request_includes_completion(self):
+        conversation = [{"role": "user", "content": "What is a closure?"}]
+        self.assertEqual(TokenEstimator.estimate_request(conversation, max_tokens=500), 512)
+        self.assertEqual(TokenEstimator.estimate_request(conversation, max_tokens=None), 12)
+
+    def test_estimate_message_without_content(self):
+        self.assertEqual(TokenEstimator.estimate_message({"role": "assistant", "content": None}), TokenEstimator.TOKENS_PER_MESSAGE)
+
+    def test_select_newest_fits_budget(self):
+        messages = [
+            {"role": "user", "content": "a" * 40},       # 14 tokens
+            {"role": "assistant", "content": "b" * 40},  # 14 tokens
+            {"role": "user", "content": "c" * 8},        # 6 tokens
+            {"role": "assistant", "content": "d" * 8},   # 6 tokens
+        ]
+        self.assertEqual(TokenEstimator.select_newest(messages, 100), messages)
+        self.assertEqual(TokenEstimator.select_newest(messages, 12), messages[2:])
+        # 26 tokens would fit the last three messages, but the window must not start with an answer.
+        self.assertEqual(TokenEstimator.select_newest(messages, 26), messages[2:])
+        self.assertEqual(TokenEstimator.select_newest(messages, 5), [])
+
+if __name__ == '__main__':
+    unittest.main()
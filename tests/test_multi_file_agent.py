@@ -4,6 +4,7 @@ import os
 from unittest.mock import patch, MagicMock
 from AutoChatBot.multi_file_agent import MultiFileAgent
 from AutoChatBot.ParserCreator import ParserCreator
+from AutoChatBot.ChatCompletionStream import ChatCompletionStream
 
 class TestMultiFileAgent(unittest.TestCase):
     """
@@ -112,6 +113,82 @@ class TestMultiFileAgent(unittest.TestCase):
         content = MultiFileAgent.generate_file_content(conversation, file_path, task, self.args)
         self.assertEqual(content, "Updated content")
 
+    @patch('AutoChatBot.ChatAPIHandler.ChatAPIHandler.make_api_request')
+    @patch('AutoChatBot.CodeBlockStopper.ChatAPIHandler.stream_api_request')
+    def test_generate_file_content_early_stop(self, mock_stream_api_request, mock_make_api_request):
+        """
+        Tests that with --early_stop a code file is streamed and the stream ends after its code block.
+        """
+        read = []
+
+        def tokens():
+            for token in ["```python\n", "print('hi')\n", "```\n", "Explanation", " of the code."]:
+                read.append(token)
+                yield token
+
+        mock_stream_api_request.return_value = ChatCompletionStream(tokens())
+        args = self.parser.parse_args(["--api", "openai", "--max_tokens", "100", "--early_stop"])
+        with patch('builtins.print'):
+            content = MultiFileAgent.generate_file_content([], "module.py", "TASK:\n\n", args)
+
+        self.assertEqual(content, "print('hi')")
+        self.assertEqual(len(read), 3)
+        self.assertEqual(mock_stream_api_request.call_args.kwargs['stop_sequences'], ['\n```\n'])
+        mock_make_api_request.assert_not_called()
+
+    def test_split_files(self):
+        """
+        Tests that the code blocks of one response are routed to the files their info strings name.
+        """
+        response = (
+            "Here are both files.\n"
+            "```python src/app.py\nprint('app')\n```\n"
+            "```html title=\"templates/index.html\"\n<p>hi</p>\n```\n"
+            "```python src/app.py\nprint('second')\n```\n"
+            "```text other.txt\nignored\n```\n"
+        )
+        files = MultiFileAgent.split_files(response, ["templates/index.html", "src/app.py", "src/missing.py"])
+        self.assertEqual(files, {"templates/index.html": "<p>hi</p>", "src/app.py": "print('app')"})
+        self.assertEqual(list(files), ["templates/index.html", "src/app.py"])
+        self.assertEqual(MultiFileAgent.split_files("```python app.py\nx\n```", ["a/app.py", "b/app.py"]), {})
+
+    @patch('AutoChatBot.ChatAPIHandler.ChatAPIHandler.make_api_request')
+    def test_execute_multi_block(self, mock_make_api_request):
+        """
+        Tests that --multi_block fills several files from one response and requests the missing ones one by one.
+        """
+        rewrite_files = [os.path.join(self.tempdir.name, name) for name in ("app.py", "style.css", "extra.js")]
+        mock_make_api_request.side_effect = [
+            {"choices": [{"message": {"content": f"```python {rewrite_files[0]}\nprint(1)\n```\n```css {rewrite_files[1]}\np {{}}\n```"}}]},
+            {"choices": [{"message": {"content": "```javascript\nlet x;\n```"}}]},
+        ]
+        args = self.parser.parse_args(["--api", "openai", "--max_tokens", "100", "--multi_block"])
+        with patch('builtins.print'):
+            result = MultiFileAgent.execute([], rewrite_files, question=self.question, args=args)
+
+        self.assertEqual(result, {rewrite_files[0]: "print(1)", rewrite_files[1]: "p {}", rewrite_files[2]: "let x;"})
+        self.assertEqual(list(result), rewrite_files)
+        self.assertEqual(mock_make_api_request.call_count, 2)
+        second_conversation = mock_make_api_request.call_args_list[1].kwargs['conversation']
+        self.assertTrue(any(f"```python {rewrite_files[0]}\nprint(1)\n```" in message['content'] for message in second_conversation))
+
+    @patch('AutoChatBot.ChatAPIHandler.ChatAPIHandler.make_api_request')
+    def test_execute_skips_code_file_without_block(self, mock_make_api_request):
+        """
+        Tests that a code file is left out of the result if its response has no code block for it.
+        """
+        rewrite_files = [os.path.join(self.tempdir.name, name) for name in ("app.py", "util.py")]
+        mock_make_api_request.side_effect = [
+            {"choices": [{"message": {"content": "I would rename the function first."}}]},
+            {"choices": [{"message": {"content": "```python\ndef util(): pass\n```"}}]},
+        ]
+        with patch('builtins.print'):
+            result = MultiFileAgent.execute([], rewrite_files, question=self.question, args=self.args)
+
+        self.assertEqual(result, {rewrite_files[1]: "def util(): pass"})
+        second_conversation = mock_make_api_request.call_args_list[1].kwargs['conversation']
+        self.assertFalse(any(f"rewritten {rewrite_files[0]}" in message['content'] for message in second_conversation))
+
     @patch('AutoChatBot.ChatAPIHandler.ChatAPIHandler.make_api_request', return_value={
         "choices": [{"message": {"content": "Updated content"}}]
     })
@@ -125,6 +202,16 @@ class TestMultiFileAgent(unittest.TestCase):
         self.assertEqual(result[self.rewrite_files[0]], "Updated content")
         mock_make_api_request.assert_called()
 
+    @patch('AutoChatBot.ChatAPIHandler.ChatAPIHandler.make_api_request')
+    def test_execute_skips_files_after_deadline(self, mock_make_api_request):
+        deadline = MagicMock()
+        deadline.expired.return_value = True
+        result = MultiFileAgent.execute(
+            self.reference_files, self.rewrite_files, question=self.question, args=self.args, debug=self.debug, deadline=deadline
+        )
+        self.assertEqual(result, {})
+        mock_make_api_request.assert_not_called()
+
     @patch('AutoChatBot.ChatAPIHandler.ChatAPIHandler.make_api_request', return_value={
         "choices": [{"message": {"content": "Generated content without reference files"}}]
     })
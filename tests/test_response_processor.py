@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from AutoChatBot.response_processor import TextProcessor
 
@@ -103,6 +105,20 @@ class TestTextProcessor(unittest.TestCase):
         self.assertEqual(result.strip(), 'hello')
 
 
+    def test_filter_think_stream(self):
+        chunks = ['Hello ❬th', 'ink❭hid', 'den❬/think❭ wor', 'ld']
+        think = []
+        message = ''.join(TextProcessor.filter_think_stream(chunks, think_sink=think.append))
+        self.assertEqual(message, TextProcessor.execute(''.join(chunks)))
+        self.assertEqual(''.join(think), 'hidden')
+
+    def test_filter_think_stream_to_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            think_path = os.path.join(temp_dir, 'think.txt')
+            chunks = ['<think>A</th', 'ink>x<think>B</think>y']
+            self.assertEqual(list(TextProcessor.filter_think_stream(chunks, think_path=think_path)), ['xy'])
+            with open(think_path, encoding='utf-8') as file:
+                self.assertEqual(file.read(), 'A\nB')
 
 if __name__ == '__main__':
     unittest.main()